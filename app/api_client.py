@@ -2,8 +2,205 @@
 from __future__ import annotations
 
 import requests
+import json
 import logging
-from typing import List, Dict
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Dict, Optional
+
+from fixtures import DEFAULT_INDEX_PATH, FixtureIndex
+from snapshot_store import RecordingSession, ReplaySession, SnapshotStore, snapshot_session
+from tracing import count, span, traced
+from transport import default_session
+
+
+class BootstrapCache:
+    """Shared cache for the bootstrap-static payload.
+
+    A fresh payload is served from memory for ``ttl`` seconds; after that it is
+    revalidated with a conditional GET (ETag / Last-Modified), so an unchanged
+    payload costs a 304 instead of a full download. Only one caller refreshes
+    at a time, outside the lock; the others keep getting the stale payload
+    meanwhile, so a slow upstream never blocks readers. The last good payload
+    is also written to ``snapshot_path`` so a new process starts warm and can
+    keep serving stale data if the API is unreachable.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        snapshot_path: str | Path | None = None,
+        name: str = "bootstrap",
+    ) -> None:
+        self.ttl = ttl
+        self.name = name
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self._lock = threading.Lock()
+        self._refreshed = threading.Condition(self._lock)
+        self._refreshing = False
+        self._data: Any = None
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._fetched_at = 0.0
+        self._derived: Dict[str, Any] = {}
+        self._snapshot_checked = False
+
+    def get(self, session: requests.Session, url: str, copy: bool = True) -> Any:
+        """Return the payload, fetching or revalidating if stale.
+
+        The result is the caller's own copy unless ``copy`` is False, in
+        which case it is the shared payload and must not be modified.
+        """
+        data = self._get(session, url)
+        return _copy_json(data) if copy else data
+
+    def derive(self, key: str, data: Any, build: Callable[[Any], Any]) -> Any:
+        """Memoize ``build(data)`` until the cached payload changes."""
+        with self._lock:
+            cached = self._derived.get(key)
+            if cached is not None and cached[0] is data:
+                return cached[1]
+        with span(f"api.{self.name}.derive.{key}"):
+            value = build(data)
+        with self._lock:
+            if data is self._data:
+                self._derived[key] = (data, value)
+        return value
+
+    def clear(self) -> None:
+        """Drop the in-memory payload (the disk snapshot is kept)."""
+        with self._lock:
+            self._data = None
+            self._etag = None
+            self._last_modified = None
+            self._fetched_at = 0.0
+            self._derived.clear()
+
+    def _get(self, session: requests.Session, url: str) -> Any:
+        with self._lock:
+            if self._data is None and not self._snapshot_checked:
+                self._snapshot_checked = True
+                self._load_snapshot()
+            while True:
+                if self._data is not None and time.time() - self._fetched_at < self.ttl:
+                    count(f"{self.name}.memory_hits")
+                    return self._data
+                if not self._refreshing:
+                    break
+                if self._data is not None:
+                    count(f"{self.name}.stale_hits")
+                    return self._data
+                # Nothing to serve yet: wait for the refresh in flight
+                self._refreshed.wait()
+            self._refreshing = True
+            headers = {}
+            if self._data is not None:
+                if self._etag:
+                    headers["If-None-Match"] = self._etag
+                if self._last_modified:
+                    headers["If-Modified-Since"] = self._last_modified
+
+        snap = None
+        try:
+            try:
+                with span(f"api.{self.name}.refresh"):
+                    res = session.get(url, headers=headers)
+                    data = None
+                    if res.status_code != 304:
+                        res.raise_for_status()
+                        data = res.json()
+            except Exception as e:
+                with self._lock:
+                    if self._data is None:
+                        raise
+                    logging.warning(f"Bootstrap refresh failed, serving cached copy: {e}")
+                    return self._data
+
+            with self._lock:
+                if data is None:
+                    if self._data is None:
+                        raise ValueError(f"{url} answered 304 but nothing is cached")
+                    count(f"{self.name}.not_modified")
+                    self._fetched_at = time.time()
+                    return self._data
+                count(f"{self.name}.downloads")
+                self._data = data
+                self._etag = res.headers.get("ETag")
+                self._last_modified = res.headers.get("Last-Modified")
+                self._fetched_at = time.time()
+                self._derived.clear()
+                snap = self._snapshot()
+                return data
+        finally:
+            with self._lock:
+                self._refreshing = False
+                self._refreshed.notify_all()
+            # Written outside the lock; only the refreshing caller gets here
+            if snap is not None:
+                self._save_snapshot(snap)
+
+    def _load_snapshot(self) -> None:
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snap = json.load(f)
+            self._data = snap["data"]
+            self._etag = snap.get("etag")
+            self._last_modified = snap.get("last_modified")
+            self._fetched_at = float(snap.get("fetched_at", 0.0))
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable bootstrap snapshot: {e}")
+
+    def _snapshot(self) -> Optional[Dict]:
+        if self.snapshot_path is None:
+            return None
+        return {
+            "data": self._data,
+            "etag": self._etag,
+            "last_modified": self._last_modified,
+            "fetched_at": self._fetched_at,
+        }
+
+    def _save_snapshot(self, snap: Dict) -> None:
+        tmp = self.snapshot_path.with_suffix(".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snap, f)
+            os.replace(tmp, self.snapshot_path)
+        except Exception as e:
+            logging.warning(f"Could not write bootstrap snapshot: {e}")
+
+
+def _copy_json(value: Any) -> Any:
+    """Deep copy of a decoded JSON payload; much faster than copy.deepcopy."""
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(v) for v in value]
+    return value
+
+
+# One cache per process so every FPLClient shares a single download.
+BOOTSTRAP_CACHE = BootstrapCache(
+    ttl=float(os.environ.get("FPL_BOOTSTRAP_TTL", 300)),
+    snapshot_path=os.environ.get(
+        "FPL_BOOTSTRAP_SNAPSHOT",
+        Path(__file__).with_name("bootstrap_static_snapshot.json"),
+    ),
+)
+
+# Fixtures change a few times a season (postponements, doubles); same policy.
+FIXTURES_CACHE = BootstrapCache(
+    ttl=float(os.environ.get("FPL_FIXTURES_TTL", 300)),
+    snapshot_path=os.environ.get(
+        "FPL_FIXTURES_SNAPSHOT",
+        Path(__file__).with_name("fixtures_snapshot.json"),
+    ),
+    name="fixtures",
+)
 
 
 class FPLClient:
@@ -11,8 +208,44 @@ class FPLClient:
     BASE_URL = "https://fantasy.premierleague.com/api"
     LOGIN_URL = "https://users.premierleague.com/accounts/login/"
 
-    def __init__(self) -> None:
-        self.session = requests.Session()
+    def __init__(
+        self,
+        bootstrap_cache: BootstrapCache | None = None,
+        fixtures_cache: BootstrapCache | None = None,
+        session: requests.Session | None = None,
+    ) -> None:
+        if session is None:
+            # FPL_SNAPSHOT_MODE=record|replay routes every request through the store
+            session = snapshot_session(os.environ.get("FPL_SNAPSHOT_MODE"))
+        # Pooled, timed-out, retrying transport unless a session is supplied
+        self.session = session or default_session()
+        if isinstance(session, ReplaySession):
+            # Replayed payloads must not leak into the live process-wide caches
+            bootstrap_cache = bootstrap_cache or BootstrapCache(ttl=float("inf"))
+            fixtures_cache = fixtures_cache or BootstrapCache(ttl=float("inf"), name="fixtures")
+        elif isinstance(session, RecordingSession):
+            # A warm shared cache would answer without touching the session,
+            # so bootstrap-static and fixtures would never be recorded
+            bootstrap_cache = bootstrap_cache or BootstrapCache()
+            fixtures_cache = fixtures_cache or BootstrapCache(name="fixtures")
+        self.bootstrap_cache = bootstrap_cache or BOOTSTRAP_CACHE
+        self.fixtures_cache = fixtures_cache or FIXTURES_CACHE
+
+    @classmethod
+    def replay(cls, store: SnapshotStore | str | None = None,
+               gameweek: int | None = None) -> "FPLClient":
+        """Client serving every request from a snapshot store, as of ``gameweek``."""
+        if not isinstance(store, SnapshotStore):
+            store = SnapshotStore(store) if store else SnapshotStore()
+        return cls(session=snapshot_session("replay", store, gameweek))
+
+    @classmethod
+    def recording(cls, store: SnapshotStore | str | None = None,
+                  gameweek: int | None = None) -> "FPLClient":
+        """Live client that also records every response into a snapshot store."""
+        if not isinstance(store, SnapshotStore):
+            store = SnapshotStore(store) if store else SnapshotStore()
+        return cls(session=snapshot_session("record", store, gameweek))
 
     def login(self, email: str, password: str) -> bool:
         """Login to FPL with credentials."""
@@ -30,36 +263,61 @@ class FPLClient:
             logging.error(f"Login failed: {e}")
             return False
 
+    @traced("api.get_bootstrap")
+    def get_bootstrap(self) -> Dict:
+        """Fetch the bootstrap-static payload through the shared cache (a private copy)."""
+        return self.bootstrap_cache.get(self.session, f"{self.BASE_URL}/bootstrap-static/")
+
+    def _shared_bootstrap(self) -> Dict:
+        """The cached bootstrap payload itself, for read-only use."""
+        return self.bootstrap_cache.get(self.session, f"{self.BASE_URL}/bootstrap-static/",
+                                        copy=False)
+
+    @traced("api.get_all_players")
     def get_all_players(self) -> List[Dict]:
         """Fetch all players from the Bootstrap static endpoint."""
-        url = f"{self.BASE_URL}/bootstrap-static/"
         try:
-            res = self.session.get(url)
-            res.raise_for_status()
-            data = res.json()
-            players = data.get("elements", [])
-            # Normalize to only required keys: id, name, position, now_cost
-            normalized = []
-            for p in players:
-                normalized.append({
-                    "id": p.get("id"),
-                    "name": p.get("web_name"),
-                    "position": self._element_type(p.get("element_type")),
-                    "cost": p.get("now_cost") / 10.0,
-                })
-            return normalized
+            data = self._shared_bootstrap()
+            players = self.bootstrap_cache.derive("players", data, self._normalize_players)
+            return [dict(p) for p in players]
         except Exception as e:
             logging.error(f"Error fetching all players: {e}")
             return []
 
+    def get_events(self) -> List[Dict]:
+        """Fetch the gameweek list from the Bootstrap static endpoint."""
+        try:
+            return _copy_json(self._shared_bootstrap().get("events", []))
+        except Exception as e:
+            logging.error(f"Error fetching events: {e}")
+            return []
+
+    def get_teams(self) -> List[Dict]:
+        """Fetch the Premier League clubs from the Bootstrap static endpoint."""
+        try:
+            return _copy_json(self._shared_bootstrap().get("teams", []))
+        except Exception as e:
+            logging.error(f"Error fetching teams: {e}")
+            return []
+
+    def _normalize_players(self, data: Dict) -> List[Dict]:
+        """Normalize to only required keys: id, name, position, cost."""
+        normalized = []
+        for p in data.get("elements", []):
+            normalized.append({
+                "id": p.get("id"),
+                "name": p.get("web_name"),
+                "position": self._element_type(p.get("element_type")),
+                "cost": p.get("now_cost") / 10.0,
+            })
+        return normalized
+
+    @traced("api.get_team")
     def get_team(self, team_id: int) -> List[Dict]:
         """Fetch a user's current team using the public picks endpoint."""
         try:
             # Get current gameweek from bootstrap-static
-            url = f"{self.BASE_URL}/bootstrap-static/"
-            res = self.session.get(url)
-            res.raise_for_status()
-            static = res.json()
+            static = self._shared_bootstrap()
             current_gw = static.get("events", [{}])[0].get("id")
 
             # Get all players for reference
@@ -96,6 +354,7 @@ class FPLClient:
         mapping = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
         return mapping.get(et_id, "")
 
+    @traced("api.get_player_details")
     def get_player_details(self, player_id: int) -> dict:
         """Fetch detailed stats for a specific player."""
         url = f"{self.BASE_URL}/element-summary/{player_id}/"
@@ -107,13 +366,34 @@ class FPLClient:
             logging.error(f"Error fetching player details: {e}")
             return {}
 
+    @traced("api.get_fixtures")
     def get_fixtures(self) -> list:
-        """Fetch all fixtures."""
+        """Fetch all fixtures through the shared fixtures cache."""
         url = f"{self.BASE_URL}/fixtures/"
         try:
-            res = self.session.get(url)
-            res.raise_for_status()
-            return res.json()
+            return self.fixtures_cache.get(self.session, url)
         except Exception as e:
             logging.error(f"Error fetching fixtures: {e}")
             return []
+
+    @traced("api.get_fixture_index")
+    def get_fixture_index(self, save_path: str | None = DEFAULT_INDEX_PATH) -> Optional[FixtureIndex]:
+        """Team x gameweek fixture index, rebuilt only when the fixtures change.
+
+        A rebuilt index is also written to ``save_path`` for
+        ``fixtures.get_fixture_index`` readers in other processes.
+        """
+        url = f"{self.BASE_URL}/fixtures/"
+        try:
+            fixtures = self.fixtures_cache.get(self.session, url, copy=False)
+        except Exception as e:
+            logging.error(f"Error fetching fixtures: {e}")
+            return None
+
+        def build(data):
+            index = FixtureIndex.from_fixtures(data, self.get_teams())
+            if save_path:
+                index.save(save_path)
+            return index
+
+        return self.fixtures_cache.derive("fixture_index", fixtures, build)
@@ -1,10 +1,12 @@
 # app/app.py
 import streamlit as st
-import pandas as pd
+import json
 import sys, os
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from suggestions import analyze_gw_data, show_analysis
+import tracing
+from engine import Squad, load_squad, warm_up_in_background
+from suggestions import show_analysis
 # ...
 
 # === Page Config ===
@@ -14,6 +16,44 @@ st.set_page_config(
     layout="wide"
 )
 
+# Debug panel for operators only (FPL_DEBUG=1): tracing is process-wide and
+# the panel shows the last request of any session, so visitors can't open it
+DEBUG = os.environ.get("FPL_DEBUG") == "1"
+if os.environ.get("FPL_METRICS_PORT"):
+    tracing.serve_metrics(int(os.environ["FPL_METRICS_PORT"]))
+# Fill the shared caches while the first visitor is still on the landing page
+warm_up_in_background()
+
+
+def debug_panel() -> None:
+    """Last request's span tree, per-span totals, counters and profile."""
+    import pandas as pd
+
+    with st.expander("🔧 Debug: timings and metrics", expanded=True):
+        trace = tracing.last_trace()
+        if trace is None:
+            st.write("No traced request yet; enable tracing in the sidebar and rerun.")
+        else:
+            st.write(f"Last request `{trace.name}`: {trace.total_ms:.1f} ms")
+            st.dataframe(pd.DataFrame([{
+                'Span': '\u2003' * s['depth'] + s['name'],
+                'Start (ms)': s['start_ms'],
+                'Duration (ms)': s['duration_ms'],
+            } for s in trace.to_dict()['spans']]), use_container_width=True)
+        snap = tracing.snapshot()
+        if snap['spans']:
+            st.write("All requests since start")
+            st.dataframe(pd.DataFrame([
+                {'Span': name, 'Calls': s['count'], 'Mean (ms)': s['mean_ms'],
+                 'Max (ms)': s['max_ms'], 'Total (ms)': s['total_ms']}
+                for name, s in snap['spans'].items()
+            ]).sort_values('Total (ms)', ascending=False), use_container_width=True)
+        st.json({'counters': snap['counters'], 'http': snap['transport']}, expanded=False)
+        if trace is not None and trace.profile:
+            st.code(trace.profile)
+        st.download_button("Download metrics JSON", json.dumps(snap, indent=1),
+                           file_name="fpl_metrics.json", mime="application/json")
+
 # === Sidebar ===
 with st.sidebar:
     st.image(
@@ -31,21 +71,35 @@ with st.sidebar:
     top_n = st.number_input("Top N suggestions", min_value=1, max_value=10, value=5)
     run_btn = st.button("Show Analysis")
 
+    profile_run = False
+    if DEBUG:
+        st.subheader("Debug")
+        # Process-wide switch: affects every session on this server
+        tracing.enable(st.checkbox("Trace requests", value=tracing.ENABLED))
+        profile_run = st.checkbox("Profile with cProfile", value=False,
+                                  disabled=not tracing.ENABLED)
+
 # === Main ===
+# The squad is the only per-session state; player data, predictions and
+# fixtures are shared by every session (see engine)
 if run_btn:
     if mode == "Manual entry":
         try:
             ids = [int(x.strip()) for x in manual_ids.split(",") if x.strip()]
-            picks_override = [{"element": pid, "is_captain": False} for pid in ids]
         except ValueError:
             st.error("Invalid IDs; please enter integers separated by commas.")
             st.stop()
-      # Pass only picks_override into show_analysis
-        show_analysis(picks_override=picks_override)
+        st.session_state["squad"] = Squad.from_ids(ids)
     else:
         # JSON mode (GW5)
-        show_analysis()
+        st.session_state["squad"] = load_squad()
 
+if "squad" in st.session_state:
+    with tracing.request("show_analysis", profile=profile_run):
+        show_analysis(squad=st.session_state["squad"])
 else:
     st.title("Fantasy Premier League Helper Demo")
     st.write("Select load mode and click 'Show Analysis' in the sidebar.")
+
+if DEBUG:
+    debug_panel()
@@ -0,0 +1,202 @@
+"""Walk-forward backtesting of point-prediction models in a process pool."""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+MODELS = ('ridge', 'lasso', 'lightgbm', 'voting')
+
+
+def make_model(name: str):
+    """Fresh, unfitted estimator for a model name in ``MODELS``.
+
+    Parameters follow the modelling notebooks; estimators are imported
+    here so workers only pay for the ones they fit.
+    """
+    from sklearn.linear_model import Lasso, Ridge
+
+    if name == 'ridge':
+        return Ridge(alpha=1.0)
+    if name == 'lasso':
+        return Lasso(alpha=0.01, tol=1e-3, max_iter=500, random_state=42)
+    if name in ('lightgbm', 'voting'):
+        import lightgbm as lgb
+        gbm = lgb.LGBMRegressor(n_estimators=200, learning_rate=0.05, num_leaves=31,
+                                n_jobs=1, random_state=42, verbose=-1)
+        if name == 'lightgbm':
+            return gbm
+        from sklearn.ensemble import VotingRegressor
+        return VotingRegressor([('ridge', make_model('ridge')),
+                                ('lasso', make_model('lasso')),
+                                ('lgbm', gbm)])
+    raise ValueError(f"unknown model {name!r}; expected one of {MODELS}")
+
+
+def walk_forward_folds(
+    times: np.ndarray,
+    min_train: int = 5,
+    horizon: int = 1,
+    step: int = 1,
+    season_size: int = 100,
+) -> List[Tuple[int, int]]:
+    """(train_until, test_until) pairs over the distinct time keys.
+
+    Times are ``season_index * season_size + GW``; folds never test across
+    a season boundary, and each season needs ``min_train`` gameweeks of its
+    own before its first fold.
+    """
+    folds = []
+    keys = np.unique(times)
+    for season in np.unique(keys // season_size):
+        gws = keys[keys // season_size == season]
+        for i in range(min_train - 1, len(gws) - 1, step):
+            end = min(i + horizon, len(gws) - 1)
+            folds.append((int(gws[i]), int(gws[end])))
+    return folds
+
+
+def top_n_accuracy(
+    times: np.ndarray,
+    players: np.ndarray,
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    n: int = 10,
+) -> float:
+    """Mean share of each gameweek's actual top-``n`` that the model also ranks top-``n``."""
+    scores = []
+    for t in np.unique(times):
+        mask = times == t
+        if mask.sum() < n:
+            continue
+        p = players[mask]
+        actual = set(p[np.argsort(-y_true[mask], kind='stable')[:n]].tolist())
+        predicted = set(p[np.argsort(-y_pred[mask], kind='stable')[:n]].tolist())
+        scores.append(len(actual & predicted) / n)
+    return float(np.mean(scores)) if scores else float('nan')
+
+
+# Arrays shared with pool workers: name -> (shm name, shape, dtype)
+_SHARED: Dict[str, np.ndarray] = {}
+_SEGMENTS: List[shared_memory.SharedMemory] = []
+
+
+def _attach(spec: Dict[str, Tuple[str, Tuple[int, ...], str]]) -> None:
+    """Pool initializer: map the parent's shared arrays without copying."""
+    _SHARED.clear()
+    for key, (name, shape, dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _SEGMENTS.append(shm)
+        _SHARED[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _run_fold(task: Tuple[str, int, int, int]) -> Dict:
+    model_name, train_until, test_until, top_n = task
+    X, y, t, players = _SHARED['X'], _SHARED['y'], _SHARED['t'], _SHARED['players']
+    train = t <= train_until
+    test = (t > train_until) & (t <= test_until)
+    model = make_model(model_name)
+    model.fit(X[train], y[train])
+    pred = model.predict(X[test])
+    err = pred - y[test]
+    return {
+        'model': model_name,
+        'train_until': train_until,
+        'test_until': test_until,
+        'n_train': int(train.sum()),
+        'n_test': int(test.sum()),
+        'mae': float(np.abs(err).mean()),
+        'rmse': float(np.sqrt((err ** 2).mean())),
+        f'top{top_n}': top_n_accuracy(t[test], players[test], y[test], pred, top_n),
+    }
+
+
+def backtest(
+    df: pd.DataFrame,
+    feature_cols: Sequence[str],
+    models: Sequence[str] = MODELS,
+    target_col: str = 'Points',
+    gw_col: str = 'GW',
+    season_col: str = 'Season',
+    player_col: str = 'Player',
+    min_train: int = 5,
+    horizon: int = 1,
+    step: int = 1,
+    top_n: int = 10,
+    n_jobs: Optional[int] = None,
+    progress: Optional[Callable[[Dict], None]] = None,
+) -> pd.DataFrame:
+    """Walk-forward evaluation of every model on every fold.
+
+    For each fold the model is trained on all rows up to gameweek ``k``
+    (earlier seasons included) and scored on gameweeks ``k+1..k+horizon``
+    of the same season. Folds run in a process pool; the feature matrix is
+    placed in shared memory once and mapped by every worker. Returns one
+    row per (model, fold) with MAE, RMSE and top-``n`` accuracy.
+    """
+    X = df[list(feature_cols)].to_numpy(dtype=np.float64, na_value=0.0)
+    y = df[target_col].to_numpy(dtype=np.float64)
+    if season_col in df:
+        season_idx = pd.factorize(df[season_col], sort=True)[0]
+    else:
+        season_idx = np.zeros(len(df), dtype=np.int64)
+    t = season_idx.astype(np.int64) * 100 + df[gw_col].to_numpy(dtype=np.int64)
+    players = pd.factorize(df[player_col])[0].astype(np.int64) if player_col in df \
+        else np.arange(len(df), dtype=np.int64)
+
+    folds = walk_forward_folds(t, min_train=min_train, horizon=horizon, step=step)
+    tasks = [(m, k, end, top_n) for m in models for k, end in folds]
+    n_jobs = n_jobs or os.cpu_count() or 1
+
+    arrays = {'X': X, 'y': y, 't': t, 'players': players}
+    segments: List[shared_memory.SharedMemory] = []
+    results: List[Dict] = []
+    try:
+        spec = {}
+        for key, arr in arrays.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            segments.append(shm)
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+            spec[key] = (shm.name, arr.shape, arr.dtype.str)
+
+        if n_jobs == 1:
+            _attach(spec)
+            outputs = map(_run_fold, tasks)
+        else:
+            pool = ProcessPoolExecutor(max_workers=n_jobs, initializer=_attach,
+                                       initargs=(spec,))
+            # Longest folds (most training rows) first keeps workers busy
+            order = sorted(range(len(tasks)), key=lambda i: -tasks[i][1])
+            futures = [pool.submit(_run_fold, tasks[i]) for i in order]
+            outputs = (f.result() for f in futures)
+        try:
+            for row in outputs:
+                results.append(row)
+                if progress is not None:
+                    progress(row)
+        finally:
+            if n_jobs != 1:
+                pool.shutdown(cancel_futures=True)
+    finally:
+        _SHARED.clear()
+        while _SEGMENTS:
+            _SEGMENTS.pop().close()
+        for shm in segments:
+            shm.close()
+            shm.unlink()
+
+    if not results:
+        return pd.DataFrame(columns=['model', 'train_until', 'test_until', 'n_train',
+                                     'n_test', 'mae', 'rmse', f'top{top_n}'])
+    return pd.DataFrame(results).sort_values(['model', 'train_until'], ignore_index=True)
+
+
+def summarize(results: pd.DataFrame) -> pd.DataFrame:
+    """Mean of every metric per model, best MAE first."""
+    metrics = [c for c in results.columns if c in ('mae', 'rmse') or c.startswith('top')]
+    return results.groupby('model')[metrics].mean().sort_values('mae')
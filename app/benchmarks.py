@@ -0,0 +1,449 @@
+"""Benchmarks for the suggestion and data-loading hot paths.
+
+Synthetic players, manager entries and a fitted model are generated at a
+named scale, each hot path is timed with an auto-calibrated loop, and the
+medians are compared against a recorded baseline::
+
+    python app/benchmarks.py                      # small scale, check baseline
+    python app/benchmarks.py --scale large        # 10k players, 100k managers
+    python app/benchmarks.py --record             # rewrite the baseline
+    python app/benchmarks.py --only find_entry --only rank_transfers
+
+The run exits non-zero when any benchmark's median is more than its
+threshold ratio slower than the baseline (see ``compare``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+DEFAULT_BASELINE = Path(__file__).with_name("benchmark_baseline.json")
+# A median this many times the baseline's fails the check
+DEFAULT_THRESHOLD = 1.5
+# Slowdowns smaller than this (seconds) are noise, whatever the ratio
+MIN_REGRESSION = 0.002
+
+POSITIONS = ('GK', 'DEF', 'MID', 'FW')
+POSITION_SHARE = (0.1, 0.35, 0.4, 0.15)
+SQUAD_SHAPE = {'GK': 2, 'DEF': 5, 'MID': 5, 'FW': 3}
+N_FEATURES = 12
+
+
+class Scale(NamedTuple):
+    players: int
+    managers: int
+    clubs: int = 20
+
+
+SCALES = {
+    'small': Scale(players=700, managers=1_000),
+    'medium': Scale(players=2_500, managers=10_000),
+    'large': Scale(players=10_000, managers=100_000),
+}
+
+
+# --- synthetic data ---------------------------------------------------------
+
+def make_players_csv(path: str, n_players: int, n_clubs: int = 20, seed: int = 0) -> None:
+    """Player master CSV in the ``data/players_id_2024_2025.csv`` layout."""
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(POSITIONS, n_players, p=POSITION_SHARE)
+    clubs = rng.integers(1, n_clubs + 1, n_players)
+    prices = np.round(rng.uniform(4.0, 13.0, n_players), 1)
+    with open(path, 'w') as f:
+        f.write('id,fpl_Player,Position,Team,Price\n')
+        for i in range(n_players):
+            f.write(f'{i + 1},Player {i + 1},{positions[i]},C{clubs[i]:02d},{prices[i]}\n')
+
+
+def make_squad(positions: Sequence[str], seed: int = 0) -> List[int]:
+    """15 valid player ids (2 GK, 5 DEF, 5 MID, 3 FW) for a players CSV."""
+    rng = np.random.default_rng(seed)
+    positions = np.asarray(positions)
+    squad: List[int] = []
+    for pos, n in SQUAD_SHAPE.items():
+        rows = np.flatnonzero(positions == pos)
+        squad.extend(int(r) + 1 for r in rng.choice(rows, n, replace=False))
+    return squad
+
+
+def make_manager_json(
+    path: str,
+    n_managers: int,
+    n_players: int,
+    target_gw: int,
+    seed: int = 0,
+    squad: Optional[Sequence[int]] = None,
+) -> None:
+    """Manager GW entries in the ``manager_data_each_gw_24_25.json`` layout.
+
+    One entry per manager, written as an indented JSON array like the real
+    file. Only the last entry is for ``target_gw`` (with ``squad`` as its
+    picks), so lookups for it have to scan the whole file.
+    """
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(1, n_players + 1, (n_managers, 15))
+    events = rng.integers(1, max(target_gw, 2), n_managers)
+    if squad is not None:
+        picks[-1] = squad
+    events[-1] = target_gw
+    with open(path, 'w') as f:
+        f.write('[\n')
+        for i in range(n_managers):
+            entry = {
+                'active_chip': None,
+                'automatic_subs': [],
+                'entry': i + 1,
+                'entry_history': {
+                    'event': int(events[i]), 'points': int(rng.integers(20, 100)),
+                    'total_points': int(rng.integers(100, 2500)), 'bank': int(rng.integers(0, 30)),
+                    'value': 1000, 'event_transfers': 0, 'event_transfers_cost': 0,
+                },
+                'picks': [{'element': int(e), 'position': j + 1,
+                           'multiplier': 2 if j == 0 else (1 if j < 11 else 0),
+                           'is_captain': j == 0, 'is_vice_captain': j == 1}
+                          for j, e in enumerate(picks[i])],
+            }
+            f.write(json.dumps(entry, indent=4))
+            f.write(',\n' if i < n_managers - 1 else '\n')
+        f.write(']\n')
+
+
+def make_model(path: str, n_features: int = N_FEATURES, seed: int = 0) -> None:
+    """Fitted Ridge model saved with joblib, as ``RidgeARModel`` loads it."""
+    import joblib
+    from sklearn.linear_model import Ridge
+
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(2_000, n_features))
+    y = X @ rng.normal(size=n_features) + rng.normal(size=2_000)
+    joblib.dump(Ridge(alpha=1.0).fit(X, y), path)
+
+
+def make_fixture_index(n_clubs: int, n_gws: int = 38, seed: int = 0):
+    """Round-robin style fixtures for clubs ``C01``.. with random difficulty."""
+    from fixtures import FixtureIndex
+
+    rng = np.random.default_rng(seed)
+    fixtures = []
+    for gw in range(1, n_gws + 1):
+        order = rng.permutation(np.arange(1, n_clubs + 1))
+        for h, a in zip(order[::2], order[1::2]):
+            fixtures.append({'event': gw, 'team_h': int(h), 'team_a': int(a),
+                             'team_h_difficulty': int(rng.integers(2, 6)),
+                             'team_a_difficulty': int(rng.integers(2, 6))})
+    teams = [{'id': t, 'short_name': f'C{t:02d}'} for t in range(1, n_clubs + 1)]
+    return FixtureIndex.from_fixtures(fixtures, teams)
+
+
+class Workload:
+    """Synthetic files for one scale, in a temporary directory."""
+
+    def __init__(self, scale: Scale, root: str, target_gw: int, seed: int = 0) -> None:
+        from player_store import load_player_table
+
+        self.scale = scale
+        self.root = root
+        self.players_csv = os.path.join(root, 'players.csv')
+        self.gw_json = os.path.join(root, 'managers.json')
+        self.model_path = os.path.join(root, 'model.joblib')
+        make_players_csv(self.players_csv, scale.players, scale.clubs, seed)
+        table = load_player_table(self.players_csv)
+        self.squad = make_squad(table.positions, seed)
+        make_manager_json(self.gw_json, scale.managers, scale.players, target_gw, seed, self.squad)
+        make_model(self.model_path, seed=seed)
+        self.fixture_index = make_fixture_index(scale.clubs, seed=seed)
+        self.features = np.random.default_rng(seed).normal(size=(scale.players, 3, N_FEATURES))
+
+
+@contextlib.contextmanager
+def workload(scale: Scale, target_gw: int = 5, seed: int = 0) -> Iterator[Workload]:
+    with tempfile.TemporaryDirectory(prefix='fpl-bench-') as root:
+        yield Workload(scale, root, target_gw, seed)
+
+
+@contextlib.contextmanager
+def pointed_at(module, **attrs) -> Iterator[None]:
+    """Temporarily set module attributes (data paths, cache getters)."""
+    old = {name: getattr(module, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in old.items():
+            setattr(module, name, value)
+
+
+# --- timing -----------------------------------------------------------------
+
+def measure(
+    func: Callable[[], object],
+    rounds: int = 7,
+    min_round_time: float = 0.01,
+    max_time: float = 10.0,
+) -> Dict[str, float]:
+    """Time ``func`` like ``timeit``: calibrated loops, GC off, per-call stats.
+
+    The loop count is doubled until one round takes ``min_round_time``;
+    fewer than ``rounds`` rounds run if they would exceed ``max_time``.
+    """
+    func()  # warm-up: imports, process-wide caches, page cache
+    number = 1
+    while True:
+        elapsed = _timed(func, number)
+        if elapsed >= min_round_time or number >= 1 << 20:
+            break
+        number *= 2
+    times = [elapsed / number]
+    budget = max_time - elapsed
+    while len(times) < rounds and budget > elapsed:
+        elapsed = _timed(func, number)
+        times.append(elapsed / number)
+        budget -= elapsed
+    return {
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.fmean(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'rounds': len(times),
+        'number': number,
+    }
+
+
+def _timed(func: Callable[[], object], number: int) -> float:
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - start
+    finally:
+        if enabled:
+            gc.enable()
+
+
+# --- benchmarks -------------------------------------------------------------
+
+def benchmarks(w: Workload) -> Dict[str, Callable[[], object]]:
+    """Name -> zero-argument callable for every hot path, bound to ``w``."""
+    import engine
+    from manager_stream import find_entry, iter_entries
+    from model import RidgeARModel
+    from player_store import load_player_table
+    from prediction_cache import PredictionCache
+    from recommendations import get_recommendations, materialize
+
+    target_gw = engine.TARGET_GW
+    table = load_player_table(w.players_csv)
+    preds = np.round(np.random.default_rng(0).triangular(4, 6, 13, (len(table), 3)), 2)
+    totals = preds.sum(axis=1)
+    squad_rows = table.rows(w.squad)
+
+    def as_dicts(rows):
+        return [{'id': int(table.ids[r]), 'name': str(table.names[r]),
+                 'position': str(table.positions[r]), 'team': str(table.teams[r]),
+                 'price': float(table.prices[r]), 'predicted_points': float(totals[r])}
+                for r in rows]
+
+    current = as_dicts(squad_rows)
+    squad_picks = [{'element': pid, 'is_captain': False} for pid in w.squad]
+    candidates = as_dicts(np.flatnonzero(~table.mask(w.squad)))
+    model = RidgeARModel(w.model_path)
+    flat_features = w.features.reshape(-1, N_FEATURES)
+    # Memory-only prediction cache, so runs never touch the app's SQLite file
+    cache = PredictionCache(db_path=None)
+
+    # Recommendations artifact for the app's default (placeholder) predictions
+    rec_dir = os.path.join(w.root, 'recommendations')
+    materialize(table, preds, engine.SEASON, target_gw, engine.prediction_key(),
+                out_dir=rec_dir, n_samples=256)
+
+    def in_app(func, materialized=False):
+        def lookup(*args, **kwargs):
+            return get_recommendations(*args, out_dir=rec_dir, **kwargs) if materialized else None
+
+        def run():
+            with pointed_at(engine, GW_JSON=w.gw_json, PLAYERS_CSV=w.players_csv,
+                            get_prediction_cache=lambda: cache,
+                            get_fixture_index=lambda: w.fixture_index,
+                            get_recommendations=lookup):
+                return func()
+        return run
+
+    def load_json():
+        with open(w.gw_json) as f:
+            return json.load(f)
+
+    return {
+        'json_load_managers': load_json,
+        'find_entry': lambda: find_entry(w.gw_json, target_gw),
+        'iter_entries': lambda: sum(1 for _ in iter_entries(w.gw_json)),
+        'player_table': lambda: load_player_table(w.players_csv),
+        'load_gw_data': in_app(lambda: engine.load_gw_data()),
+        'analyze_gw_data': in_app(lambda: engine.analyze_gw_data(bank=1.0)),
+        'analyze_materialized': in_app(
+            lambda: engine.analyze_gw_data(squad_picks, bank=1.0),
+            materialized=True),
+        'rank_transfers': lambda: engine.rank_transfers(current, candidates, bank=1.0),
+        'predict_future_points': lambda: model.predict_future_points(flat_features),
+        'predict_horizon': lambda: model.predict_horizon(w.features),
+    }
+
+
+def run(
+    scale: str = 'small',
+    only: Optional[Sequence[str]] = None,
+    rounds: int = 7,
+    max_time: float = 10.0,
+) -> Dict[str, Dict[str, float]]:
+    """Time every benchmark (or those in ``only``) at ``scale``."""
+    results: Dict[str, Dict[str, float]] = {}
+    with workload(SCALES[scale]) as w:
+        suite = benchmarks(w)
+        unknown = set(only or ()) - set(suite)
+        if unknown:
+            raise KeyError(f"unknown benchmarks: {sorted(unknown)}")
+        for name, func in suite.items():
+            if only and name not in only:
+                continue
+            results[name] = measure(func, rounds=rounds, max_time=max_time)
+            logging.info(f"{name}: {_fmt(results[name]['median'])}")
+    return results
+
+
+# --- baseline ---------------------------------------------------------------
+
+def machine_info() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': str(os.cpu_count()),
+    }
+
+
+def load_baseline(path: str | Path = DEFAULT_BASELINE) -> Dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def record_baseline(
+    results: Dict[str, Dict[str, float]],
+    scale: str,
+    path: str | Path = DEFAULT_BASELINE,
+) -> Dict:
+    """Store ``results`` as the baseline for ``scale``.
+
+    Other scales, benchmarks not in ``results`` and per-benchmark
+    thresholds already in the file are kept.
+    """
+    baseline = load_baseline(path)
+    baseline.setdefault('thresholds', {})
+    recorded = baseline.setdefault('scales', {}).get(scale, {}).get('results', {})
+    recorded.update({name: {'median': r['median'], 'min': r['min']}
+                     for name, r in results.items()})
+    baseline['scales'][scale] = {
+        'machine': machine_info(),
+        'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': recorded,
+    }
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp, path)
+    return baseline
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict,
+    scale: str,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Dict]:
+    """One row per benchmark with its baseline ratio and verdict.
+
+    A benchmark regresses when its median exceeds the baseline median by
+    more than its threshold ratio (``baseline['thresholds'][name]``, else
+    ``threshold``) and by more than MIN_REGRESSION seconds. Benchmarks
+    missing from the baseline are reported as ``'new'``.
+    """
+    recorded = baseline.get('scales', {}).get(scale, {}).get('results', {})
+    limits = baseline.get('thresholds', {})
+    rows = []
+    for name, r in results.items():
+        base = recorded.get(name)
+        if base is None:
+            rows.append({'name': name, 'median': r['median'], 'baseline': None,
+                         'ratio': None, 'status': 'new'})
+            continue
+        ratio = r['median'] / base['median'] if base['median'] > 0 else float('inf')
+        limit = limits.get(name, threshold)
+        slower = ratio > limit and r['median'] - base['median'] > MIN_REGRESSION
+        rows.append({'name': name, 'median': r['median'], 'baseline': base['median'],
+                     'ratio': ratio, 'status': 'REGRESSED' if slower else 'ok'})
+    return rows
+
+
+def report(rows: List[Dict]) -> str:
+    lines = [f"{'benchmark':<24}{'median':>12}{'baseline':>12}{'ratio':>8}  status"]
+    for row in rows:
+        base = _fmt(row['baseline']) if row['baseline'] is not None else '-'
+        ratio = f"{row['ratio']:.2f}x" if row['ratio'] is not None else '-'
+        lines.append(f"{row['name']:<24}{_fmt(row['median']):>12}{base:>12}{ratio:>8}"
+                     f"  {row['status']}")
+    return '\n'.join(lines)
+
+
+def _fmt(seconds: float) -> str:
+    for unit, factor in (('s', 1.0), ('ms', 1e3), ('us', 1e6)):
+        if seconds * factor >= 1.0:
+            return f'{seconds * factor:.2f} {unit}'
+    return f'{seconds * 1e9:.0f} ns'
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--only', action='append', help='run just this benchmark (repeatable)')
+    parser.add_argument('--record', action='store_true', help='save results as the baseline')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--rounds', type=int, default=7)
+    parser.add_argument('--max-time', type=float, default=10.0, help='seconds per benchmark')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    results = run(args.scale, args.only, rounds=args.rounds, max_time=args.max_time)
+    if args.record:
+        record_baseline(results, args.scale, args.baseline)
+        print(f"Recorded {len(results)} benchmarks for scale '{args.scale}' in {args.baseline}")
+        return 0
+    rows = compare(results, load_baseline(args.baseline), args.scale, args.threshold)
+    print(report(rows))
+    return 1 if any(row['status'] == 'REGRESSED' for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""Concurrent bulk fetching of per-player and per-entry FPL endpoints."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from api_client import FPLClient
+from transport import (RETRY_STATUSES, CircuitBreaker, CircuitOpenError, ResilientSession,
+                       TransportMetrics, retry_after)
+
+
+class HostRateLimiter:
+    """Token bucket per host, shared by every request of one fetcher.
+
+    Each caller reserves its token under a thread lock and sleeps off any
+    debt afterwards, so one limiter works across event loops (a fetcher
+    reused by several ``run_sync`` calls) and threads.
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    async def acquire(self, host: str) -> None:
+        """Wait until a request to ``host`` is allowed."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(host, (float(self.burst), now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate) - 1
+            self._buckets[host] = (tokens, now)
+        if tokens < 0:
+            await asyncio.sleep(-tokens / self.rate)
+
+
+class BulkFetcher:
+    """Fetch many FPL endpoints concurrently with retries and rate limiting.
+
+    Requests run on a pooled ``requests.Session`` in a pool of ``concurrency``
+    worker threads (not the event loop's default executor, which is capped
+    by the CPU count), and results come back in input order. A URL
+    that still fails after ``max_retries`` yields an empty dict, matching
+    ``FPLClient``'s error handling. Waits between retries, including a
+    server's Retry-After, are capped at ``max_delay`` seconds.
+
+    The default session has its own circuit breaker and metrics, so a bulk
+    run against a struggling host doesn't trip the breaker for interactive
+    ``FPLClient`` calls in the same process.
+    """
+
+    def __init__(
+        self,
+        base_url: str = FPLClient.BASE_URL,
+        concurrency: int = 16,
+        rate_per_host: float = 20.0,
+        max_retries: int = 4,
+        backoff: float = 0.5,
+        timeout: float = 10.0,
+        max_delay: float = 30.0,
+        session: requests.Session | None = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_delay = max_delay
+        self.limiter = HostRateLimiter(rate_per_host, burst=concurrency)
+        if session is None:
+            # Retries stay here (async sleeps); the session adds pooling and metrics
+            session = ResilientSession(pool_size=concurrency, read_timeout=timeout,
+                                       max_retries=0, breaker=CircuitBreaker(),
+                                       metrics=TransportMetrics())
+        self.session = session
+
+    async def fetch_many(self, urls: Iterable[str]) -> List[Dict]:
+        """Fetch every URL and return the decoded JSON bodies in order."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="bulk-fetch") as pool:
+
+            async def bounded(url: str) -> Dict:
+                async with semaphore:
+                    return await self._fetch(url, pool)
+
+            return list(await asyncio.gather(*(bounded(u) for u in urls)))
+
+    async def player_details(self, player_ids: Iterable[int]) -> List[Dict]:
+        """Fetch ``element-summary`` for each player id."""
+        return await self.fetch_many(
+            f"{self.base_url}/element-summary/{pid}/" for pid in player_ids
+        )
+
+    async def entry_picks(self, entry_ids: Iterable[int], event: int) -> List[Dict]:
+        """Fetch the picks of each entry for one gameweek."""
+        return await self.fetch_many(
+            f"{self.base_url}/entry/{eid}/event/{event}/picks/" for eid in entry_ids
+        )
+
+    async def _fetch(self, url: str, pool: ThreadPoolExecutor) -> Dict:
+        host = urlsplit(url).netloc
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(host)
+            delay: Optional[float] = None
+            try:
+                res = await loop.run_in_executor(
+                    pool, partial(self.session.get, url, timeout=self.timeout))
+                if res.status_code in RETRY_STATUSES:
+                    delay = retry_after(res)
+                    raise requests.HTTPError(f"{res.status_code} for {url}", response=res)
+                res.raise_for_status()
+                return res.json()
+            except Exception as e:
+                # An open breaker would only reject the retries too
+                retryable = delay is not None or isinstance(
+                    e, (requests.ConnectionError, requests.Timeout)
+                ) and not isinstance(e, CircuitOpenError)
+                if not retryable or attempt == self.max_retries:
+                    logging.error(f"Error fetching {url}: {e}")
+                    return {}
+                if delay is None or delay <= 0:
+                    delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+                delay = min(delay, self.max_delay)
+                logging.debug(f"Retrying {url} in {delay:.2f}s ({e})")
+                await asyncio.sleep(delay)
+        return {}
+
+
+def run_sync(coro):
+    """Run a coroutine to completion from synchronous code.
+
+    Falls back to a helper thread when an event loop is already running in
+    this thread (e.g. inside Jupyter).
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    result: Dict[str, object] = {}
+
+    def runner() -> None:
+        try:
+            result["value"] = asyncio.run(coro)
+        except BaseException as e:
+            result["error"] = e
+
+    t = threading.Thread(target=runner)
+    t.start()
+    t.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+def get_players_details(player_ids: Iterable[int], **kwargs) -> List[Dict]:
+    """Blocking wrapper around ``BulkFetcher.player_details``."""
+    return run_sync(BulkFetcher(**kwargs).player_details(list(player_ids)))
+
+
+def get_entries_picks(entry_ids: Iterable[int], event: int, **kwargs) -> List[Dict]:
+    """Blocking wrapper around ``BulkFetcher.entry_picks``."""
+    return run_sync(BulkFetcher(**kwargs).entry_picks(list(entry_ids), event))
@@ -0,0 +1,301 @@
+"""Position x price-band index answering "best k players under a budget"."""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import threading
+from bisect import bisect_right, insort
+from collections import OrderedDict
+from typing import Collection, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Entries kept per internal tree node; deeper entries are reached through
+# the node's children
+NODE_K = 32
+# Shared indexes kept by get_candidate_index
+MAX_SHARED = 4
+
+Key = Tuple[float, int]
+
+
+def _band(price: float) -> int:
+    """£0.1m price band of ``price``."""
+    return int(np.floor(price * 10 + 1e-6))
+
+
+class _Tree:
+    """Segment tree over price bands for one position.
+
+    Leaves hold every player of their band as sorted ``(-points, row)``
+    keys. Internal nodes hold the best NODE_K keys of their subtree plus
+    the subtree size, so a prefix of bands is covered by O(log bands)
+    nodes whose lists are already merged.
+    """
+
+    def __init__(self, n_bands: int) -> None:
+        self.size = 1 << max(1, (n_bands - 1).bit_length())
+        self.top: List[List[Key]] = [[] for _ in range(2 * self.size)]
+        self.count = [0] * (2 * self.size)
+
+    def build(self) -> None:
+        for n in range(self.size, 2 * self.size):
+            self.count[n] = len(self.top[n])
+        for n in range(self.size - 1, 0, -1):
+            self._merge(n)
+
+    def insert(self, band: int, key: Key) -> None:
+        leaf = self.size + band
+        insort(self.top[leaf], key)
+        self.count[leaf] += 1
+        self._fix(leaf)
+
+    def remove(self, band: int, key: Key) -> None:
+        leaf = self.size + band
+        items = self.top[leaf]
+        i = bisect_right(items, key) - 1
+        if i >= 0 and items[i] == key:
+            del items[i]
+            self.count[leaf] -= 1
+            self._fix(leaf)
+
+    def cover(self, last_band: int) -> List[int]:
+        """Nodes whose subtrees exactly cover bands 0..last_band."""
+        nodes = []
+        lo, hi = self.size, self.size + last_band + 1
+        while lo < hi:
+            if lo & 1:
+                nodes.append(lo)
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                nodes.append(hi)
+            lo >>= 1
+            hi >>= 1
+        return nodes
+
+    def _merge(self, n: int) -> None:
+        # Two sorted runs: timsort merges them in one linear pass
+        self.top[n] = sorted(self.top[2 * n][:NODE_K] + self.top[2 * n + 1][:NODE_K])[:NODE_K]
+        self.count[n] = self.count[2 * n] + self.count[2 * n + 1]
+
+    def _fix(self, leaf: int) -> None:
+        n = leaf >> 1
+        while n:
+            self._merge(n)
+            n >>= 1
+
+
+class CandidateIndex:
+    """Players by position and price band, best predicted points first.
+
+    ``best(position, max_price, k, ...)`` returns the top ``k`` players
+    at a position costing at most ``max_price``, skipping excluded rows
+    and clubs, in O((k + skipped) * log bands). Prices and points can be
+    changed one player at a time (``set_price``, ``set_points``), which
+    only touches the ancestors of the affected bands.
+
+    Rows follow the order of the arrays given to the constructor. Players
+    with NaN points are left out, as in ``TransferPlanner``.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[int],
+        positions: Sequence[str],
+        clubs: Sequence[str],
+        prices: Sequence[float],
+        points: Sequence[float],
+    ) -> None:
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.prices = np.array(prices, dtype=float)
+        self.points = np.array(points, dtype=float)
+        self.position_names, pos = np.unique(np.asarray(positions), return_inverse=True)
+        self.club_names, club = np.unique(np.asarray(clubs), return_inverse=True)
+        self._pos = pos.tolist()
+        self._club = club.tolist()
+        self._pos_code = {str(p): i for i, p in enumerate(self.position_names)}
+        self._row_of = {int(pid): r for r, pid in enumerate(self.ids.tolist())}
+        self._build()
+
+    @classmethod
+    def from_table(cls, table, points: Sequence[float]) -> 'CandidateIndex':
+        return cls(table.ids, table.positions, table.teams, table.prices, points)
+
+    def _build(self) -> None:
+        bands = [_band(p) for p in self.prices.tolist()]
+        self._bands = bands
+        n_bands = max(bands, default=0) + 1
+        self._trees = [_Tree(n_bands) for _ in self.position_names]
+        order = sorted((-p, r) for r, p in enumerate(self.points.tolist()) if not np.isnan(p))
+        for key in order:
+            r = key[1]
+            tree = self._trees[self._pos[r]]
+            tree.top[tree.size + bands[r]].append(key)
+        for tree in self._trees:
+            tree.build()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row(self, player_id: int) -> int:
+        return self._row_of[int(player_id)]
+
+    def rows(self, player_ids: Iterable[int]) -> List[int]:
+        """Rows of the known ids (unknown ids are dropped)."""
+        return [self._row_of[int(p)] for p in player_ids if int(p) in self._row_of]
+
+    def club_of(self, row: int) -> int:
+        return self._club[row]
+
+    def position_of(self, row: int) -> str:
+        return str(self.position_names[self._pos[row]])
+
+    def club_counts(self, rows: Iterable[int]) -> Dict[int, int]:
+        """Players per club code among ``rows`` (e.g. a squad)."""
+        counts: Dict[int, int] = {}
+        for r in rows:
+            c = self._club[r]
+            counts[c] = counts.get(c, 0) + 1
+        return counts
+
+    def best(
+        self,
+        position: str,
+        max_price: float,
+        k: int,
+        exclude_rows: Collection[int] = (),
+        exclude_clubs: Collection[int] = (),
+    ) -> List[int]:
+        """Rows of the ``k`` best players at ``position`` costing <= ``max_price``.
+
+        Ordered by points (then row). ``exclude_clubs`` takes club codes
+        (see ``club_of``), e.g. the clubs already at the 3-player limit.
+        """
+        code = self._pos_code.get(str(position))
+        last_band = min(_band(max_price), self._trees[0].size - 1) if self._trees else -1
+        if code is None or last_band < 0 or k <= 0:
+            return []
+        tree = self._trees[code]
+        limit = max_price + 1e-9
+        heap: List[Tuple[Key, int, int]] = []
+
+        def push(n: int, after: Optional[Key]) -> None:
+            items = tree.top[n]
+            j = 0 if after is None else bisect_right(items, after)
+            if j < len(items):
+                heapq.heappush(heap, (items[j], n, j))
+            elif tree.count[n] > len(items):
+                # Everything in this node's list is used up; its children
+                # hold the rest of the subtree
+                push(2 * n, after)
+                push(2 * n + 1, after)
+
+        for n in tree.cover(last_band):
+            push(n, None)
+        out: List[int] = []
+        while heap and len(out) < k:
+            key, n, j = heapq.heappop(heap)
+            r = key[1]
+            # Bands are £0.1m wide; off-grid prices can sit above max_price
+            # within the last band
+            if (r not in exclude_rows and self._club[r] not in exclude_clubs
+                    and self.prices[r] <= limit):
+                out.append(r)
+            if j + 1 < len(tree.top[n]):
+                heapq.heappush(heap, (tree.top[n][j + 1], n, j + 1))
+            elif tree.count[n] > len(tree.top[n]):
+                push(2 * n, key)
+                push(2 * n + 1, key)
+        return out
+
+    def single_transfers(
+        self,
+        squad_ids: Iterable[int],
+        bank: float,
+        top_n: int = 5,
+        max_per_club: int = 3,
+    ) -> List[Tuple[int, int, float]]:
+        """Best single transfers as (out_row, in_row, gain), best first.
+
+        The in player has the out player's position, costs at most
+        ``bank`` plus the sale price and keeps every club within
+        ``max_per_club``. Squad players with NaN points are never sold.
+        """
+        squad = self.rows(squad_ids)
+        in_squad = set(squad)
+        counts = self.club_counts(squad)
+        options: List[Tuple[float, int, int]] = []
+        for o in squad:
+            if np.isnan(self.points[o]):
+                continue
+            club_out = self._club[o]
+            full = {c for c, n in counts.items() if n - (c == club_out) >= max_per_club}
+            for r in self.best(self.position_of(o), bank + self.prices[o], top_n,
+                               in_squad, full):
+                options.append((float(self.points[r] - self.points[o]), o, r))
+        options.sort(key=lambda t: (-t[0], t[1], t[2]))
+        return [(o, r, gain) for gain, o, r in options[:top_n]]
+
+    def set_price(self, player_id: int, price: float) -> None:
+        """Move a player to the band of ``price``."""
+        r = self.row(player_id)
+        old, new = self._bands[r], _band(price)
+        self.prices[r] = price
+        if old == new:
+            return
+        self._bands[r] = new
+        if new >= self._trees[0].size:
+            self._build()
+            return
+        if not np.isnan(self.points[r]):
+            key = (-self.points[r], r)
+            tree = self._trees[self._pos[r]]
+            tree.remove(old, key)
+            tree.insert(new, key)
+
+    def set_points(self, player_id: int, points: float) -> None:
+        r = self.row(player_id)
+        tree = self._trees[self._pos[r]]
+        if not np.isnan(self.points[r]):
+            tree.remove(self._bands[r], (-self.points[r], r))
+        self.points[r] = points
+        if not np.isnan(points):
+            tree.insert(self._bands[r], (-float(points), r))
+
+    def update_prices(self, prices: Mapping[int, float]) -> int:
+        """Apply ``{player_id: price}``; returns how many prices changed."""
+        changed = 0
+        for pid, price in prices.items():
+            r = self._row_of.get(int(pid))
+            if r is not None and abs(self.prices[r] - price) > 1e-9:
+                self.set_price(pid, price)
+                changed += 1
+        return changed
+
+
+_SHARED: 'OrderedDict[Tuple[str, str], CandidateIndex]' = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def get_candidate_index(table, points: Sequence[float]) -> CandidateIndex:
+    """Process-wide index for a ``PlayerTable`` and per-row points.
+
+    Keyed by the table's content digest and a hash of ``points``, so each
+    distinct prediction set is indexed once. Shared indexes must not be
+    mutated; build a private ``CandidateIndex`` to apply live price changes.
+    """
+    points = np.ascontiguousarray(points, dtype=float)
+    key = (table.digest, hashlib.blake2b(points.tobytes(), digest_size=12).hexdigest())
+    with _LOCK:
+        index = _SHARED.get(key)
+        if index is not None:
+            _SHARED.move_to_end(key)
+            return index
+    index = CandidateIndex.from_table(table, points)
+    with _LOCK:
+        _SHARED[key] = index
+        while len(_SHARED) > MAX_SHARED:
+            _SHARED.popitem(last=False)
+    return index
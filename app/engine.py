@@ -0,0 +1,540 @@
+# app/engine.py
+"""Analysis core shared by the Streamlit app and the headless API.
+
+Nothing here imports Streamlit or renders anything: functions take a squad
+and return plain data, and messages go to ``logging``. The player table,
+fixture index, prediction cache and the fixture-adjusted prediction
+matrices below are process-wide, so every session (and every API request)
+served by one process shares them; only the ``Squad`` is per-session.
+"""
+
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Dict, List, Sequence, Tuple, Optional
+import logging
+import os
+import threading
+import time
+import numpy as np
+
+from candidate_index import get_candidate_index
+from fixtures import FixtureIndex, get_fixture_index
+from horizon import plan_horizon
+from manager_stream import find_entry
+from player_store import get_player_table
+from prediction_cache import PredictionCache, cached_predict, get_prediction_cache, model_key
+from recommendations import get_recommendations
+from simulation import PointsSimulator, fixture_opponents
+from tracing import span, traced
+from transfers import TransferPlanner
+
+if TYPE_CHECKING:
+    # Callers construct the model; the engine never loads one itself
+    from model import RidgeARModel
+
+# Paths (relative to this file)
+GW_JSON     = os.path.join(os.path.dirname(__file__), '..', 'manager_data_each_gw_24_25.json')
+PLAYERS_CSV = os.path.join(os.path.dirname(__file__), '..', 'data', 'players_id_2024_2025.csv')
+TARGET_GW   = 5
+HORIZON     = 3
+PLAN_HORIZON = 4
+PLACEHOLDER_SEED = 42
+MAX_HORIZON = 8
+SEASON      = '2024-25'
+SIM_SAMPLES = 10_000
+# Fixture-adjusted prediction matrices kept by shared_predictions
+SHARED_PREDICTIONS = 16
+
+
+@dataclass(frozen=True)
+class Squad:
+    """One manager's picks and bank (£m): the only per-session state."""
+    picks: Tuple[Dict, ...]
+    bank: float = 0.0
+    source: str = 'manual'
+
+    @property
+    def ids(self) -> List[int]:
+        return [int(p['element']) for p in self.picks]
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[int], bank: float = 0.0,
+                 captain: Optional[int] = None) -> 'Squad':
+        return cls(tuple({'element': int(pid), 'is_captain': int(pid) == captain}
+                         for pid in ids), bank)
+
+    @classmethod
+    def from_entry(cls, entry: Optional[Dict]) -> 'Squad':
+        """Squad from a manager JSON entry (empty if ``entry`` is None)."""
+        entry = entry or {}
+        return cls(tuple(entry.get('picks', [])),
+                   entry.get('entry_history', {}).get('bank', 0) / 10.0, 'json')
+
+
+def horizon_labels(horizon: int = HORIZON) -> List[str]:
+    """Column labels for the GWs after TARGET_GW, e.g. ['GW6', 'GW7', 'GW8']."""
+    return [f'GW{TARGET_GW + i}' for i in range(1, horizon + 1)]
+
+
+def predict_points_matrix(
+    n_players: int,
+    horizon: int = HORIZON,
+    model: Optional[RidgeARModel] = None,
+    features: Optional[np.ndarray] = None,
+    seed: Optional[int] = PLACEHOLDER_SEED,
+    player_ids: Optional[Sequence[int]] = None,
+) -> np.ndarray:
+    """Predict a players x horizon points matrix in a single call.
+
+    Uses ``model`` when it is loaded and ``features`` (players x horizon x
+    n_features) are given. Otherwise each player gets the triangular(4, 6, 13)
+    placeholder; with a ``seed`` the draws are fixed per player id (rows
+    ``0..n_players-1`` when ``player_ids`` is None), so reordering or adding
+    players never changes anyone's values.
+    """
+    if model is not None and model.model is not None and features is not None:
+        preds = model.predict_horizon(features)
+    elif seed is None:
+        preds = np.random.default_rng().triangular(4, 6, 13, size=(n_players, horizon))
+    else:
+        ids = np.arange(n_players) if player_ids is None else np.asarray(player_ids)
+        preds = _triangular(_placeholder_uniforms(ids, horizon, seed), 4, 6, 13)
+    return np.round(preds, 2)
+
+
+def _placeholder_uniforms(player_ids: np.ndarray, n_cols: int, seed: int) -> np.ndarray:
+    """(players, n_cols) uniforms in [0, 1) fixed by (seed, player id, column).
+
+    A splitmix64 hash of the three rather than a generator stream, so a
+    player's draws do not depend on the other rows drawn with them.
+    """
+    ids = np.asarray(player_ids, dtype=np.int64).astype(np.uint64)[:, None]
+    cols = np.arange(n_cols, dtype=np.uint64)[None, :]
+    with np.errstate(over='ignore'):
+        z = (ids << np.uint64(16)) | cols
+        z = z + np.uint64(seed % 2**64) * np.uint64(0xD1342543DE82EF95)
+        z = z + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+def _triangular(u: np.ndarray, low: float, mode: float, high: float) -> np.ndarray:
+    """Inverse CDF of the triangular distribution."""
+    split = (mode - low) / (high - low)
+    return np.where(u < split,
+                    low + np.sqrt(u * (high - low) * (mode - low)),
+                    high - np.sqrt((1 - u) * (high - low) * (high - mode)))
+
+
+def prediction_key(
+    model: Optional[RidgeARModel] = None,
+    features: Optional[np.ndarray] = None,
+    seed: Optional[int] = PLACEHOLDER_SEED,
+) -> Optional[str]:
+    """Model version and features digest, or placeholder seed, of the predictions.
+
+    None for an unseeded placeholder, whose predictions are never stored.
+    """
+    if model is not None and model.model is not None and features is not None:
+        return model_key(model.version, features)
+    # 'id': drawn per player id (entries drawn per table row used 'placeholder-<seed>')
+    return None if seed is None else f'placeholder-id-{seed}'
+
+
+@traced('engine.predict_points_cached')
+def predict_points_cached(
+    horizon: int = HORIZON,
+    model: Optional[RidgeARModel] = None,
+    features: Optional[np.ndarray] = None,
+    seed: Optional[int] = PLACEHOLDER_SEED,
+    cache: Optional[PredictionCache] = None,
+) -> np.ndarray:
+    """``predict_points_matrix`` for the player table, served from the prediction cache.
+
+    Keys are (SEASON, TARGET_GW, ``prediction_key``, player id); an unseeded
+    placeholder is never cached.
+    """
+    table = get_player_table(PLAYERS_CSV)
+    if cache is None:
+        cache = get_prediction_cache()
+    if model is not None and model.model is not None and features is not None:
+        preds = model.predict_players(table.ids, features, SEASON, TARGET_GW, cache=cache)
+        return np.round(preds[:, :horizon], 2)
+    if seed is None:
+        return predict_points_matrix(len(table), horizon=horizon, seed=None)
+    full = max(horizon, MAX_HORIZON)
+    return cached_predict(
+        cache, SEASON, TARGET_GW, prediction_key(seed=seed), table.ids, horizon,
+        lambda rows: predict_points_matrix(len(rows), horizon=full, seed=seed,
+                                           player_ids=table.ids[rows]),
+    )
+
+
+@traced('engine.apply_fixtures')
+def apply_fixtures(
+    preds: np.ndarray,
+    index: Optional[FixtureIndex] = None,
+) -> np.ndarray:
+    """Scale per-GW predictions for the GWs after TARGET_GW by fixtures.
+
+    Blanks score zero, doubles count twice and each fixture is nudged by
+    its difficulty (``FixtureIndex.multipliers``). Without a saved fixture
+    index the predictions are returned unchanged.
+    """
+    index = index if index is not None else get_fixture_index()
+    if index is None:
+        return preds
+    table = get_player_table(PLAYERS_CSV)
+    gws = TARGET_GW + 1 + np.arange(preds.shape[1])
+    return np.round(preds * index.multipliers(index.team_ids(table.teams), gws), 2)
+
+
+_SHARED: 'OrderedDict[Tuple, Tuple]' = OrderedDict()
+_SHARED_LOCK = threading.Lock()
+
+
+@traced('engine.shared_predictions')
+def shared_predictions(
+    horizon: int = HORIZON,
+    model: Optional[RidgeARModel] = None,
+    features: Optional[np.ndarray] = None,
+    seed: Optional[int] = PLACEHOLDER_SEED,
+) -> np.ndarray:
+    """Fixture-adjusted ``predict_points_cached`` matrix, shared process-wide.
+
+    Kept per (prediction key, horizon) while the player table and fixture
+    index are the ones it was computed from, so concurrent sessions reuse
+    one read-only matrix. Unseeded placeholders are recomputed every call.
+    """
+    key = (prediction_key(model, features, seed), horizon)
+    table = get_player_table(PLAYERS_CSV)
+    index = get_fixture_index()
+    if key[0] is not None:
+        with _SHARED_LOCK:
+            cached = _SHARED.get(key)
+            if cached is not None and cached[0] is table and cached[1] is index:
+                _SHARED.move_to_end(key)
+                return cached[2]
+    # Own copy: without a fixture index apply_fixtures hands back its input
+    preds = np.array(apply_fixtures(
+        predict_points_cached(horizon=horizon, model=model, features=features, seed=seed),
+        index))
+    preds.flags.writeable = False
+    if key[0] is not None:
+        with _SHARED_LOCK:
+            _SHARED[key] = (table, index, preds)
+            while len(_SHARED) > SHARED_PREDICTIONS:
+                _SHARED.popitem(last=False)
+    return preds
+
+
+@traced('engine.load_gw_entry')
+def load_gw_entry(target_gw: int = TARGET_GW) -> Optional[Dict]:
+    """Return the manager JSON entry for ``target_gw`` (picks + entry_history), if any."""
+    # Streamed: stops at the first matching entry instead of loading the file
+    return find_entry(GW_JSON, target_gw)
+
+
+@traced('engine.load_gw_data')
+def load_gw_data(
+    picks_override: Optional[List[Dict]] = None,
+    entry: Optional[Dict] = None,
+) -> Tuple[List[Dict], Dict[int, str], Dict[int, str]]:
+    """Load picks for TARGET_GW (or override) and player mappings."""
+    # Master player list (process-wide, rebuilt only when the CSV changes)
+    table = get_player_table(PLAYERS_CSV)
+    name_map = table.name_map
+    pos_map  = table.pos_map
+
+    # If override provided, use it
+    if picks_override is not None:
+        logging.info(f"Using manual override: {len(picks_override)} picks")
+        picks = picks_override
+    else:
+        # Load and filter JSON for TARGET_GW
+        if entry is None:
+            entry = load_gw_entry()
+        picks = entry.get('picks', []) if entry else []
+        logging.info(f"Found {len(picks)} picks for GW{TARGET_GW}")
+        if not picks:
+            logging.warning(f"No GW{TARGET_GW} data in {GW_JSON}")
+
+    return picks, name_map, pos_map
+
+
+def load_squad(picks_override: Optional[List[Dict]] = None, bank: float = 0.0) -> Squad:
+    """The manual ``picks_override``, or the GW JSON squad for TARGET_GW."""
+    if picks_override is not None:
+        return Squad(tuple(picks_override), bank)
+    return Squad.from_entry(load_gw_entry())
+
+
+@traced('engine.rank_transfers')
+def rank_transfers(
+    current_squad: Iterable[Dict],
+    candidates: Iterable[Dict],
+    top_n: int = 5,
+    bank: Optional[float] = None,
+) -> List[Dict]:
+    """Rank the best single transfers; return top N.
+
+    Uses each player's ``price`` and ``team`` when present, so suggestions
+    stay within ``bank`` (in £m, unlimited if None) and the 3-per-club rule.
+    """
+    current_squad = list(current_squad)
+    pool = current_squad + [c for c in candidates]
+    if not current_squad or len(pool) == len(current_squad):
+        return []
+    planner = TransferPlanner(
+        ids=[p['id'] for p in pool],
+        names=[p['name'] for p in pool],
+        positions=[p['position'] for p in pool],
+        clubs=[p.get('team', f"_{p['id']}") for p in pool],
+        prices=[p.get('price', 0.0) for p in pool],
+        points=[p['predicted_points'] for p in pool],
+    )
+    plans = planner.plan(
+        [p['id'] for p in current_squad],
+        bank=np.inf if bank is None else bank,
+        max_transfers=1,
+        top_k=top_n,
+    )
+    return [plan['transfers'][0] for plan in plans.get(1, [])]
+
+
+@traced('engine.analyze_gw_data')
+def analyze_gw_data(
+    picks_override: Optional[List[Dict]] = None,
+    model: Optional[RidgeARModel] = None,
+    features: Optional[np.ndarray] = None,
+    seed: Optional[int] = PLACEHOLDER_SEED,
+    bank: Optional[float] = None,
+    top_n: int = 5,
+) -> Tuple[List[Dict], List[Dict]]:
+    """Load (or override) picks, generate predictions, and rank transfers.
+
+    ``bank`` is in £m; when omitted it comes from ``entry_history.bank`` in
+    the GW JSON (0 for a manual override). When the recommendations job
+    has materialized this gameweek for the same predictions and player
+    table, only the squad is looked up (see ``recommendations``).
+    """
+    entry = load_gw_entry() if picks_override is None else None
+    picks, _, _ = load_gw_data(picks_override, entry=entry)
+    table = get_player_table(PLAYERS_CSV)
+    if bank is None:
+        bank = (entry or {}).get('entry_history', {}).get('bank', 0) / 10.0
+
+    key = prediction_key(model, features, seed)
+    rec = get_recommendations(SEASON, TARGET_GW, key, table) if key else None
+    if rec is not None and rec.meta['horizon'] == HORIZON:
+        return materialized_analysis(rec, table, picks, bank, top_n)
+
+    # One prediction matrix for the whole pool, squad masked out by index
+    preds = shared_predictions(model=model, features=features, seed=seed)
+    totals = np.round(preds.sum(axis=1), 2)
+    squad_ids = [p['element'] for p in picks]
+    squad_rows = table.rows(squad_ids)
+    labels = horizon_labels(preds.shape[1])
+
+    # Build the current squad list
+    current_squad: List[Dict] = []
+    for pick, r in zip(picks, squad_rows):
+        if r < 0:
+            continue
+        player_preds = dict(zip(labels, preds[r].tolist()))
+        player_preds['total'] = float(totals[r])
+        current_squad.append({
+            'id': int(table.ids[r]),
+            'name': str(table.names[r]),
+            'position': str(table.positions[r]),
+            'predicted_points': float(totals[r]),
+            'predictions': player_preds,
+            'is_captain': pick.get('is_captain', False)
+        })
+
+    # Best single transfers over the whole pool, within bank and club limits
+    with span('engine.analyze_gw_data.rank'):
+        planner = TransferPlanner.from_table(table, totals)
+        plans = planner.plan([p['id'] for p in current_squad], bank=bank,
+                             max_transfers=1, top_k=top_n)
+    suggestions = [plan['transfers'][0] for plan in plans.get(1, [])]
+    return current_squad, suggestions
+
+
+@traced('engine.materialized_analysis')
+def materialized_analysis(rec, table, picks: List[Dict], bank: float,
+                          top_n: int = 5) -> Tuple[List[Dict], List[Dict]]:
+    """``analyze_gw_data`` results from a precomputed Recommendations artifact."""
+    labels = horizon_labels(rec.preds.shape[1])
+    squad_rows = rec.rows(p['element'] for p in picks)
+    current_squad: List[Dict] = []
+    for pick, r in zip(picks, squad_rows.tolist()):
+        if r < 0:
+            continue
+        total = round(float(rec.totals[r]), 2)
+        player_preds = dict(zip(labels, np.round(rec.preds[r].astype(float), 2).tolist()))
+        player_preds['total'] = total
+        current_squad.append({
+            'id': int(table.ids[r]),
+            'name': str(table.names[r]),
+            'position': str(table.positions[r]),
+            'predicted_points': total,
+            'predictions': player_preds,
+            'is_captain': pick.get('is_captain', False)
+        })
+
+    suggestions = []
+    for o, i, gain in rec.best_transfers([p['id'] for p in current_squad], bank, top_n):
+        suggestions.append({
+            'out_id': int(table.ids[o]),
+            'out_name': str(table.names[o]),
+            'in_id': int(table.ids[i]),
+            'in_name': str(table.names[i]),
+            'position': str(table.positions[o]),
+            'predicted_out': round(float(rec.totals[o]), 2),
+            'predicted_in': round(float(rec.totals[i]), 2),
+            'delta_pts': round(gain, 2),
+        })
+    return current_squad, suggestions
+
+
+@traced('engine.plan_gw_horizon')
+def plan_gw_horizon(
+    squad_ids: Iterable[int],
+    bank: float = 0.0,
+    horizon: int = PLAN_HORIZON,
+    free_transfers: int = 1,
+    chips: Iterable[str] = (),
+    model: Optional[RidgeARModel] = None,
+    features: Optional[np.ndarray] = None,
+    seed: Optional[int] = PLACEHOLDER_SEED,
+) -> Dict:
+    """Plan transfers, chips and captains for the ``horizon`` GWs after TARGET_GW.
+
+    Results are cached per squad, bank, horizon and prediction matrix, so
+    reruns (from any session) return immediately.
+    """
+    table = get_player_table(PLAYERS_CSV)
+    preds = shared_predictions(horizon, model=model, features=features, seed=seed)
+    return plan_horizon(table, preds, squad_ids, bank, free_transfers=free_transfers,
+                        horizon=horizon, chips=chips)
+
+
+@traced('engine.simulate_gw_outcomes')
+def simulate_gw_outcomes(
+    squad_ids: Iterable[int],
+    rival_ids: Optional[Iterable[int]] = None,
+    n_samples: int = SIM_SAMPLES,
+    model: Optional[RidgeARModel] = None,
+    features: Optional[np.ndarray] = None,
+    seed: Optional[int] = PLACEHOLDER_SEED,
+) -> Dict:
+    """Simulated score distribution and captain options for GW TARGET_GW+1.
+
+    Scenarios share club shocks, so teammates (and a rival's overlapping
+    picks) move together, and with a fixture index both sides of a match
+    share a match shock; see ``simulation.PointsSimulator``. Empty when the
+    squad has no valid lineup.
+    """
+    table = get_player_table(PLAYERS_CSV)
+    preds = shared_predictions(1, model=model, features=features, seed=seed)
+    index = get_fixture_index()
+    opponents = None if index is None else fixture_opponents(table.teams, index,
+                                                             [TARGET_GW + 1])
+    sim = PointsSimulator.from_table(table, preds, opponents=opponents)
+    known = [int(p) for p in squad_ids if int(p) in table]
+    rivals = None if rival_ids is None else [int(p) for p in rival_ids if int(p) in table]
+    return sim.simulate_squad(known, 0, n_samples=n_samples, seed=seed, rival_ids=rivals)
+
+
+@traced('engine.analyze_squad')
+def analyze_squad(
+    squad: Squad,
+    horizon: int = PLAN_HORIZON,
+    top_n: int = 5,
+    n_samples: int = SIM_SAMPLES,
+    model: Optional[RidgeARModel] = None,
+    features: Optional[np.ndarray] = None,
+    seed: Optional[int] = PLACEHOLDER_SEED,
+) -> Dict:
+    """Everything the app shows for ``squad``, as JSON-ready data.
+
+    Keys: squad and suggestions (``analyze_gw_data``), plan
+    (``plan_gw_horizon``) and simulation (``simulate_gw_outcomes``); plan
+    and simulation are None when no squad player is known (simulation also
+    when they form no lineup).
+    """
+    current, suggestions = analyze_gw_data(list(squad.picks), model=model, features=features,
+                                           seed=seed, bank=squad.bank, top_n=top_n)
+    out = {'gameweek': TARGET_GW, 'bank': squad.bank, 'squad': current,
+           'suggestions': suggestions, 'plan': None, 'simulation': None}
+    if current:
+        ids = [p['id'] for p in current]
+        out['plan'] = plan_gw_horizon(ids, bank=squad.bank, horizon=horizon, model=model,
+                                      features=features, seed=seed)
+        sim = simulate_gw_outcomes(ids, n_samples=n_samples, model=model,
+                                   features=features, seed=seed)
+        # Per-scenario totals are summarised, not shipped
+        out['simulation'] = {k: v for k, v in sim.items() if k != 'totals'} or None
+    return out
+
+
+_WARM_THREAD: Optional[threading.Thread] = None
+_WARM_LOCK = threading.Lock()
+
+
+def warm_up(seed: Optional[int] = PLACEHOLDER_SEED) -> Dict[str, float]:
+    """Load everything the first analysis needs into the shared caches.
+
+    Player table, fixture index, prediction cache, the shared prediction
+    matrices for every horizon the app uses, the transfer candidate index
+    and the recommendations artifact. Returns seconds per step; a failing
+    step is logged and skipped. Later calls find everything cached.
+    """
+    timings: Dict[str, float] = {}
+    state: Dict = {}
+
+    def table():
+        state['table'] = get_player_table(PLAYERS_CSV)
+
+    def predictions():
+        state['preds'] = shared_predictions(HORIZON, seed=seed)
+        for horizon in (PLAN_HORIZON, 1):
+            shared_predictions(horizon, seed=seed)
+
+    def candidates():
+        # Same points as analyze_gw_data, so its planner finds this index
+        get_candidate_index(state['table'], np.round(state['preds'].sum(axis=1), 2))
+
+    def recommendations():
+        key = prediction_key(seed=seed)
+        if key is not None:
+            get_recommendations(SEASON, TARGET_GW, key, state['table'])
+
+    steps = [('player_table', table), ('fixture_index', get_fixture_index),
+             ('prediction_cache', get_prediction_cache), ('predictions', predictions),
+             ('candidate_index', candidates), ('recommendations', recommendations)]
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            logging.warning(f"Warm-up step {name} failed: {e}")
+            continue
+        timings[name] = time.perf_counter() - start
+    logging.info(f"Warm-up done in {sum(timings.values()):.2f}s")
+    return timings
+
+
+def warm_up_in_background(seed: Optional[int] = PLACEHOLDER_SEED) -> threading.Thread:
+    """Start ``warm_up`` on a daemon thread, once per process."""
+    global _WARM_THREAD
+    with _WARM_LOCK:
+        if _WARM_THREAD is None:
+            _WARM_THREAD = threading.Thread(target=warm_up, args=(seed,),
+                                            name='fpl-warm-up', daemon=True)
+            _WARM_THREAD.start()
+        return _WARM_THREAD
@@ -0,0 +1,354 @@
+"""Incremental rolling-form features for the points model."""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Lag-1 feature names used by the modelling notebooks
+PREV_NAMES = {'Gls': 'GlsPrev', 'Ast': 'AstPrev', 'CS': 'CSPrev', 'Points': 'PrevPoints'}
+# Model inputs taken from the rows as they are (see preprocessing.NUMERIC_FEATS);
+# the last known value per player fills them in for upcoming fixtures
+CONTEXT_COLS = ('Pos', 'Price', 'Ownership, %', 'Selected')
+
+
+class RollingWindows:
+    """Ring buffers of the last ``window`` values per key, with running sums."""
+
+    def __init__(self, n_stats: int, window: int) -> None:
+        self.window = window
+        self.n_stats = n_stats
+        self.index: Dict[str, int] = {}
+        self.buf = np.zeros((0, window, n_stats))
+        self.sums = np.zeros((0, n_stats))
+        self.last = np.zeros((0, n_stats))
+        self.count = np.zeros(0, dtype=np.int64)
+        self.ptr = np.zeros(0, dtype=np.int64)
+
+    def rows(self, keys: Sequence, create: bool = False) -> np.ndarray:
+        """Row of each key; unknown keys get -1 unless ``create`` is set."""
+        out = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            key = str(key)
+            r = self.index.get(key, -1)
+            if r < 0 and create:
+                r = self.index[key] = len(self.index)
+            out[i] = r
+        if create and len(self.index) > len(self.count):
+            self._grow(len(self.index))
+        return out
+
+    def prev(self, rows: np.ndarray) -> np.ndarray:
+        """Most recent value per row (NaN when there is no history)."""
+        out = np.full((rows.size, self.n_stats), np.nan)
+        ok = rows >= 0
+        ok[ok] = self.count[rows[ok]] > 0
+        out[ok] = self.last[rows[ok]]
+        return out
+
+    def mean(self, rows: np.ndarray) -> np.ndarray:
+        """Mean of the buffered values per row (NaN when empty)."""
+        out = np.full((rows.size, self.n_stats), np.nan)
+        ok = rows >= 0
+        ok[ok] = self.count[rows[ok]] > 0
+        r = rows[ok]
+        out[ok] = self.sums[r] / self.count[r][:, None]
+        return out
+
+    def push(self, rows: np.ndarray, values: np.ndarray) -> None:
+        """Append one value vector per row; ``rows`` must be unique."""
+        full = self.count[rows] == self.window
+        evicted = self.buf[rows, self.ptr[rows]]
+        self.sums[rows] += values - np.where(full[:, None], evicted, 0.0)
+        self.buf[rows, self.ptr[rows]] = values
+        self.last[rows] = values
+        self.ptr[rows] = (self.ptr[rows] + 1) % self.window
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.window)
+
+    def _grow(self, n: int) -> None:
+        size = max(n, 2 * len(self.count), 64)
+        extra = size - len(self.count)
+        self.buf = np.concatenate([self.buf, np.zeros((extra, self.window, self.n_stats))])
+        self.sums = np.concatenate([self.sums, np.zeros((extra, self.n_stats))])
+        self.last = np.concatenate([self.last, np.zeros((extra, self.n_stats))])
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+        self.ptr = np.concatenate([self.ptr, np.zeros(extra, dtype=np.int64)])
+
+    def state(self) -> Dict[str, np.ndarray]:
+        n = len(self.index)
+        return {'buf': self.buf[:n], 'sums': self.sums[:n], 'last': self.last[:n],
+                'count': self.count[:n], 'ptr': self.ptr[:n]}
+
+    def restore(self, index: Dict[str, int], arrays: Dict[str, np.ndarray]) -> None:
+        self.index = dict(index)
+        for name, value in arrays.items():
+            setattr(self, name, np.array(value))
+
+
+class FeaturePipeline:
+    """Maintain rolling per-player and per-opposition features across gameweeks.
+
+    Each call to ``update`` takes the rows of one or more new gameweeks
+    (one row per player appearance, as in the modelling dataset) and
+    returns their feature rows, computed only from earlier gameweeks:
+
+    * ``GlsPrev``/``AstPrev``/``CSPrev``/``PrevPoints`` (or ``<stat>Prev``),
+      the player's previous value,
+    * ``<stat>_last<n>``, the player's mean over the last ``window`` games,
+    * ``against: <stat>``, the opposition's mean team total over its last
+      ``window`` gameweeks,
+
+    next to the rows' ``CONTEXT_COLS`` and ``Min`` (the row's minutes, or the
+    player's recent mean when unknown), so the output has every raw column
+    the model artifact reads. ``preview`` computes the same columns for
+    upcoming fixtures without folding them in.
+
+    State is held in ring buffers with running sums, so each update costs
+    O(new rows); ``save``/``load`` persist it between runs.
+    """
+
+    def __init__(
+        self,
+        player_stats: Sequence[str] = ('Gls', 'Ast', 'CS', 'Points', 'Min'),
+        opposition_stats: Sequence[str] = ('Gls', 'Ast'),
+        window: int = 5,
+        player_col: str = 'Player',
+        team_col: str = 'Team',
+        opposition_col: str = 'Opposition',
+        gw_col: str = 'GW',
+        season_col: str = 'Season',
+    ) -> None:
+        self.player_stats = list(player_stats)
+        self.opposition_stats = list(opposition_stats)
+        self.window = window
+        self.player_col = player_col
+        self.team_col = team_col
+        self.opposition_col = opposition_col
+        self.gw_col = gw_col
+        self.season_col = season_col
+        self.players = RollingWindows(len(self.player_stats), window)
+        self.teams = RollingWindows(len(self.opposition_stats), window)
+        self.season: Optional[str] = None
+        self.last_gw = 0
+        # Player -> last known CONTEXT_COLS values
+        self.context: Dict[str, Dict] = {}
+
+    @property
+    def feature_columns(self) -> List[str]:
+        """Names of the emitted feature columns, in order."""
+        return ([PREV_NAMES.get(s, f'{s}Prev') for s in self.player_stats]
+                + [f'{s}_last{self.window}' for s in self.player_stats]
+                + [f'against: {s}' for s in self.opposition_stats])
+
+    @property
+    def output_columns(self) -> List[str]:
+        """Model input columns emitted besides the identifiers."""
+        return list(CONTEXT_COLS) + ['Min'] + self.feature_columns
+
+    def update(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """Consume new gameweek rows and return their feature rows.
+
+        Rows from gameweeks already processed are ignored, so re-running on
+        an overlapping extract only emits what is new. A new season resets
+        all windows. Without a GW column the rows are taken as the next
+        gameweek.
+        """
+        id_cols = self._id_cols(rows)
+        outputs: List[pd.DataFrame] = []
+        for season, gw, batch in self._gameweeks(rows):
+            if season != self.season:
+                if self.season is not None and season is not None and season < self.season:
+                    continue
+                self._reset(season)
+            elif gw <= self.last_gw:
+                continue
+            outputs.append(self._step(batch, id_cols))
+            self.last_gw = gw
+        if not outputs:
+            return pd.DataFrame(columns=id_cols + self.output_columns)
+        return pd.concat(outputs, ignore_index=True)
+
+    def preview(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """Feature rows for upcoming fixtures, leaving the state unchanged."""
+        rows = rows.reset_index(drop=True)
+        return self._features(rows, self._id_cols(rows), self._player_rows(rows))
+
+    def to_matrix(self, features: pd.DataFrame, fill_value: float = 0.0) -> np.ndarray:
+        """Feature rows as a 2D float array for ``RidgeARModel.predict_future_points``."""
+        return features[self.feature_columns].to_numpy(dtype=float, na_value=fill_value)
+
+    def _id_cols(self, rows: pd.DataFrame) -> List[str]:
+        return [c for c in (self.season_col, self.gw_col, self.player_col,
+                            self.team_col, self.opposition_col) if c in rows.columns]
+
+    def _gameweeks(self, rows: pd.DataFrame):
+        """(season, gameweek, rows) per gameweek in ``rows``, in order."""
+        order = [c for c in (self.season_col, self.gw_col) if c in rows.columns]
+        if not order:
+            yield self.season, self.last_gw + 1, rows
+            return
+        # A scalar key for a single column: a one-item list makes pandas warn
+        keys = order if len(order) > 1 else order[0]
+        for key, batch in rows.sort_values(order, kind='stable').groupby(keys, sort=False):
+            key = dict(zip(order, key if isinstance(key, tuple) else (key,)))
+            season = str(key[self.season_col]) if self.season_col in key else self.season
+            if self.gw_col in key:
+                gw = int(key[self.gw_col])
+            else:
+                gw = self.last_gw + 1 if season == self.season else 1
+            yield season, gw, batch
+
+    def _player_rows(self, rows: pd.DataFrame, create: bool = False) -> np.ndarray:
+        return self.players.rows(rows[self.player_col].astype(str).to_numpy(), create=create)
+
+    def _features(self, batch: pd.DataFrame, id_cols: List[str],
+                  p_rows: np.ndarray) -> pd.DataFrame:
+        """Output rows for ``batch`` from the current state."""
+        opp = batch[self.opposition_col].astype(str).to_numpy() \
+            if self.opposition_col in batch else np.array([''] * len(batch))
+        o_rows = self.teams.rows(opp)
+        recent = self.players.mean(p_rows)
+        feats = np.hstack([self.players.prev(p_rows), recent, self.teams.mean(o_rows)])
+        out = batch[id_cols].reset_index(drop=True)
+
+        players = batch[self.player_col].astype(str).tolist()
+        for col in CONTEXT_COLS:
+            known = [self.context.get(p, {}).get(col) for p in players]
+            if col in batch:
+                own = batch[col].reset_index(drop=True)
+                out[col] = own.where(own.notna(), pd.Series(known, dtype=object))
+            else:
+                out[col] = known
+            if col != 'Pos':
+                out[col] = pd.to_numeric(out[col], errors='coerce')
+        if 'Min' in batch:
+            out['Min'] = batch['Min'].to_numpy(dtype=float)
+        elif 'Min' in self.player_stats:
+            out['Min'] = recent[:, self.player_stats.index('Min')]
+        else:
+            out['Min'] = np.nan
+        return pd.concat([out, pd.DataFrame(feats, columns=self.feature_columns)], axis=1)
+
+    def _step(self, batch: pd.DataFrame, id_cols: List[str]) -> pd.DataFrame:
+        """Features for one gameweek from prior state, then fold the gameweek in."""
+        p_rows = self._player_rows(batch, create=True)
+        out = self._features(batch, id_cols, p_rows)
+
+        # Double gameweeks give a player several rows: push them one by one
+        values = batch[self.player_stats].to_numpy(dtype=float, na_value=0.0)
+        pending = np.ones(len(p_rows), dtype=bool)
+        while pending.any():
+            idx = np.flatnonzero(pending)
+            _, first = np.unique(p_rows[idx], return_index=True)
+            take = idx[first]
+            self.players.push(p_rows[take], values[take])
+            pending[take] = False
+
+        context = [c for c in CONTEXT_COLS if c in batch]
+        if context:
+            for player, row in zip(batch[self.player_col].astype(str),
+                                   batch[context].to_dict('records')):
+                known = self.context.setdefault(player, {})
+                known.update({k: _plain(v) for k, v in row.items() if pd.notna(v)})
+
+        # Team totals for the gameweek feed the opposition windows
+        if self.team_col in batch and self.opposition_stats:
+            totals = batch.groupby(self.team_col)[self.opposition_stats].sum()
+            t_rows = self.teams.rows(totals.index.astype(str).tolist(), create=True)
+            self.teams.push(t_rows, totals.to_numpy(dtype=float, na_value=0.0))
+        return out
+
+    def _reset(self, season: Optional[str]) -> None:
+        self.players = RollingWindows(len(self.player_stats), self.window)
+        self.teams = RollingWindows(len(self.opposition_stats), self.window)
+        self.season = season
+        self.last_gw = 0
+        self.context = {}
+
+    def save(self, path: str) -> None:
+        """Persist rolling state to ``path`` (.npz), replaced atomically."""
+        meta = {
+            'player_stats': self.player_stats,
+            'opposition_stats': self.opposition_stats,
+            'window': self.window,
+            'season': self.season,
+            'last_gw': self.last_gw,
+            'players': self.players.index,
+            'teams': self.teams.index,
+            'context': self.context,
+        }
+        arrays = {f'players_{k}': v for k, v in self.players.state().items()}
+        arrays.update({f'teams_{k}': v for k, v in self.teams.state().items()})
+        # The metadata travels inside the archive, so a reader never sees
+        # arrays and metadata from different saves
+        arrays['meta'] = np.array(json.dumps(meta))
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'FeaturePipeline':
+        """Restore a pipeline saved with ``save``; column names come from ``kwargs``."""
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            pipe = cls(meta['player_stats'], meta['opposition_stats'], meta['window'], **kwargs)
+            pipe.season = meta['season']
+            pipe.last_gw = meta['last_gw']
+            pipe.context = meta['context']
+            pipe.players.restore(meta['players'], _split(data, 'players_'))
+            pipe.teams.restore(meta['teams'], _split(data, 'teams_'))
+        return pipe
+
+
+def upcoming_rows(table, gameweeks: Sequence[int], fixture_index=None) -> pd.DataFrame:
+    """One row per upcoming gameweek and player of a ``PlayerTable``, gameweek-major.
+
+    ``Opposition`` is the first opponent from ``fixture_index`` under the
+    name the table uses for that team; blanks and unknown fixtures get ''.
+    """
+    n = len(table)
+    opposition = np.full((n, len(gameweeks)), '', dtype=object)
+    if fixture_index is not None:
+        own = set(table.teams.tolist())
+        names: Dict[int, str] = {}
+        for name, tid in fixture_index.team_names.items():
+            if tid not in names or (name in own and names[tid] not in own):
+                names[tid] = name
+        opp = fixture_index.opponents(fixture_index.team_ids(table.teams.tolist()), gameweeks)
+        opposition[:] = [[names.get(int(t), '') for t in row] for row in opp]
+    return pd.DataFrame({
+        'GW': np.repeat(np.asarray(gameweeks, dtype=np.int64), n),
+        'Player': np.tile(table.names, len(gameweeks)),
+        'Team': np.tile(table.teams, len(gameweeks)),
+        'Opposition': opposition.T.ravel(),
+        'Pos': np.tile(table.positions, len(gameweeks)),
+        'Price': np.tile(table.prices, len(gameweeks)),
+    })
+
+
+def horizon_features(pipeline: FeaturePipeline, model, table, gameweeks: Sequence[int],
+                     fixture_index=None) -> np.ndarray:
+    """(players, gameweeks, n_features) model input for ``RidgeARModel.predict_horizon``.
+
+    ``model`` needs ``build_features`` (a model file with a preprocessing
+    artifact); numeric inputs with no history are 0.
+    """
+    frame = pipeline.preview(upcoming_rows(table, gameweeks, fixture_index))
+    numeric = [c for c in pipeline.output_columns if c != 'Pos']
+    frame[numeric] = frame[numeric].fillna(0.0)
+    X = np.asarray(model.build_features(frame), dtype=float)
+    return np.ascontiguousarray(X.reshape(len(gameweeks), len(table), -1).transpose(1, 0, 2))
+
+
+def _split(data, prefix: str) -> Dict[str, np.ndarray]:
+    return {k[len(prefix):]: data[k] for k in data.files if k.startswith(prefix)}
+
+
+def _plain(value):
+    """NumPy scalars as Python values, for the JSON metadata."""
+    return value.item() if isinstance(value, np.generic) else value
+
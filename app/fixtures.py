@@ -0,0 +1,183 @@
+"""Team x gameweek fixture index built from the FPL fixtures payload."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    "FPL_FIXTURE_INDEX", str(Path(__file__).with_name("fixture_index.npz"))
+)
+# Slots per team and gameweek; FPL has never scheduled more than a double
+MAX_PER_GW = 2
+# Points multiplier change per difficulty step away from an average (3) fixture
+DIFFICULTY_WEIGHT = 0.1
+
+
+class FixtureIndex:
+    """Opponent, venue and difficulty per (team, gameweek, slot) as int8 arrays.
+
+    Team ids and gameweeks index the arrays directly (row/column 0 unused),
+    so any lookup is O(1) and lookups for a whole player pool are one
+    fancy-indexing call. Slot 0 is a team's first fixture of the gameweek,
+    slot 1 the second one of a double; ``opponent == 0`` marks an empty
+    slot, so a blank gameweek has ``count == 0``.
+    """
+
+    def __init__(
+        self,
+        opponent: np.ndarray,
+        home: np.ndarray,
+        difficulty: np.ndarray,
+        team_names: Dict[str, int],
+    ) -> None:
+        self.opponent = opponent
+        self.home = home
+        self.difficulty = difficulty
+        self.count = (opponent > 0).sum(axis=2).astype(np.int8)
+        self.team_names = dict(team_names)
+        self.n_teams = opponent.shape[0] - 1
+        self.n_gws = opponent.shape[1] - 1
+
+    @classmethod
+    def from_fixtures(cls, fixtures: Iterable[Dict], teams: Iterable[Dict] = ()) -> 'FixtureIndex':
+        """Build from ``/fixtures/`` entries and optional bootstrap ``teams``.
+
+        Fixtures without an ``event`` (postponed, not yet rescheduled) are
+        skipped. Team names, short names and ids all resolve via ``team_ids``.
+        """
+        fixtures = [f for f in fixtures if f.get('event')]
+        teams = list(teams)
+        n_teams = max([t['id'] for t in teams] +
+                      [max(f['team_h'], f['team_a']) for f in fixtures] + [0])
+        n_gws = max([f['event'] for f in fixtures] + [0])
+        shape = (n_teams + 1, n_gws + 1, MAX_PER_GW)
+        opponent = np.zeros(shape, dtype=np.int8)
+        home = np.zeros(shape, dtype=np.int8)
+        difficulty = np.zeros(shape, dtype=np.int8)
+        filled = np.zeros(shape[:2], dtype=np.int8)
+
+        for f in sorted(fixtures, key=lambda f: (f['event'], f.get('kickoff_time') or '')):
+            gw = f['event']
+            for team, opp, is_home, diff in (
+                (f['team_h'], f['team_a'], 1, f.get('team_h_difficulty', 3)),
+                (f['team_a'], f['team_h'], 0, f.get('team_a_difficulty', 3)),
+            ):
+                slot = filled[team, gw]
+                if slot >= MAX_PER_GW:
+                    logging.warning(f"Team {team} has more than {MAX_PER_GW} fixtures in GW{gw}")
+                    continue
+                opponent[team, gw, slot] = opp
+                home[team, gw, slot] = is_home
+                difficulty[team, gw, slot] = diff or 3
+                filled[team, gw] += 1
+
+        names: Dict[str, int] = {}
+        for t in teams:
+            for key in ('name', 'short_name'):
+                if t.get(key):
+                    names[str(t[key])] = int(t['id'])
+        return cls(opponent, home, difficulty, names)
+
+    def team_ids(self, teams: Sequence) -> np.ndarray:
+        """Team id per name, short name or id (0 when unknown)."""
+        out = np.zeros(len(teams), dtype=np.int64)
+        for i, team in enumerate(teams):
+            if isinstance(team, (int, np.integer)):
+                out[i] = team if 0 < team <= self.n_teams else 0
+            else:
+                out[i] = self.team_names.get(str(team), 0)
+        return out
+
+    def fixtures(self, team_id: int, gw: int) -> List[Tuple[int, bool, int]]:
+        """(opponent, is_home, difficulty) for each of a team's fixtures in ``gw``."""
+        if not (0 < team_id <= self.n_teams and 0 < gw <= self.n_gws):
+            return []
+        return [(int(self.opponent[team_id, gw, s]), bool(self.home[team_id, gw, s]),
+                 int(self.difficulty[team_id, gw, s]))
+                for s in range(self.count[team_id, gw])]
+
+    def _grid(self, team_ids: np.ndarray, gws: Sequence[int]):
+        team_ids = np.asarray(team_ids, dtype=np.int64)[:, None]
+        gws = np.asarray(gws, dtype=np.int64)[None, :]
+        known = (team_ids > 0) & (team_ids <= self.n_teams) & (gws > 0) & (gws <= self.n_gws)
+        return np.where(known, team_ids, 0), np.where(known, gws, 0), known
+
+    def n_fixtures(self, team_ids: np.ndarray, gws: Sequence[int]) -> np.ndarray:
+        """(teams, gws) fixture counts: 0 blank, 1 single, 2 double; -1 unknown."""
+        t, g, known = self._grid(team_ids, gws)
+        return np.where(known, self.count[t, g], -1)
+
+    def opponents(self, team_ids: np.ndarray, gws: Sequence[int]) -> np.ndarray:
+        """(teams, gws) id of the first opponent, 0 for blanks or unknown."""
+        t, g, _ = self._grid(team_ids, gws)
+        return self.opponent[t, g, 0].astype(np.int64)
+
+    def mean_difficulty(self, team_ids: np.ndarray, gws: Sequence[int]) -> np.ndarray:
+        """(teams, gws) mean FDR over the gameweek's fixtures, NaN when none."""
+        t, g, _ = self._grid(team_ids, gws)
+        count = self.count[t, g]
+        total = self.difficulty[t, g].sum(axis=-1, dtype=np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, total / count, np.nan)
+
+    def multipliers(
+        self,
+        team_ids: np.ndarray,
+        gws: Sequence[int],
+        weight: float = DIFFICULTY_WEIGHT,
+    ) -> np.ndarray:
+        """(teams, gws) factor to scale single-fixture predictions by.
+
+        Each fixture contributes ``1 - weight * (difficulty - 3)``, so blanks
+        give 0 and doubles roughly 2. Unknown teams or gameweeks give 1.
+        """
+        t, g, known = self._grid(team_ids, gws)
+        present = self.opponent[t, g] > 0
+        per_fixture = 1.0 - weight * (self.difficulty[t, g].astype(np.float64) - 3.0)
+        mult = np.where(present, per_fixture, 0.0).sum(axis=-1)
+        return np.where(known, mult, 1.0)
+
+    def save(self, path: str = DEFAULT_INDEX_PATH) -> None:
+        names = np.array(sorted(self.team_names))
+        tmp = f'{path}.tmp.npz'
+        np.savez_compressed(tmp, opponent=self.opponent, home=self.home,
+                            difficulty=self.difficulty, names=names,
+                            name_ids=np.array([self.team_names[n] for n in names], dtype=np.int64))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_INDEX_PATH) -> 'FixtureIndex':
+        with np.load(path, allow_pickle=False) as data:
+            names = dict(zip(data['names'].tolist(), data['name_ids'].tolist()))
+            return cls(data['opponent'], data['home'], data['difficulty'], names)
+
+
+_INDEX: Optional[Tuple[float, FixtureIndex]] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_fixture_index(path: str = DEFAULT_INDEX_PATH) -> Optional[FixtureIndex]:
+    """Process-wide index loaded from ``path``; reloaded when the file changes.
+
+    Returns None if no index has been saved yet (see
+    ``FPLClient.get_fixture_index``).
+    """
+    global _INDEX
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _INDEX_LOCK:
+        if _INDEX is None or _INDEX[0] != mtime:
+            try:
+                _INDEX = (mtime, FixtureIndex.load(path))
+            except Exception as e:
+                logging.warning(f"Ignoring unreadable fixture index {path}: {e}")
+                return None
+        return _INDEX[1]
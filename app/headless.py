@@ -0,0 +1,221 @@
+"""Command-line and JSON-over-HTTP access to the analysis engine, without Streamlit.
+
+    python app/headless.py analyze --ids 1,2,...,15 --bank 0.5
+    python app/headless.py batch squads.jsonl > results.jsonl
+    python app/headless.py serve --port 8600
+    python app/headless.py warmup     # fill the data caches, e.g. in a container build
+    python app/headless.py --model model.joblib --features feats.npy serve
+
+A request is a JSON object with either ``ids`` (player ids, plus optional
+``captain``) or ``picks`` (as in the manager JSON), optional ``bank`` in
+£m and optional ``horizon``, ``top_n`` and ``samples``; with neither ids
+nor picks the GW JSON squad is used. Every request runs ``engine.analyze_squad``,
+so the Streamlit app, batch runs and the API share one process's caches.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Iterator, Optional
+
+import numpy as np
+
+import engine
+import tracing
+
+# Largest request body the server reads
+MAX_BODY = 64 * 1024
+# Scenario cap per request, so one caller cannot monopolise the server
+MAX_SAMPLES = 50_000
+
+# Model file and features every request predicts with (placeholder when unset)
+_MODEL: Dict = {'path': None, 'features': None}
+
+
+def use_model(path: Optional[str], features_path: Optional[str] = None) -> None:
+    """Predict with the model at ``path`` through the process-wide ModelServer.
+
+    Concurrent requests then share batched model calls; the server is
+    looked up per request, so a replaced model file is picked up.
+    """
+    _MODEL['path'] = path
+    _MODEL['features'] = np.load(features_path) if path and features_path else None
+
+
+def _model():
+    if _MODEL['path'] is None:
+        return None
+    from model_server import get_model_server
+
+    return get_model_server(_MODEL['path'])
+
+
+def squad_from_request(payload: Dict) -> engine.Squad:
+    """``engine.Squad`` described by a request; ValueError if malformed."""
+    if not isinstance(payload, dict):
+        raise ValueError("request must be a JSON object")
+    try:
+        return _squad(payload)
+    except TypeError as e:
+        raise ValueError(f"malformed request: {e}")
+
+
+def _squad(payload: Dict) -> engine.Squad:
+    bank = float(payload.get('bank', 0.0))
+    if 'picks' in payload:
+        picks = payload['picks']
+        if not isinstance(picks, list) or not all(
+                isinstance(p, dict) and 'element' in p for p in picks):
+            raise ValueError("'picks' must be a list of objects with an 'element'")
+        return engine.Squad(tuple(picks), bank)
+    if 'ids' in payload:
+        ids = payload['ids']
+        if not isinstance(ids, list):
+            raise ValueError("'ids' must be a list of player ids")
+        captain = payload.get('captain')
+        return engine.Squad.from_ids([int(i) for i in ids], bank,
+                                     None if captain is None else int(captain))
+    squad = engine.load_squad()
+    return squad if 'bank' not in payload else engine.Squad(squad.picks, bank, squad.source)
+
+
+def handle(payload: Dict) -> Dict:
+    """Analyse one request; ValueError if it is malformed."""
+    squad = squad_from_request(payload)
+    try:
+        horizon = int(payload.get('horizon', engine.PLAN_HORIZON))
+        top_n = int(payload.get('top_n', 5))
+        samples = int(payload.get('samples', engine.SIM_SAMPLES))
+    except (TypeError, ValueError):
+        raise ValueError("'horizon', 'top_n' and 'samples' must be integers")
+    if not 1 <= horizon <= engine.MAX_HORIZON:
+        raise ValueError(f"'horizon' must be between 1 and {engine.MAX_HORIZON}")
+    if not 1 <= samples <= MAX_SAMPLES:
+        raise ValueError(f"'samples' must be between 1 and {MAX_SAMPLES}")
+    with tracing.request("headless.analyze"):
+        return engine.analyze_squad(squad, horizon=horizon, top_n=max(1, top_n),
+                                    n_samples=samples, model=_model(),
+                                    features=_MODEL['features'])
+
+
+def run_batch(lines: Iterable[str]) -> Iterator[Dict]:
+    """One result per non-empty JSON line; bad lines yield ``{"error": ...}``."""
+    for n, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield handle(json.loads(line))
+        except ValueError as e:
+            logging.warning(f"Line {n}: {e}")
+            yield {'error': str(e), 'line': n}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path == '/health':
+            self._send(200, {'status': 'ok', 'gameweek': engine.TARGET_GW})
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def do_POST(self) -> None:
+        if self.path != '/analyze':
+            self._send(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > MAX_BODY:
+                raise ValueError(f"request body over {MAX_BODY} bytes")
+            result = handle(json.loads(self.rfile.read(length) or b'{}'))
+        except ValueError as e:
+            # json.JSONDecodeError is a ValueError too
+            self._send(400, {'error': str(e)})
+            return
+        except Exception as e:
+            logging.exception(f"Analysis failed: {e}")
+            self._send(500, {'error': 'analysis failed'})
+            return
+        self._send(200, result)
+
+    def _send(self, status: int, data: Dict) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def serve(port: int, host: str = '127.0.0.1', block: bool = True) -> ThreadingHTTPServer:
+    """Serve GET /health and POST /analyze; with ``block=False`` from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    logging.info(f"Serving analysis on http://{host}:{server.server_port}/analyze")
+    if block:
+        server.serve_forever()
+    else:
+        threading.Thread(target=server.serve_forever, name='fpl-headless', daemon=True).start()
+    return server
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Squad analysis without the Streamlit app.")
+    parser.add_argument('--model', help='model file (default: placeholder predictions)')
+    parser.add_argument('--features', help='.npy of (players, horizon, n_features) for --model')
+    sub = parser.add_subparsers(dest='command', required=True)
+    one = sub.add_parser('analyze', help='analyse one squad and print JSON')
+    one.add_argument('--ids', help='comma-separated player ids (default: the GW JSON squad)')
+    one.add_argument('--captain', type=int)
+    one.add_argument('--bank', type=float)
+    one.add_argument('--horizon', type=int, default=engine.PLAN_HORIZON)
+    one.add_argument('--top-n', type=int, default=5)
+    one.add_argument('--samples', type=int, default=engine.SIM_SAMPLES)
+    batch = sub.add_parser('batch', help='analyse JSON-lines requests, one result per line')
+    batch.add_argument('path', nargs='?', default='-', help="requests file ('-' for stdin)")
+    srv = sub.add_parser('serve', help='serve the JSON API')
+    srv.add_argument('--port', type=int, default=8600)
+    srv.add_argument('--host', default='127.0.0.1')
+    sub.add_parser('warmup', help='load the shared caches and print step timings')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stderr)
+    use_model(args.model, args.features)
+
+    if args.command == 'warmup':
+        print(json.dumps({k: round(v, 4) for k, v in engine.warm_up().items()}))
+        return 0
+    if args.command == 'serve':
+        try:
+            # The first request should not pay for loading the data
+            engine.warm_up()
+            serve(args.port, args.host)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.command == 'batch':
+        lines = sys.stdin if args.path == '-' else open(args.path, encoding='utf-8')
+        with lines:
+            for result in run_batch(lines):
+                print(json.dumps(result), flush=True)
+        return 0
+
+    payload = {'horizon': args.horizon, 'top_n': args.top_n, 'samples': args.samples}
+    if args.ids:
+        payload['ids'] = [x.strip() for x in args.ids.split(',') if x.strip()]
+        payload['captain'] = args.captain
+    if args.bank is not None:
+        payload['bank'] = args.bank
+    try:
+        print(json.dumps(handle(payload), indent=1))
+    except ValueError as e:
+        parser.error(str(e))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""Multi-gameweek transfer planning with rolling free transfers and chips."""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from transfers import HIT_COST, TransferPlanner
+
+MAX_FREE_TRANSFERS = 5
+CHIPS = ('wildcard', 'free_hit', 'bench_boost', 'triple_captain')
+# Minimum starters per position in a valid XI (GK is always exactly one)
+MIN_STARTERS = {'DEF': 3, 'MID': 2, 'FW': 1}
+
+
+def select_xi(points: np.ndarray, positions: np.ndarray) -> List[int]:
+    """Indices of the best valid XI: one GK, the minimum DEF/MID/FW, best of the rest."""
+    order = np.argsort(-points, kind='stable')
+    xi: List[int] = [i for i in order if positions[i] == 'GK'][:1]
+    rest = []
+    for position, need in MIN_STARTERS.items():
+        players = [i for i in order if positions[i] == position]
+        xi.extend(players[:need])
+        rest.extend(players[need:])
+    rest.sort(key=lambda i: -points[i])
+    xi.extend(rest[:max(0, 11 - len(xi))])
+    return xi
+
+
+def lineup_points(
+    points: np.ndarray,
+    positions: np.ndarray,
+    bench_boost: bool = False,
+    captain_multiplier: int = 2,
+) -> Tuple[float, int]:
+    """Expected points of the best XI of a 15-man squad and the captain's index.
+
+    The XI comes from ``select_xi``; with ``bench_boost`` every player
+    counts.
+    """
+    xi = list(range(len(points))) if bench_boost else select_xi(points, positions)
+    if not xi:
+        return 0.0, -1
+    captain = max(xi, key=lambda i: points[i])
+    total = float(points[xi].sum()) + (captain_multiplier - 1) * float(points[captain])
+    return total, int(captain)
+
+
+class HorizonPlanner:
+    """Beam search over transfer sequences for the next few gameweeks.
+
+    Each state is (squad, bank, free transfers, chips left) with the points
+    collected so far. Per gameweek a state can roll its transfer, make the
+    best 1..``max_transfers`` moves proposed by ``TransferPlanner`` for the
+    rest of the horizon, or play a chip. Identical states are merged and
+    only the best ``beam_width`` survive to the next gameweek.
+    """
+
+    def __init__(
+        self,
+        table,
+        predictions: np.ndarray,
+        beam_width: int = 8,
+        max_transfers: int = 2,
+        moves_per_count: int = 3,
+        chip_transfers: int = 4,
+        move_time_budget: float = 0.1,
+        hit_cost: float = HIT_COST,
+    ) -> None:
+        self.table = table
+        self.predictions = np.asarray(predictions, dtype=float)
+        if self.predictions.ndim != 2 or self.predictions.shape[0] != len(table):
+            raise ValueError("predictions must be a (players, gameweeks) matrix")
+        self.beam_width = beam_width
+        self.max_transfers = max_transfers
+        self.moves_per_count = moves_per_count
+        self.chip_transfers = chip_transfers
+        self.move_time_budget = move_time_budget
+        self.hit_cost = hit_cost
+        # Points from each gameweek to the end of the horizon
+        self._remaining = np.cumsum(self.predictions[:, ::-1], axis=1)[:, ::-1]
+        self._planners: Dict[Tuple[str, int], TransferPlanner] = {}
+        self._moves: Dict[Tuple, List[Dict]] = {}
+        self._lineups: Dict[Tuple, Tuple[float, int]] = {}
+
+    def plan(
+        self,
+        squad_ids: Iterable[int],
+        bank: float,
+        free_transfers: int = 1,
+        horizon: Optional[int] = None,
+        chips: Iterable[str] = (),
+    ) -> Dict:
+        """Best transfer sequence for the next ``horizon`` gameweeks."""
+        horizon = min(horizon or self.predictions.shape[1], self.predictions.shape[1])
+        chips = frozenset(c for c in chips if c in CHIPS)
+        start = (tuple(sorted(int(p) for p in squad_ids)), round(bank, 1),
+                 free_transfers, chips)
+        beam: List[Tuple[float, Tuple, List[Dict]]] = [(0.0, start, [])]
+
+        for gw in range(horizon):
+            best: Dict[Tuple, Tuple[float, Tuple, List[Dict]]] = {}
+            for score, state, steps in beam:
+                for next_state, step in self._expand(state, gw):
+                    total = score + step['points']
+                    if next_state not in best or total > best[next_state][0]:
+                        best[next_state] = (total, next_state, steps + [step])
+            beam = sorted(best.values(), key=lambda b: -b[0])[:self.beam_width]
+
+        score, state, steps = beam[0]
+        return {
+            'total_points': round(score, 2),
+            'gameweeks': steps,
+            'final_squad': list(state[0]),
+            'bank': state[1],
+            'free_transfers': state[2],
+            'chips_left': sorted(state[3]),
+        }
+
+    def _expand(self, state: Tuple, gw: int):
+        """Yield (next_state, step) for every action considered at ``gw``."""
+        squad, bank, ft, chips = state
+        # (chip, max transfers, hit cost, score on remaining horizon?)
+        options: List[Tuple[Optional[str], int, float, bool]] = [
+            (None, self.max_transfers, self.hit_cost, True)]
+        if 'wildcard' in chips:
+            options.append(('wildcard', self.chip_transfers, 0.0, True))
+        if 'free_hit' in chips:
+            options.append(('free_hit', self.chip_transfers, 0.0, False))
+
+        for chip, n, hit_cost, whole_horizon in options:
+            moves = [] if chip else [{'transfers': [], 'cost': 0.0, 'n_transfers': 0}]
+            moves += self._best_moves(squad, bank, gw, n, ft if chip is None else n,
+                                      hit_cost, whole_horizon)
+            for move in moves:
+                new_squad = _apply(squad, move['transfers'])
+                k = move['n_transfers']
+                hits = 0 if chip else max(0, k - ft)
+                new_bank = round(bank - move['cost'], 1)
+                lineup_chips = [None]
+                if chip is None:
+                    lineup_chips += [c for c in ('bench_boost', 'triple_captain') if c in chips]
+                for lineup_chip in lineup_chips:
+                    pts, captain = self._lineup(new_squad, gw, lineup_chip)
+                    played = chip or lineup_chip
+                    if chip == 'free_hit':
+                        next_squad, next_bank = squad, bank
+                    else:
+                        next_squad, next_bank = new_squad, new_bank
+                    next_ft = min(MAX_FREE_TRANSFERS, (ft if chip else max(ft - k, 0)) + 1)
+                    next_chips = chips - {played} if played else chips
+                    yield (next_squad, next_bank, next_ft, next_chips), {
+                        'gameweek': gw,
+                        'transfers': move['transfers'],
+                        'hits': hits,
+                        'chip': played,
+                        'captain': int(self.table.ids[captain]) if captain >= 0 else None,
+                        'points': round(pts - hits * self.hit_cost, 2),
+                    }
+
+    def _best_moves(self, squad, bank, gw, max_transfers, free, hit_cost, whole_horizon):
+        key = (squad, bank, gw, max_transfers, free, hit_cost, whole_horizon)
+        if key not in self._moves:
+            planner = self._planner(gw, whole_horizon)
+            plans = planner.plan(squad, bank, max_transfers=max_transfers,
+                                 free_transfers=free, hit_cost=hit_cost,
+                                 top_k=self.moves_per_count,
+                                 time_budget=self.move_time_budget)
+            # Keep moves that lose points over the rest of the horizon too:
+            # selling now to free funds or rebuy later can still win once
+            # the beam scores the actual lineups
+            self._moves[key] = [p for ps in plans.values() for p in ps]
+        return self._moves[key]
+
+    def _planner(self, gw: int, whole_horizon: bool) -> TransferPlanner:
+        key = ('rest' if whole_horizon else 'gw', gw)
+        if key not in self._planners:
+            pts = self._remaining[:, gw] if whole_horizon else self.predictions[:, gw]
+            # Up to two planners per gameweek: private indexes keep them from
+            # evicting the shared index the analysis page reuses
+            self._planners[key] = TransferPlanner.from_table(self.table, pts, shared=False)
+        return self._planners[key]
+
+    def _lineup(self, squad: Tuple[int, ...], gw: int, chip: Optional[str]) -> Tuple[float, int]:
+        key = (squad, gw, chip)
+        if key not in self._lineups:
+            rows = self.table.rows(squad)
+            pts, captain = lineup_points(
+                self.predictions[rows, gw], self.table.positions[rows],
+                bench_boost=chip == 'bench_boost',
+                captain_multiplier=3 if chip == 'triple_captain' else 2,
+            )
+            self._lineups[key] = (pts, int(rows[captain]) if captain >= 0 else -1)
+        return self._lineups[key]
+
+
+def _apply(squad: Tuple[int, ...], transfers: Sequence[Dict]) -> Tuple[int, ...]:
+    if not transfers:
+        return squad
+    out = {t['out_id'] for t in transfers}
+    return tuple(sorted([p for p in squad if p not in out] + [t['in_id'] for t in transfers]))
+
+
+_CACHE: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+_CACHE_SIZE = 128
+_CACHE_LOCK = threading.Lock()
+
+
+def plan_horizon(
+    table,
+    predictions: np.ndarray,
+    squad_ids: Iterable[int],
+    bank: float,
+    free_transfers: int = 1,
+    horizon: int = 4,
+    chips: Iterable[str] = (),
+    **planner_kwargs,
+) -> Dict:
+    """Cached ``HorizonPlanner.plan`` keyed by squad, horizon, player table
+    and predictions.
+
+    Streamlit reruns with the same squad and prediction matrix return the
+    stored plan immediately. The cache is shared by every session, so each
+    caller gets its own copy.
+    """
+    predictions = np.ascontiguousarray(predictions, dtype=float)
+    digest = hashlib.blake2b(predictions.tobytes(), digest_size=16).hexdigest()
+    # Prices and clubs change under placeholder predictions keyed by id alone
+    key = (tuple(sorted(int(p) for p in squad_ids)), round(bank, 1), free_transfers,
+           horizon, tuple(sorted(chips)), table.digest, digest,
+           tuple(sorted(planner_kwargs.items())))
+    with _CACHE_LOCK:
+        if key in _CACHE:
+            _CACHE.move_to_end(key)
+            return copy.deepcopy(_CACHE[key])
+
+    result = HorizonPlanner(table, predictions, **planner_kwargs).plan(
+        key[0], bank, free_transfers=free_transfers, horizon=horizon, chips=chips)
+
+    with _CACHE_LOCK:
+        _CACHE[key] = result
+        while len(_CACHE) > _CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return copy.deepcopy(result)
@@ -0,0 +1,218 @@
+"""Mini-league analytics on sparse entry x player pick matrices."""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+from scipy import sparse
+
+
+def live_points(payload: Dict, n_players: Optional[int] = None) -> np.ndarray:
+    """Points per player id from an ``/event/<gw>/live/`` payload."""
+    elements = payload.get('elements', [])
+    size = n_players or (max((e['id'] for e in elements), default=0) + 1)
+    points = np.zeros(size)
+    for e in elements:
+        if e['id'] < size:
+            points[e['id']] = e.get('stats', {}).get('total_points', 0)
+    return points
+
+
+class LeagueTracker:
+    """Picks of every entry in a league, one sparse matrix per gameweek.
+
+    Row ``i`` of a gameweek matrix is entry ``entry_ids[i]``, column ``j``
+    player id ``j``, and the value the pick multiplier (0 bench, 1 starter,
+    2 captain, 3 triple captain). League-wide quantities are then single
+    sparse products: effective ownership is ``ones @ M / n`` and entry
+    scores ``M @ points``. Adding a gameweek touches only that gameweek's
+    picks; cumulative totals carry over.
+    """
+
+    def __init__(self, n_players: int = 1000) -> None:
+        self.n_players = n_players
+        self.entry_ids: List[int] = []
+        self._row_of: Dict[int, int] = {}
+        self.matrices: Dict[int, sparse.csr_matrix] = {}
+        self.hit_costs: Dict[int, np.ndarray] = {}
+        self.active: Dict[int, np.ndarray] = {}
+        self.gw_points: Dict[int, np.ndarray] = {}
+        self.totals = np.zeros(0)
+
+    @property
+    def n_entries(self) -> int:
+        return len(self.entry_ids)
+
+    def _rows(self, entry_ids: Iterable[int]) -> np.ndarray:
+        rows = []
+        for eid in entry_ids:
+            eid = int(eid)
+            if eid not in self._row_of:
+                self._row_of[eid] = len(self.entry_ids)
+                self.entry_ids.append(eid)
+            rows.append(self._row_of[eid])
+        if len(self.totals) < self.n_entries:
+            self.totals = np.concatenate([self.totals, np.zeros(self.n_entries - len(self.totals))])
+        return np.asarray(rows, dtype=np.int64)
+
+    def add_gameweek(self, gw: int, picks: Mapping[int, Dict]) -> sparse.csr_matrix:
+        """Add one gameweek of picks payloads keyed by entry id.
+
+        Each payload is the ``/entry/<id>/event/<gw>/picks/`` response (or
+        just its ``picks`` list). Empty payloads, e.g. failed fetches, are
+        skipped. Re-adding a gameweek replaces it.
+        """
+        picks = {eid: p for eid, p in picks.items() if p}
+        rows = self._rows(picks)
+        r_idx, c_idx, vals = [], [], []
+        hits = np.zeros(len(rows))
+        for i, (row, payload) in enumerate(zip(rows, picks.values())):
+            items = payload.get('picks', []) if isinstance(payload, dict) else payload
+            elements = [p['element'] for p in items]
+            r_idx.append(np.full(len(elements), row))
+            c_idx.append(elements)
+            vals.append([p.get('multiplier', 1) for p in items])
+            if isinstance(payload, dict):
+                hits[i] = payload.get('entry_history', {}).get('event_transfers_cost', 0)
+        cols = np.concatenate(c_idx).astype(np.int64) if c_idx else np.zeros(0, np.int64)
+        if cols.size and cols.max() >= self.n_players:
+            self.n_players = int(cols.max()) + 1
+        matrix = sparse.csr_matrix(
+            (np.concatenate(vals).astype(np.float64) if vals else np.zeros(0),
+             (np.concatenate(r_idx) if r_idx else np.zeros(0, np.int64), cols)),
+            shape=(self.n_entries, self.n_players),
+        )
+        self.matrices[gw] = matrix
+        cost = np.zeros(self.n_entries)
+        cost[rows] = hits
+        self.hit_costs[gw] = cost
+        active = np.zeros(self.n_entries, dtype=bool)
+        active[rows] = True
+        self.active[gw] = active
+        if gw in self.gw_points:
+            # Replacing a scored gameweek: take its old points back out
+            old = self.gw_points.pop(gw)
+            self.totals[:len(old)] -= old
+        return matrix
+
+    def effective_ownership(self, gw: int, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Mean multiplier per player over entries with picks that gameweek.
+
+        ``rows`` restricts the average to a subset of entry rows (e.g. the
+        top 10 of the league).
+        """
+        m = self._matrix(gw)
+        weights = self.active[gw].astype(np.float64)
+        if rows is not None:
+            mask = np.zeros(self.n_entries)
+            mask[rows] = 1.0
+            weights *= mask
+        n = weights.sum()
+        return (m.T @ weights) / n if n else np.zeros(self.n_players)
+
+    def differential_exposure(self, entry_id: int, gw: int, top: int = 10) -> Dict[str, List]:
+        """Where an entry gains or loses against the league per point scored.
+
+        Exposure is the entry's multiplier minus effective ownership: +1.7
+        means each point the player scores gains 1.7 points on the average
+        rival. Returns the ``top`` most positive and most negative players.
+        """
+        m = self._matrix(gw)
+        row = self._row_of[int(entry_id)]
+        exposure = m[row].toarray().ravel() - self.effective_ownership(gw)
+        order = np.argsort(exposure, kind='stable')
+        pos = [(int(j), round(float(exposure[j]), 3)) for j in order[::-1][:top] if exposure[j] > 0]
+        neg = [(int(j), round(float(exposure[j]), 3)) for j in order[:top] if exposure[j] < 0]
+        return {'gains': pos, 'risks': neg}
+
+    def score_gameweek(self, gw: int, player_points: np.ndarray) -> Dict[str, np.ndarray]:
+        """Apply a gameweek's player points and return per-entry results.
+
+        ``player_points`` is indexed by player id (see ``live_points``).
+        Can be called repeatedly with live points; only the latest call for
+        a gameweek counts towards the cumulative totals.
+        """
+        m = self._matrix(gw)
+        points = np.zeros(self.n_players)
+        k = min(len(player_points), self.n_players)
+        points[:k] = player_points[:k]
+        gw_points = m @ points - self.hit_costs[gw]
+
+        before = self.totals.copy()
+        if gw in self.gw_points:
+            old = self.gw_points[gw]
+            before[:len(old)] -= old
+        after = before.copy()
+        after[:len(gw_points)] += gw_points
+        self.gw_points[gw] = gw_points
+        self.totals = after
+        rank_before, rank_after = _ranks(before), _ranks(after)
+        return {
+            'entry_ids': np.asarray(self.entry_ids),
+            'points': gw_points,
+            'total': after,
+            'rank_before': rank_before,
+            'rank_after': rank_after,
+            'rank_swing': rank_before - rank_after,
+        }
+
+    def ingest(self, gw: int, fetch_picks=None) -> sparse.csr_matrix:
+        """Fetch this gameweek's picks for every known entry and add them.
+
+        ``fetch_picks(entry_ids, gw)`` defaults to
+        ``bulk_client.get_entries_picks``.
+        """
+        if fetch_picks is None:
+            from bulk_client import get_entries_picks as fetch_picks
+        payloads = fetch_picks(self.entry_ids, gw)
+        missing = sum(1 for p in payloads if not p)
+        if missing:
+            logging.warning(f"No picks for {missing} of {self.n_entries} entries in GW{gw}")
+        return self.add_gameweek(gw, dict(zip(self.entry_ids, payloads)))
+
+    def add_entries(self, entry_ids: Iterable[int]) -> None:
+        self._rows(entry_ids)
+
+    def _matrix(self, gw: int) -> sparse.csr_matrix:
+        m = self.matrices[gw]
+        if m.shape != (self.n_entries, self.n_players):
+            # Entries or player ids that appeared later are empty in older gameweeks
+            m = m.copy()
+            m.resize((self.n_entries, self.n_players))
+            self.matrices[gw] = m
+            cost = np.zeros(self.n_entries)
+            cost[:len(self.hit_costs[gw])] = self.hit_costs[gw]
+            self.hit_costs[gw] = cost
+            active = np.zeros(self.n_entries, dtype=bool)
+            active[:len(self.active[gw])] = self.active[gw]
+            self.active[gw] = active
+        return m
+
+
+def fetch_league_entries(league_id: int, client=None, max_pages: int = 200) -> List[Dict]:
+    """Every entry in a classic league from its paged standings."""
+    if client is None:
+        from api_client import FPLClient
+        client = FPLClient()
+    entries: List[Dict] = []
+    for page in range(1, max_pages + 1):
+        url = f"{client.BASE_URL}/leagues-classic/{league_id}/standings/?page_standings={page}"
+        try:
+            res = client.session.get(url)
+            res.raise_for_status()
+            standings = res.json().get('standings', {})
+        except Exception as e:
+            logging.error(f"Error fetching league {league_id} page {page}: {e}")
+            break
+        entries.extend(standings.get('results', []))
+        if not standings.get('has_next'):
+            break
+    return entries
+
+
+def _ranks(totals: np.ndarray) -> np.ndarray:
+    """Competition rank (1 = best; ties share the better rank)."""
+    ordered = np.sort(totals)
+    return len(totals) - np.searchsorted(ordered, totals, side='right') + 1
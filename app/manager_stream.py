@@ -0,0 +1,163 @@
+"""Streaming readers for large manager JSON / JSON Lines files."""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+CHUNK_CHARS = 1 << 20
+_WS = ' \t\r\n'
+
+
+def get_field(obj: Dict, path: str, default: Any = None) -> Any:
+    """Value at a dotted path such as ``'entry_history.event'``."""
+    for part in path.split('.'):
+        if not isinstance(obj, dict):
+            return default
+        obj = obj.get(part, default)
+    return obj
+
+
+def iter_json_objects(path: str, chunk_chars: int = CHUNK_CHARS) -> Iterator[Any]:
+    """Yield top-level values one at a time without loading the whole file.
+
+    Handles a single JSON value, a JSON array (each element is yielded) and
+    JSON Lines / concatenated JSON. Only the value being decoded is held in
+    memory.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = f.read(chunk_chars)
+        eof = len(buf) < chunk_chars
+        pos = 0
+        in_array = False
+        started = False
+
+        while True:
+            # Skip whitespace and array punctuation between values
+            while True:
+                while pos < len(buf) and buf[pos] in _WS:
+                    pos += 1
+                if pos < len(buf) and not started and buf[pos] == '[':
+                    in_array = True
+                    pos += 1
+                    started = True
+                    continue
+                if pos < len(buf) and in_array and buf[pos] in ',]':
+                    pos += 1
+                    continue
+                break
+            if pos >= len(buf):
+                if eof:
+                    return
+                buf, pos = f.read(chunk_chars), 0
+                eof = len(buf) < chunk_chars
+                continue
+            started = True
+
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Value spans the chunk boundary: read more and retry
+                want = max(chunk_chars, len(buf) - pos)
+                more = f.read(want)
+                eof = len(more) < want
+                buf, pos = buf[pos:] + more, 0
+                continue
+            # A number at the very end of the buffer may be cut short
+            if end == len(buf) and not eof and not isinstance(value, (dict, list, str)):
+                more = f.read(chunk_chars)
+                eof = len(more) < chunk_chars
+                buf, pos = buf[pos:] + more, 0
+                continue
+            pos = end
+            yield value
+
+
+def iter_entries(
+    path: str,
+    event: Optional[int] = None,
+    event_field: str = 'entry_history.event',
+) -> Iterator[Dict]:
+    """Yield manager entries from ``path``, optionally only those for ``event``."""
+    for obj in iter_json_objects(path):
+        if not isinstance(obj, dict):
+            continue
+        if event is not None and get_field(obj, event_field) != event:
+            continue
+        yield obj
+
+
+def find_entry(path: str, event: int, event_field: str = 'entry_history.event') -> Optional[Dict]:
+    """First entry for ``event``; stops reading as soon as it is found."""
+    return next(iter_entries(path, event=event, event_field=event_field), None)
+
+
+def to_columnar(
+    path: str,
+    out_dir: str,
+    fields: Sequence[str],
+    chunk_rows: int = 100_000,
+) -> int:
+    """Convert entries to chunked columnar ``.npz`` files of the given fields.
+
+    ``fields`` are dotted paths to scalar values; each becomes a column
+    named by its path. Returns the number of rows written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(out_dir, 'chunk_*.npz')):
+        os.remove(stale)
+    columns: Dict[str, List] = {f: [] for f in fields}
+    total = 0
+    n_chunks = 0
+
+    def flush() -> None:
+        nonlocal n_chunks
+        arrays = {f: _column_array(v) for f, v in columns.items()}
+        np.savez(os.path.join(out_dir, f'chunk_{n_chunks:05d}.npz'), **arrays)
+        n_chunks += 1
+        for v in columns.values():
+            v.clear()
+
+    for obj in iter_entries(path):
+        for f in fields:
+            columns[f].append(get_field(obj, f))
+        total += 1
+        if total % chunk_rows == 0:
+            flush()
+    if total % chunk_rows:
+        flush()
+    with open(os.path.join(out_dir, 'meta.json'), 'w', encoding='utf-8') as fh:
+        json.dump({'source': os.path.abspath(path), 'fields': list(fields),
+                   'rows': total, 'chunks': n_chunks}, fh)
+    return total
+
+
+def iter_columnar(
+    out_dir: str,
+    columns: Optional[Sequence[str]] = None,
+    event: Optional[int] = None,
+    event_field: str = 'entry_history.event',
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Yield one dict of column arrays per chunk, filtered to ``event`` if given."""
+    for chunk_path in sorted(glob.glob(os.path.join(out_dir, 'chunk_*.npz'))):
+        with np.load(chunk_path, allow_pickle=False) as data:
+            names = list(columns) if columns is not None else list(data.files)
+            chunk = {c: data[c] for c in names}
+            if event is not None:
+                mask = data[event_field] == event
+                chunk = {c: v[mask] for c, v in chunk.items()}
+        yield chunk
+
+
+def _column_array(values: List) -> np.ndarray:
+    """Numeric array when possible (None -> NaN), otherwise unicode."""
+    if all(v is None or isinstance(v, (int, float, bool)) for v in values):
+        return np.array([np.nan if v is None else v for v in values], dtype=float)
+    return np.array(['' if v is None else str(v) for v in values])
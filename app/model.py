@@ -2,27 +2,60 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
 from pathlib import Path
+from typing import Sequence
 
-import joblib
 import numpy as np
 
+from prediction_cache import cached_predict, model_key
+from tracing import count, span, traced
+
+DEFAULT_MODEL_PATH = Path(__file__).with_name("ridge_ar_model.joblib")
+
+
+def _file_digest(path: Path) -> str:
+    """Short content hash identifying a model file version."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
 
 class RidgeARModel:
     """Wrapper around a pre-trained Ridge regression model or placeholder stub."""
 
-    def __init__(self, model_path: str | None = None) -> None:
+    def __init__(self, model_path: str | None = None, mmap_mode: str | None = None) -> None:
         if model_path is None:
-            model_path = Path(__file__).with_name("ridge_ar_model.joblib")
+            model_path = DEFAULT_MODEL_PATH
+        self.model_path = Path(model_path)
         try:
-            self.model = joblib.load(model_path)
+            # Deferred: joblib (and preprocessing's pandas/scipy) cost more to
+            # import than most app requests take, and only a real model needs them
+            import joblib
+
+            # mmap_mode='r' maps large numpy arrays instead of copying them
+            with span("model.load"):
+                loaded = joblib.load(model_path, mmap_mode=mmap_mode)
+                self.version = _file_digest(self.model_path)
         except (FileNotFoundError, Exception):
             logging.warning(
                 f"Model file not found at '{model_path}'. Using placeholder model."
             )
-            self.model = None
+            loaded = None
+            self.version = "placeholder"
+        # Artifacts from preprocessing.export_artifact also carry the features
+        self.artifact = None
+        if loaded is not None:
+            from preprocessing import artifact_from_state, is_artifact
+
+            if is_artifact(loaded):
+                self.artifact = artifact_from_state(loaded)
+        self.model = self.artifact.model if self.artifact is not None else loaded
 
+    @traced("model.predict_future_points")
     def predict_future_points(self, features: np.ndarray) -> np.ndarray:
         """Predict future points for provided feature matrix.
 
@@ -31,6 +64,54 @@ class RidgeARModel:
         features = np.asarray(features)
         if features.ndim != 2:
             raise ValueError("features must be a 2D array")
+        count("model.rows_predicted", features.shape[0])
         if self.model is None:
             return np.zeros(features.shape[0], dtype=float)
         return self.model.predict(features)
+
+    def build_features(self, frame) -> np.ndarray:
+        """Selected feature matrix from raw columns (needs a model artifact)."""
+        if self.artifact is None:
+            raise ValueError("model file has no preprocessing artifact")
+        return self.artifact.transform(frame)
+
+    @traced("model.predict_frame")
+    def predict_frame(self, frame) -> np.ndarray:
+        """Predict from raw notebook columns (Team, Opposition, Pos, numerics)."""
+        if self.artifact is None:
+            if self.model is None:
+                return np.zeros(len(frame), dtype=float)
+            raise ValueError("model file has no preprocessing artifact")
+        return self.artifact.predict(frame)
+
+    def predict_horizon(self, features: np.ndarray) -> np.ndarray:
+        """Predict a players x horizon matrix with a single model call.
+
+        ``features`` has shape (players, horizon, n_features).
+        """
+        features = np.asarray(features)
+        if features.ndim != 3:
+            raise ValueError("features must be a 3D array (players, horizon, n_features)")
+        n_players, horizon, n_features = features.shape
+        flat = self.predict_future_points(features.reshape(n_players * horizon, n_features))
+        return np.asarray(flat, dtype=float).reshape(n_players, horizon)
+
+    @traced("model.predict_players")
+    def predict_players(
+        self,
+        player_ids: Sequence[int],
+        features: np.ndarray,
+        season: str,
+        gameweek: int,
+        cache=None,
+    ) -> np.ndarray:
+        """``predict_horizon`` through a PredictionCache, predicting only misses.
+
+        Entries are keyed by this model's ``version`` and a digest of
+        ``features``, so neither a new model file nor refreshed features
+        read predictions made before.
+        """
+        features = np.asarray(features)
+        return cached_predict(cache, season, gameweek, model_key(self.version, features),
+                              player_ids, features.shape[1],
+                              lambda rows: self.predict_horizon(features[rows]))
@@ -0,0 +1,266 @@
+"""Process-wide, micro-batching inference service for RidgeARModel."""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from model import DEFAULT_MODEL_PATH, RidgeARModel
+from prediction_cache import cached_predict, model_key
+
+# Upper edges (ms) of the batch latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 1000)
+# Longest a caller waits for its predictions before giving up
+REQUEST_TIMEOUT = float(os.environ.get("FPL_MODEL_TIMEOUT", 30))
+
+
+class ModelServerClosed(RuntimeError):
+    """The server was closed (or its worker died) before serving a request."""
+
+
+class ModelServer:
+    """Coalesce concurrent prediction requests into single ``predict`` calls.
+
+    Callers block in ``predict_future_points``/``predict_horizon`` while a
+    worker thread drains the queue: it waits up to ``max_wait_ms`` for more
+    requests (or until ``max_batch_rows`` rows are queued), stacks them into
+    one matrix, predicts once and hands each caller its slice. The methods
+    mirror ``RidgeARModel`` so a server can be passed wherever a model is
+    expected.
+
+    Once closed, or if its worker dies, queued and new requests fail with
+    ``ModelServerClosed``; a caller never waits longer than ``timeout``.
+    """
+
+    def __init__(
+        self,
+        model: RidgeARModel,
+        max_batch_rows: int = 65536,
+        max_wait_ms: float = 2.0,
+        timeout: float = REQUEST_TIMEOUT,
+    ) -> None:
+        self._model = model
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout = timeout
+        self._closed = False
+        self._submit_lock = threading.Lock()
+        self._queue: 'queue.Queue[Optional[Tuple[np.ndarray, Future]]]' = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'batches': 0,
+            'rows': 0,
+            'busy_seconds': 0.0,
+            'max_batch_rows': 0,
+            'latency_ms': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+        }
+        self._started = time.perf_counter()
+        self._worker = threading.Thread(target=self._run, name='model-server', daemon=True)
+        self._worker.start()
+
+    @property
+    def model(self):
+        """The underlying estimator (None for the placeholder)."""
+        return self._model.model
+
+    @property
+    def version(self) -> str:
+        """Version key of the served model file."""
+        return self._model.version
+
+    def predict_future_points(self, features: np.ndarray) -> np.ndarray:
+        """Queue a 2D feature matrix and wait for its predictions."""
+        features = np.asarray(features, dtype=float)
+        if features.ndim != 2:
+            raise ValueError("features must be a 2D array")
+        if features.shape[0] == 0:
+            return np.zeros(0, dtype=float)
+        future: Future = Future()
+        with self._submit_lock:
+            if self._closed:
+                raise ModelServerClosed("model server is closed")
+            self._queue.put((features, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def build_features(self, frame) -> np.ndarray:
+        """``RidgeARModel.build_features``, run in the caller's thread."""
+        return self._model.build_features(frame)
+
+    def predict_horizon(self, features: np.ndarray) -> np.ndarray:
+        """Batched equivalent of ``RidgeARModel.predict_horizon``."""
+        features = np.asarray(features)
+        if features.ndim != 3:
+            raise ValueError("features must be a 3D array (players, horizon, n_features)")
+        n_players, horizon, n_features = features.shape
+        flat = self.predict_future_points(features.reshape(n_players * horizon, n_features))
+        return flat.reshape(n_players, horizon)
+
+    def predict_players(
+        self,
+        player_ids: Sequence[int],
+        features: np.ndarray,
+        season: str,
+        gameweek: int,
+        cache=None,
+    ) -> np.ndarray:
+        """Batched equivalent of ``RidgeARModel.predict_players``."""
+        features = np.asarray(features)
+        return cached_predict(cache, season, gameweek, model_key(self.version, features),
+                              player_ids, features.shape[1],
+                              lambda rows: self.predict_horizon(features[rows]))
+
+    def stats(self) -> Dict:
+        """Snapshot of request/batch counters, throughput and latency histogram."""
+        with self._stats_lock:
+            snap = dict(self._stats)
+            snap['latency_ms'] = dict(zip(
+                [f'<={b}' for b in LATENCY_BUCKETS_MS] + ['>1000'],
+                self._stats['latency_ms']))
+        elapsed = time.perf_counter() - self._started
+        snap['rows_per_second'] = snap['rows'] / elapsed if elapsed > 0 else 0.0
+        snap['mean_batch_rows'] = snap['rows'] / snap['batches'] if snap['batches'] else 0.0
+        snap['queued'] = self._queue.qsize()
+        return snap
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        """Stop the worker; queued and later requests fail with ModelServerClosed.
+
+        A batch the worker is already predicting still completes.
+        """
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._fail_pending()
+        self._queue.put(None)
+
+    def _fail_pending(self) -> None:
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                _settle(item[1], error=ModelServerClosed("model server is closed"))
+
+    def _run(self) -> None:
+        try:
+            self._serve()
+        except BaseException as e:
+            logging.error(f"Model server worker died: {e!r}")
+        finally:
+            with self._submit_lock:
+                self._closed = True
+            self._fail_pending()
+
+    def _serve(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            rows = batch[0][0].shape[0]
+            deadline = time.perf_counter() + self.max_wait
+            while rows < self.max_batch_rows:
+                timeout = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 \
+                        else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._predict_batch(batch)
+                    return
+                batch.append(item)
+                rows += item[0].shape[0]
+            self._predict_batch(batch)
+
+    def _predict_batch(self, batch: List[Tuple[np.ndarray, Future]]) -> None:
+        # Requests with a different feature width cannot share a matrix
+        groups: Dict[int, List[Tuple[np.ndarray, Future]]] = {}
+        for features, future in batch:
+            groups.setdefault(features.shape[1], []).append((features, future))
+
+        for items in groups.values():
+            start = time.perf_counter()
+            try:
+                stacked = np.concatenate([f for f, _ in items]) if len(items) > 1 else items[0][0]
+                preds = np.asarray(self._model.predict_future_points(stacked), dtype=float)
+            except Exception as e:
+                logging.error(f"Batched prediction failed: {e}")
+                for _, future in items:
+                    _settle(future, error=e)
+                continue
+            elapsed = time.perf_counter() - start
+
+            offset = 0
+            for features, future in items:
+                n = features.shape[0]
+                _settle(future, preds[offset:offset + n])
+                offset += n
+            self._record(len(items), stacked.shape[0], elapsed)
+
+    def _record(self, requests: int, rows: int, elapsed: float) -> None:
+        ms = elapsed * 1000.0
+        bucket = next((i for i, b in enumerate(LATENCY_BUCKETS_MS) if ms <= b),
+                      len(LATENCY_BUCKETS_MS))
+        with self._stats_lock:
+            self._stats['requests'] += requests
+            self._stats['batches'] += 1
+            self._stats['rows'] += rows
+            self._stats['busy_seconds'] += elapsed
+            self._stats['max_batch_rows'] = max(self._stats['max_batch_rows'], rows)
+            self._stats['latency_ms'][bucket] += 1
+
+
+def _settle(future: Future, result=None, error: Optional[BaseException] = None) -> None:
+    """Resolve ``future`` unless its caller already gave up (timed out)."""
+    if not future.set_running_or_notify_cancel():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+_SERVERS: Dict[Tuple[str, Optional[str]], Tuple[float, ModelServer]] = {}
+_LOCK = threading.Lock()
+
+
+def get_model_server(
+    model_path: str | None = None,
+    mmap_mode: str | None = None,
+    **server_kwargs,
+) -> ModelServer:
+    """Shared ModelServer for ``model_path``, loading the model once per process.
+
+    The model is reloaded when the file on disk changes.
+    """
+    path = os.path.abspath(model_path or DEFAULT_MODEL_PATH)
+    key = (path, mmap_mode)
+    mtime = os.path.getmtime(path) if os.path.exists(path) else 0.0
+    with _LOCK:
+        cached = _SERVERS.get(key)
+        if cached is None or cached[0] != mtime or cached[1].closed:
+            if cached is not None:
+                cached[1].close()
+            server = ModelServer(RidgeARModel(path, mmap_mode=mmap_mode), **server_kwargs)
+            cached = (mtime, server)
+            _SERVERS[key] = cached
+        return cached[1]
@@ -0,0 +1,176 @@
+"""Process-wide columnar player table backed by a memory-mapped cache file."""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import logging
+import os
+import threading
+from functools import cached_property
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+DEFAULT_CSV = os.path.join(os.path.dirname(__file__), '..', 'data', 'players_id_2024_2025.csv')
+
+# CSV column -> table column
+CSV_COLUMNS = {
+    'id': 'id',
+    'fpl_Player': 'name',
+    'Position': 'position',
+    'Team': 'team',
+    'Price': 'price',
+}
+
+
+class PlayerTable:
+    """Player master list stored as NumPy columns with an id -> row index.
+
+    Columns: ``ids``, ``names``, ``positions``, ``teams``, ``prices``. Arrays
+    may be read-only views of a memory-mapped file, so treat them as immutable.
+    """
+
+    def __init__(self, records: np.ndarray) -> None:
+        self.records = records
+        self.ids = records['id']
+        self.names = records['name']
+        self.positions = records['position']
+        self.teams = records['team']
+        self.prices = records['price']
+        size = int(self.ids.max()) + 1 if len(self.ids) else 0
+        self._row_of = np.full(size, -1, dtype=np.int32)
+        self._row_of[self.ids] = np.arange(len(self.ids), dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def rows(self, player_ids: Iterable[int]) -> np.ndarray:
+        """Row index for each id, or -1 if the id is unknown."""
+        ids = np.asarray(list(player_ids) if not isinstance(player_ids, np.ndarray)
+                         else player_ids, dtype=np.int64)
+        out = np.full(ids.shape, -1, dtype=np.int32)
+        ok = (ids >= 0) & (ids < len(self._row_of))
+        out[ok] = self._row_of[ids[ok]]
+        return out
+
+    def mask(self, player_ids: Iterable[int]) -> np.ndarray:
+        """Boolean mask over rows that is True for the given ids."""
+        rows = self.rows(player_ids)
+        mask = np.zeros(len(self), dtype=bool)
+        mask[rows[rows >= 0]] = True
+        return mask
+
+    def __contains__(self, player_id: int) -> bool:
+        return 0 <= player_id < len(self._row_of) and self._row_of[player_id] >= 0
+
+    def get(self, player_id: int) -> Dict:
+        """Return one player as a dict, or an empty dict if unknown."""
+        if player_id not in self:
+            return {}
+        r = self._row_of[player_id]
+        return {
+            'id': int(self.ids[r]),
+            'name': str(self.names[r]),
+            'position': str(self.positions[r]),
+            'team': str(self.teams[r]),
+            'price': float(self.prices[r]),
+        }
+
+    @cached_property
+    def name_map(self) -> Dict[int, str]:
+        """id -> name dict, built once per table."""
+        return dict(zip(self.ids.tolist(), self.names.tolist()))
+
+    @cached_property
+    def pos_map(self) -> Dict[int, str]:
+        """id -> position dict, built once per table."""
+        return dict(zip(self.ids.tolist(), self.positions.tolist()))
+
+    @cached_property
+    def digest(self) -> str:
+        """Content hash of the table, for artifacts built from it."""
+        h = hashlib.blake2b(digest_size=12)
+        h.update(np.ascontiguousarray(self.records).tobytes())
+        return h.hexdigest()
+
+
+def _fingerprint(csv_path: str) -> str:
+    st = os.stat(csv_path)
+    return f"{st.st_size:x}-{st.st_mtime_ns:x}"
+
+
+def _cache_path(csv_path: str, fingerprint: str) -> str:
+    head, tail = os.path.split(csv_path)
+    stem = os.path.splitext(tail)[0]
+    return os.path.join(head, f".{stem}.{fingerprint}.npy")
+
+
+def _records_from_csv(csv_path: str) -> np.ndarray:
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, usecols=list(CSV_COLUMNS)).rename(columns=CSV_COLUMNS)
+    df = df.drop_duplicates('id', keep='first')
+
+    def width(col: str) -> int:
+        return max(1, int(df[col].astype(str).str.len().max() or 1))
+
+    dtype = np.dtype([
+        ('id', '<i4'),
+        ('name', f'<U{width("name")}'),
+        ('position', f'<U{width("position")}'),
+        ('team', f'<U{width("team")}'),
+        ('price', '<f8'),
+    ])
+    records = np.empty(len(df), dtype=dtype)
+    records['id'] = df['id'].to_numpy()
+    for col in ('name', 'position', 'team'):
+        records[col] = df[col].fillna('').astype(str).to_numpy()
+    records['price'] = df['price'].to_numpy(dtype=float)
+    return records
+
+
+def load_player_table(csv_path: str = DEFAULT_CSV) -> PlayerTable:
+    """Load the table from its binary cache, rebuilding it if the CSV changed."""
+    csv_path = os.path.abspath(csv_path)
+    fingerprint = _fingerprint(csv_path)
+    cache = _cache_path(csv_path, fingerprint)
+
+    if os.path.exists(cache):
+        try:
+            return PlayerTable(np.load(cache, mmap_mode='r'))
+        except Exception as e:
+            logging.warning(f"Rebuilding unreadable player cache '{cache}': {e}")
+
+    records = _records_from_csv(csv_path)
+    try:
+        # Drop caches of older CSV versions, then write atomically
+        for stale in glob.glob(_cache_path(csv_path, '*')):
+            os.remove(stale)
+        tmp = cache + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.save(f, records)
+        os.replace(tmp, cache)
+        records = np.load(cache, mmap_mode='r')
+    except OSError as e:
+        logging.warning(f"Could not write player cache '{cache}': {e}")
+    return PlayerTable(records)
+
+
+_TABLES: Dict[str, Tuple[str, PlayerTable]] = {}
+_LOCK = threading.Lock()
+
+
+def get_player_table(csv_path: str = DEFAULT_CSV) -> PlayerTable:
+    """Process-wide PlayerTable for ``csv_path``; reloaded only when the CSV changes."""
+    key = os.path.abspath(csv_path)
+    fingerprint = _fingerprint(key)
+    cached = _TABLES.get(key)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+    with _LOCK:
+        cached = _TABLES.get(key)
+        if cached is None or cached[0] != fingerprint:
+            cached = (fingerprint, load_player_table(key))
+            _TABLES[key] = cached
+        return cached[1]
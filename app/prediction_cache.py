@@ -0,0 +1,219 @@
+"""Two-tier cache of per-player predictions keyed by season, gameweek and model."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from tracing import count
+
+# Next to the other generated data, outside the source tree (and the image)
+DEFAULT_DB_PATH = os.environ.get(
+    "FPL_PREDICTION_CACHE",
+    str(Path(__file__).resolve().parent.parent / "data" / "prediction_cache.sqlite"),
+)
+
+BlockKey = Tuple[str, int, str]
+
+
+class PredictionCache:
+    """In-memory LRU over a SQLite table of predictions.
+
+    Each entry is one player's prediction vector for the gameweeks after
+    ``gameweek``, keyed by (season, gameweek, model key, player_id). The
+    memory tier holds whole (season, gameweek, model) blocks so a page
+    render is a dict lookup; misses fall through to SQLite, which survives
+    restarts. Entries are only dropped by ``invalidate``.
+    """
+
+    def __init__(self, db_path: str | None = DEFAULT_DB_PATH, max_blocks: int = 32) -> None:
+        self.db_path = db_path
+        self.max_blocks = max_blocks
+        self._lock = threading.Lock()
+        self._blocks: 'OrderedDict[BlockKey, Dict[int, np.ndarray]]' = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                " season TEXT, gameweek INTEGER, model TEXT, player_id INTEGER,"
+                " preds BLOB, created REAL,"
+                " PRIMARY KEY (season, gameweek, model, player_id))"
+            )
+            self._conn.commit()
+
+    def get_many(
+        self,
+        season: str,
+        gameweek: int,
+        model_key: str,
+        player_ids: Iterable[int],
+        horizon: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (predictions, hit_mask) for ``player_ids``.
+
+        Rows without a cached vector of at least ``horizon`` values are NaN
+        and False in the mask.
+        """
+        ids = np.asarray(list(player_ids) if not isinstance(player_ids, np.ndarray)
+                         else player_ids, dtype=np.int64)
+        out = np.full((ids.size, horizon), np.nan)
+        hit = np.zeros(ids.size, dtype=bool)
+        block = self._block((season, gameweek, model_key))
+        for i, pid in enumerate(ids.tolist()):
+            vec = block.get(pid)
+            if vec is not None and vec.size >= horizon:
+                out[i] = vec[:horizon]
+                hit[i] = True
+        return out, hit
+
+    def put_many(
+        self,
+        season: str,
+        gameweek: int,
+        model_key: str,
+        player_ids: Iterable[int],
+        predictions: np.ndarray,
+    ) -> None:
+        """Store one prediction vector per player."""
+        ids = [int(p) for p in player_ids]
+        preds = np.asarray(predictions, dtype=np.float64)
+        if preds.ndim == 1:
+            preds = preds[:, None]
+        key = (season, gameweek, model_key)
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is None:
+                block = self._load_block(key)
+                self._remember(key, block)
+            for pid, vec in zip(ids, preds):
+                block[pid] = vec.copy()
+            if self._conn is not None:
+                now = time.time()
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?, ?)",
+                    [(season, gameweek, model_key, pid, vec.tobytes(), now)
+                     for pid, vec in zip(ids, preds)],
+                )
+                self._conn.commit()
+
+    def invalidate(
+        self,
+        season: Optional[str] = None,
+        gameweek: Optional[int] = None,
+        model_key: Optional[str] = None,
+    ) -> None:
+        """Drop entries matching every given field (all entries if none given).
+
+        Call this when fixtures or other input data change; a new model file
+        gets a new model key, so old-model entries simply stop being read
+        (use ``keep_only_model`` to reclaim their space).
+        """
+        fields = {'season': season, 'gameweek': gameweek, 'model': model_key}
+        with self._lock:
+            for key in list(self._blocks):
+                if all(v is None or key[i] == v for i, v in enumerate(fields.values())):
+                    del self._blocks[key]
+            if self._conn is not None:
+                where = [f"{k} = ?" for k, v in fields.items() if v is not None]
+                sql = "DELETE FROM predictions" + (" WHERE " + " AND ".join(where) if where else "")
+                self._conn.execute(sql, [v for v in fields.values() if v is not None])
+                self._conn.commit()
+
+    def keep_only_model(self, model_key: str) -> None:
+        """Delete entries produced by any other model."""
+        with self._lock:
+            for key in [k for k in self._blocks if k[2] != model_key]:
+                del self._blocks[key]
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM predictions WHERE model != ?", (model_key,))
+                self._conn.commit()
+
+    def _block(self, key: BlockKey) -> Dict[int, np.ndarray]:
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                return block
+            block = self._load_block(key)
+            self._remember(key, block)
+            return block
+
+    def _load_block(self, key: BlockKey) -> Dict[int, np.ndarray]:
+        if self._conn is None:
+            return {}
+        rows = self._conn.execute(
+            "SELECT player_id, preds FROM predictions"
+            " WHERE season = ? AND gameweek = ? AND model = ?", key
+        ).fetchall()
+        return {pid: np.frombuffer(blob, dtype=np.float64) for pid, blob in rows}
+
+    def _remember(self, key: BlockKey, block: Dict[int, np.ndarray]) -> None:
+        self._blocks[key] = block
+        self._blocks.move_to_end(key)
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+
+
+def model_key(version: str, features: np.ndarray) -> str:
+    """Cache key for predictions of model ``version`` from ``features``.
+
+    The feature values are part of the key, so predictions made before a
+    data refresh within the same gameweek are never served afterwards.
+    """
+    features = np.ascontiguousarray(features, dtype=np.float64)
+    h = hashlib.blake2b(str(features.shape).encode(), digest_size=8)
+    h.update(features.tobytes())
+    return f"{version}-{h.hexdigest()}"
+
+
+def cached_predict(
+    cache: Optional[PredictionCache],
+    season: str,
+    gameweek: int,
+    model_key: str,
+    player_ids: Iterable[int],
+    horizon: int,
+    compute: Callable[[np.ndarray], np.ndarray],
+) -> np.ndarray:
+    """Look up predictions and ``compute(missing_rows)`` only for the misses.
+
+    ``compute`` gets the row positions (into ``player_ids``) still missing
+    and returns their (rows, >= horizon) predictions, which are stored.
+    """
+    ids = np.asarray(list(player_ids) if not isinstance(player_ids, np.ndarray)
+                     else player_ids, dtype=np.int64)
+    if cache is None:
+        return np.asarray(compute(np.arange(ids.size)))[:, :horizon]
+    preds, hit = cache.get_many(season, gameweek, model_key, ids, horizon)
+    count("prediction_cache.lookups", ids.size)
+    if not hit.all():
+        missing = np.flatnonzero(~hit)
+        count("prediction_cache.misses", missing.size)
+        fresh = np.asarray(compute(missing), dtype=float)
+        cache.put_many(season, gameweek, model_key, ids[missing], fresh)
+        preds[missing] = fresh[:, :horizon]
+    return preds
+
+
+_CACHE: Optional[PredictionCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_prediction_cache() -> PredictionCache:
+    """Process-wide PredictionCache at DEFAULT_DB_PATH."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = PredictionCache()
+        return _CACHE
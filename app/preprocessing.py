@@ -0,0 +1,233 @@
+"""Versioned preprocessing + model artifacts with a fast inference path."""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import os
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Feature lists from the modelling notebook ('against: ' columns are appended)
+NUMERIC_FEATS = ['Min', 'GlsPrev', 'AstPrev', 'CSPrev', 'PrevPoints', 'Price',
+                 'Ownership, %', 'Selected']
+CAT_FEATS = ['Team', 'Opposition']
+POS_FEAT = ['Pos']
+ARTIFACT_FORMAT = 1
+UNKNOWN = '__unknown__'
+
+Frame = Union[pd.DataFrame, Mapping[str, Sequence]]
+
+
+def to_csr(X):
+    return sparse.csr_matrix(X)
+
+
+def numeric_features(columns: Sequence[str]) -> List[str]:
+    """NUMERIC_FEATS plus every opposition-performance column present."""
+    return NUMERIC_FEATS + [c for c in columns if c.startswith('against: ')]
+
+
+def build_pipeline(numeric_feats: Sequence[str] = NUMERIC_FEATS, max_features: int = 15):
+    """The notebook's Lasso_Small2 pipeline (TargetEncoder, one-hot Pos, selection)."""
+    from category_encoders import TargetEncoder
+    from sklearn.compose import ColumnTransformer
+    from sklearn.feature_selection import SelectFromModel
+    from sklearn.linear_model import Lasso, LinearRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
+
+    preproc = ColumnTransformer([
+        ('te', TargetEncoder(cols=CAT_FEATS), CAT_FEATS),
+        ('pos', OneHotEncoder(drop='first', sparse_output=True, handle_unknown='ignore'),
+         POS_FEAT),
+        ('num', 'passthrough', list(numeric_feats)),
+    ], remainder='drop')
+    return Pipeline([
+        ('preproc', preproc),
+        ('to_sparse', FunctionTransformer(func=to_csr, accept_sparse=True)),
+        ('select', SelectFromModel(
+            Lasso(alpha=0.01, tol=1e-3, max_iter=500, random_state=42),
+            max_features=max_features, threshold=-np.inf)),
+        ('model', LinearRegression()),
+    ])
+
+
+class FastPreprocessor:
+    """Selected feature columns computed straight from raw columns.
+
+    Every output column is one of: a lookup of a categorical column
+    (target encoding; the last value is used for unseen categories), a
+    one-hot indicator of a category, or a numeric passthrough. Only the
+    columns kept by the selector are built, so no intermediate sparse
+    matrix or DataFrame is created.
+    """
+
+    def __init__(
+        self,
+        outputs: List[Tuple[str, str, Optional[str]]],
+        categories: Dict[str, np.ndarray],
+        lookups: Dict[str, np.ndarray],
+    ) -> None:
+        self.outputs = list(outputs)
+        self.categories = categories
+        self.lookups = lookups
+        self._index = {col: pd.Index(cats) for col, cats in categories.items()}
+
+    @property
+    def input_columns(self) -> List[str]:
+        return list(dict.fromkeys(src for _, src, _ in self.outputs))
+
+    @property
+    def feature_names(self) -> List[str]:
+        return [f'{src}_{cat}' if kind == 'onehot' else src for kind, src, cat in self.outputs]
+
+    def transform(self, frame: Frame) -> np.ndarray:
+        """(rows, selected features) float matrix for ``frame``'s raw columns."""
+        columns = {c: np.asarray(frame[c]) for c in self.input_columns}
+        n = len(next(iter(columns.values()))) if columns else 0
+        out = np.empty((n, len(self.outputs)))
+        codes: Dict[str, np.ndarray] = {}
+        for j, (kind, src, cat) in enumerate(self.outputs):
+            if kind == 'num':
+                out[:, j] = columns[src]
+            elif kind == 'lookup':
+                if src not in codes:
+                    codes[src] = self._index[src].get_indexer(columns[src].astype(str))
+                # get_indexer gives -1 for unseen values, i.e. the trailing default
+                out[:, j] = self.lookups[src][codes[src]]
+            else:
+                out[:, j] = columns[src].astype(str) == cat
+        return out
+
+    def state(self) -> Dict:
+        return {'outputs': self.outputs, 'categories': self.categories, 'lookups': self.lookups}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'FastPreprocessor':
+        return cls([tuple(o) for o in state['outputs']], state['categories'], state['lookups'])
+
+
+def compile_pipeline(pipeline, X_sample: pd.DataFrame) -> FastPreprocessor:
+    """Build a FastPreprocessor equivalent to a fitted pipeline's feature steps.
+
+    Target-encoder lookups are probed with the categories seen in
+    ``X_sample`` plus an unseen sentinel; the result is checked against the
+    full transformer stack on ``X_sample``.
+    """
+    preproc = pipeline.steps[0][1]
+    columns: List[Tuple[str, str, Optional[str]]] = []
+    categories: Dict[str, np.ndarray] = {}
+    lookups: Dict[str, np.ndarray] = {}
+    for name, trans, cols in preproc.transformers_:
+        if trans == 'drop' or name == 'remainder':
+            continue
+        cols = list(cols)
+        if trans == 'passthrough':
+            columns += [('num', c, None) for c in cols]
+        elif hasattr(trans, 'categories_'):
+            for c, cats, drop in zip(cols, trans.categories_, _drop_indices(trans)):
+                columns += [('onehot', c, str(cat)) for i, cat in enumerate(cats) if i != drop]
+        else:
+            probe_cats = {c: np.array(sorted(X_sample[c].astype(str).unique())) for c in cols}
+            m = max(len(v) for v in probe_cats.values()) + 1
+            probe = pd.DataFrame({c: list(v) + [v[0]] * (m - 1 - len(v)) + [UNKNOWN]
+                                  for c, v in probe_cats.items()})
+            encoded = np.asarray(trans.transform(probe), dtype=float)
+            if encoded.shape[1] != len(cols):
+                raise ValueError(f"transformer {name!r} must output one column per input")
+            for i, c in enumerate(cols):
+                k = len(probe_cats[c])
+                categories[c] = probe_cats[c]
+                lookups[c] = np.append(encoded[:k, i], encoded[-1, i])
+                columns.append(('lookup', c, None))
+
+    mask = np.ones(len(columns), dtype=bool)
+    for _, step in pipeline.steps[1:]:
+        if hasattr(step, 'get_support'):
+            mask = step.get_support()
+    fast = FastPreprocessor([c for c, keep in zip(columns, mask) if keep], categories, lookups)
+
+    expected = _feature_steps(pipeline).transform(X_sample)
+    expected = expected.toarray() if sparse.issparse(expected) else np.asarray(expected)
+    if not np.allclose(fast.transform(X_sample), expected, equal_nan=True):
+        raise ValueError("compiled preprocessing does not match the fitted pipeline")
+    return fast
+
+
+class ModelArtifact:
+    """Fitted pipeline, its compiled fast path and the final estimator."""
+
+    def __init__(self, pipeline, fast: FastPreprocessor, metadata: Dict) -> None:
+        self.pipeline = pipeline
+        self.fast = fast
+        self.metadata = metadata
+        self.model = pipeline.steps[-1][1]
+        self.version = metadata.get('version', 'unversioned')
+        # Linear models predict with one matvec instead of an sklearn call
+        coef = getattr(self.model, 'coef_', None)
+        self._coef = np.ravel(coef) if coef is not None else None
+        self._intercept = float(np.ravel(getattr(self.model, 'intercept_', 0.0))[0])
+
+    def transform(self, frame: Frame) -> np.ndarray:
+        return self.fast.transform(frame)
+
+    def predict(self, frame: Frame) -> np.ndarray:
+        X = self.fast.transform(frame)
+        if self._coef is not None and self._coef.size == X.shape[1]:
+            return X @ self._coef + self._intercept
+        return np.asarray(self.model.predict(X), dtype=float)
+
+
+def export_artifact(pipeline, X_sample: pd.DataFrame, path: str, name: str = 'model') -> str:
+    """Compile and write ``pipeline`` as one joblib artifact; returns its version."""
+    fast = compile_pipeline(pipeline, X_sample)
+    import sklearn
+    metadata = {
+        'name': name,
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'sklearn': sklearn.__version__,
+        'input_columns': fast.input_columns,
+        'feature_names': fast.feature_names,
+    }
+    state = {'format': ARTIFACT_FORMAT, 'pipeline': pipeline, 'fast': fast.state(),
+             'metadata': metadata}
+    metadata['version'] = hashlib.blake2b(
+        joblib.hash(state).encode(), digest_size=8).hexdigest()
+    tmp = f'{path}.tmp'
+    joblib.dump(state, tmp)
+    os.replace(tmp, path)
+    return metadata['version']
+
+
+def is_artifact(obj) -> bool:
+    return isinstance(obj, dict) and obj.get('format') == ARTIFACT_FORMAT
+
+
+def artifact_from_state(state: Dict) -> ModelArtifact:
+    return ModelArtifact(state['pipeline'], FastPreprocessor.from_state(state['fast']),
+                         state['metadata'])
+
+
+def load_artifact(path: str) -> ModelArtifact:
+    state = joblib.load(path)
+    if not is_artifact(state):
+        raise ValueError(f"{path} is not a model artifact (format {ARTIFACT_FORMAT})")
+    return artifact_from_state(state)
+
+
+def _drop_indices(encoder) -> List[Optional[int]]:
+    drop = getattr(encoder, 'drop_idx_', None)
+    if drop is None:
+        return [None] * len(encoder.categories_)
+    return [None if d is None else int(d) for d in drop]
+
+
+def _feature_steps(pipeline):
+    """Every pipeline step except the final estimator."""
+    from sklearn.pipeline import Pipeline
+    return Pipeline(pipeline.steps[:-1])
@@ -0,0 +1,379 @@
+"""Per-gameweek recommendations precomputed into a compact indexed artifact.
+
+The batch job (``python app/recommendations.py``) runs after each data
+refresh. It predicts the whole pool once and stores these, aligned with
+the player table rows:
+
+* predictions per gameweek, and their totals;
+* per position and price band, the top candidates by total, so the best
+  affordable replacement for a squad player is a short list walk;
+* every player ordered by next-gameweek points, with simulated
+  90th-percentile and haul probabilities for the captain ranking.
+
+At request time ``Recommendations`` answers per-squad questions (squad
+predictions, best single transfers, captain order) from those arrays.
+The work scales with the squad and the candidate lists, not with the
+size of the player pool.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from horizon import select_xi
+from transfers import MAX_PER_CLUB
+
+DEFAULT_DIR = os.environ.get(
+    "FPL_RECOMMENDATIONS_DIR",
+    str(Path(__file__).resolve().parent.parent / "data" / "recommendations"),
+)
+# Candidates kept per (position, price band); lists that run out fall back
+# to a scan of the position
+TOP_K = 48
+CAPTAIN_SAMPLES = 2_000
+HAUL_POINTS = 10.0
+
+
+def artifact_path(season: str, gameweek: int, model_key: str, out_dir: str = DEFAULT_DIR) -> str:
+    safe = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in model_key)
+    return os.path.join(out_dir, f"{season}_gw{gameweek}_{safe}.npz")
+
+
+def _tenths(prices: np.ndarray) -> np.ndarray:
+    return np.round(np.asarray(prices, dtype=float) * 10).astype(np.int64)
+
+
+def build_candidates(
+    position_codes: np.ndarray,
+    prices: np.ndarray,
+    totals: np.ndarray,
+    k: int = TOP_K,
+) -> Tuple[np.ndarray, int]:
+    """(positions, bands, k) rows of the top-``k`` players by ``totals``.
+
+    Band ``b`` holds players priced at most ``lo + b`` tenths of £m, where
+    ``lo`` (returned) is the cheapest price. FPL prices move in £0.1m
+    steps, so bands are exact budgets. Slots past the end are -1.
+    """
+    tenths = _tenths(prices)
+    lo, hi = int(tenths.min()), int(tenths.max())
+    n_bands = hi - lo + 1
+    n_positions = int(position_codes.max()) + 1 if len(position_codes) else 0
+    out = np.full((n_positions, n_bands, k), -1, dtype=np.int32)
+    for p in range(n_positions):
+        rows = np.flatnonzero((position_codes == p) & ~np.isnan(totals))
+        if not rows.size:
+            continue
+        # Stable order: points desc, then row asc
+        rows = rows[np.lexsort((rows, -totals[rows]))]
+        by_band = tenths[rows] - lo
+        best = np.zeros(0, dtype=np.int64)
+        for b in range(n_bands):
+            new = rows[by_band == b]
+            if new.size:
+                merged = np.concatenate([best, new])
+                merged = merged[np.lexsort((merged, -totals[merged]))][:k]
+                best = merged
+            out[p, b, :best.size] = best
+    return out, lo
+
+
+class Recommendations:
+    """A loaded artifact; see the module docstring."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict) -> None:
+        self.meta = meta
+        self.ids = arrays['ids']
+        self.preds = arrays['preds']
+        self.totals = arrays['totals']
+        self.position_names = arrays['position_names']
+        self.position_codes = arrays['position_codes']
+        self.club_codes = arrays['club_codes']
+        self.price_tenths = arrays['price_tenths']
+        self.candidates = arrays['candidates']
+        self.band_lo = int(meta['band_lo'])
+        self.by_position = arrays['by_position']
+        self.position_start = arrays['position_start']
+        self.captain_order = arrays['captain_order']
+        self.p90 = arrays['p90']
+        self.p_haul = arrays['p_haul']
+        size = int(self.ids.max()) + 1 if len(self.ids) else 0
+        self._row_of = np.full(size, -1, dtype=np.int32)
+        self._row_of[self.ids] = np.arange(len(self.ids), dtype=np.int32)
+
+    @classmethod
+    def load(cls, path: str) -> 'Recommendations':
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {k: data[k] for k in data.files if k != 'meta'}
+            meta = json.loads(str(data['meta']))
+        return cls(arrays, meta)
+
+    def rows(self, player_ids: Iterable[int]) -> np.ndarray:
+        """Row per id, -1 when unknown."""
+        ids = np.asarray(list(player_ids), dtype=np.int64)
+        out = np.full(ids.shape, -1, dtype=np.int32)
+        ok = (ids >= 0) & (ids < len(self._row_of))
+        out[ok] = self._row_of[ids[ok]]
+        return out
+
+    def best_transfers(
+        self,
+        squad_ids: Iterable[int],
+        bank: float,
+        top_n: int = 5,
+        max_per_club: int = MAX_PER_CLUB,
+    ) -> List[Tuple[int, int, float]]:
+        """Top single transfers as (out_row, in_row, gain), best first.
+
+        Same rules as ``TransferPlanner.plan(max_transfers=1)``: the in
+        player has the out player's position, is affordable with ``bank``
+        plus the sale price and keeps every club within ``max_per_club``.
+        """
+        squad = self.rows(squad_ids)
+        squad = squad[squad >= 0]
+        in_squad = set(squad.tolist())
+        counts: Dict[int, int] = {}
+        for r in squad.tolist():
+            c = int(self.club_codes[r])
+            counts[c] = counts.get(c, 0) + 1
+        bank_tenths = int(np.floor(bank * 10 + 1e-6))
+        n_bands = self.candidates.shape[1]
+
+        options: List[Tuple[float, int, int]] = []
+        for o in squad.tolist():
+            pos, club_out = int(self.position_codes[o]), int(self.club_codes[o])
+            band = bank_tenths + int(self.price_tenths[o]) - self.band_lo
+            if band < 0:
+                continue
+            band = min(band, n_bands - 1)
+            budget = self.band_lo + band
+
+            def fits(r: int) -> bool:
+                if r in in_squad:
+                    return False
+                c = int(self.club_codes[r])
+                return counts.get(c, 0) - (c == club_out) < max_per_club
+
+            found = 0
+            listed = self.candidates[pos, band]
+            for r in listed[listed >= 0].tolist():
+                if fits(r):
+                    options.append((float(self.totals[r] - self.totals[o]), o, r))
+                    found += 1
+                    if found == top_n:
+                        break
+            if found < top_n and listed[-1] >= 0:
+                # Candidate list exhausted: walk the whole position
+                found = 0
+                start, stop = self.position_start[pos], self.position_start[pos + 1]
+                for r in self.by_position[start:stop].tolist():
+                    if self.price_tenths[r] <= budget and fits(r):
+                        options.append((float(self.totals[r] - self.totals[o]), o, r))
+                        found += 1
+                        if found == top_n:
+                            break
+        best = sorted(set(options), key=lambda t: (-t[0], t[1], t[2]))[:top_n]
+        return [(o, r, gain) for gain, o, r in best]
+
+    def captains(self, squad_ids: Iterable[int]) -> List[Dict]:
+        """The squad's likely XI ranked as captain picks for the next gameweek."""
+        squad = self.rows(squad_ids)
+        squad = squad[squad >= 0]
+        if not squad.size:
+            return []
+        nxt = self.preds[squad, 0].astype(float)
+        positions = self.position_names[self.position_codes[squad]]
+        xi = squad[select_xi(nxt, positions)]
+        xi = xi[np.lexsort((xi, -self.preds[xi, 0]))]
+        return [{
+            'id': int(self.ids[r]),
+            'expected': round(float(self.preds[r, 0]), 2),
+            'p90': round(float(self.p90[r]), 2),
+            'p_haul': round(float(self.p_haul[r]), 4),
+        } for r in xi]
+
+    def top_captains(self, k: int = 10) -> List[int]:
+        """Ids of the ``k`` best next-gameweek picks in the whole pool."""
+        return self.ids[self.captain_order[:k]].tolist()
+
+
+def materialize(
+    table,
+    preds: np.ndarray,
+    season: str,
+    gameweek: int,
+    model_key: str,
+    out_dir: str = DEFAULT_DIR,
+    n_samples: int = CAPTAIN_SAMPLES,
+    seed: Optional[int] = 0,
+    top_k: int = TOP_K,
+) -> str:
+    """Write the artifact for ``preds`` (rows of ``table``); returns its path."""
+    from simulation import PointsSimulator
+
+    preds = np.asarray(preds, dtype=float)
+    totals = np.round(preds.sum(axis=1), 2)
+    position_names, position_codes = np.unique(np.asarray(table.positions), return_inverse=True)
+    candidates, band_lo = build_candidates(position_codes, table.prices, totals, top_k)
+    order = np.lexsort((np.arange(len(table)), -np.nan_to_num(totals, nan=-np.inf),
+                        position_codes))
+    position_start = np.searchsorted(position_codes[order], np.arange(len(position_names) + 1))
+    _, club_codes = np.unique(np.asarray(table.teams), return_inverse=True)
+
+    sim = PointsSimulator.from_table(table, preds[:, :1])
+    pool = sim.simulate_pool(gameweeks=[0], n_samples=n_samples, seed=seed, haul=HAUL_POINTS)
+
+    meta = {
+        'season': season,
+        'gameweek': gameweek,
+        'model_key': model_key,
+        'table_digest': table.digest,
+        'horizon': preds.shape[1],
+        'band_lo': band_lo,
+        'top_k': top_k,
+        'created_at': time.time(),
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    path = artifact_path(season, gameweek, model_key, out_dir)
+    tmp = f"{path}.tmp.npz"
+    np.savez_compressed(
+        tmp,
+        meta=np.array(json.dumps(meta)),
+        ids=np.asarray(table.ids, dtype=np.int32),
+        preds=preds.astype(np.float32),
+        totals=totals.astype(np.float32),
+        position_names=position_names,
+        position_codes=position_codes.astype(np.int8),
+        club_codes=club_codes.astype(np.int16),
+        price_tenths=_tenths(table.prices).astype(np.int16),
+        candidates=candidates,
+        by_position=order.astype(np.int32),
+        position_start=position_start.astype(np.int32),
+        captain_order=np.argsort(-np.nan_to_num(preds[:, 0], nan=-np.inf),
+                                 kind='stable').astype(np.int32),
+        p90=pool['p90'].astype(np.float32),
+        p_haul=pool['p_haul'].astype(np.float32),
+    )
+    os.replace(tmp, path)
+    return path
+
+
+_LOADED: Dict[str, Tuple[float, Recommendations]] = {}
+_LOCK = threading.Lock()
+
+
+def get_recommendations(
+    season: str,
+    gameweek: int,
+    model_key: str,
+    table=None,
+    out_dir: str = DEFAULT_DIR,
+) -> Optional[Recommendations]:
+    """Process-wide artifact for these keys, reloaded when its file changes.
+
+    Returns None when no artifact exists or it was built from a different
+    player table than ``table``, so callers fall back to computing live.
+    """
+    path = artifact_path(season, gameweek, model_key, out_dir)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _LOCK:
+        cached = _LOADED.get(path)
+        if cached is None or cached[0] != mtime:
+            try:
+                cached = _LOADED[path] = (mtime, Recommendations.load(path))
+            except Exception as e:
+                logging.warning(f"Ignoring unreadable recommendations {path}: {e}")
+                return None
+    rec = cached[1]
+    if table is not None and rec.meta.get('table_digest') != table.digest:
+        logging.info(f"Recommendations {path} are for another player table; ignoring")
+        return None
+    return rec
+
+
+def history_features(model, history: Optional[str], state: Optional[str]) -> np.ndarray:
+    """Model input for the planning horizon from rolling features over past gameweeks."""
+    import pandas as pd
+
+    import engine
+    from features import FeaturePipeline, horizon_features
+    from player_store import get_player_table
+
+    if state and os.path.exists(state):
+        pipeline = FeaturePipeline.load(state)
+    else:
+        pipeline = FeaturePipeline()
+    if history:
+        pipeline.update(pd.read_csv(history))
+    if state:
+        pipeline.save(state)
+    gameweeks = list(range(engine.TARGET_GW + 1, engine.TARGET_GW + 1 + engine.HORIZON))
+    return horizon_features(pipeline, model, get_player_table(engine.PLAYERS_CSV), gameweeks,
+                            engine.get_fixture_index())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Precompute the current gameweek's recommendations for the app.")
+    parser.add_argument('--seed', type=int, default=None,
+                        help='placeholder prediction seed (default: the app\'s)')
+    parser.add_argument('--model', help='model file, served through the shared ModelServer')
+    parser.add_argument('--features', help='.npy of (players, horizon, n_features) for --model')
+    parser.add_argument('--history', help='per-appearance CSV (Player, Team, Opposition, GW, '
+                        'stats) to build --model features from, instead of --features')
+    parser.add_argument('--feature-state', help='rolling feature state (.npz): loaded if it '
+                        'exists, updated with --history and saved back')
+    parser.add_argument('--out', default=DEFAULT_DIR)
+    parser.add_argument('--samples', type=int, default=CAPTAIN_SAMPLES)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    import engine
+    from model_server import get_model_server
+    from player_store import get_player_table
+
+    model = features = None
+    if (args.history or args.feature_state) and not args.model:
+        parser.error('--history and --feature-state need --model')
+    if args.model:
+        model = get_model_server(args.model)
+        if args.history or args.feature_state:
+            features = history_features(model, args.history, args.feature_state)
+        elif args.features:
+            features = np.load(args.features)
+    seed = engine.PLACEHOLDER_SEED if args.seed is None else args.seed
+    key = engine.prediction_key(model, features, seed)
+    if key is None:
+        parser.error('nothing to materialize: unseeded placeholder predictions')
+
+    start = time.perf_counter()
+    table = get_player_table(engine.PLAYERS_CSV)
+    preds = engine.apply_fixtures(
+        engine.predict_points_cached(model=model, features=features, seed=seed))
+    path = materialize(table, preds, engine.SEASON, engine.TARGET_GW, key,
+                       out_dir=args.out, n_samples=args.samples)
+    logging.info(f"Wrote {path} ({os.path.getsize(path) / 1024:.0f} KiB, {len(table)} players)"
+                 f" in {time.perf_counter() - start:.1f}s")
+    if model is not None and features is not None:
+        # Entries of older model files or features are never read again
+        engine.get_prediction_cache().keep_only_model(key)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,363 @@
+"""One-pass, mergeable statistics for season-scale manager files."""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from manager_stream import get_field, iter_columnar, iter_entries
+
+CHUNK_ROWS = 65536
+HASH_CHUNK = 1 << 20
+DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+class RunningMoments:
+    """Count, mean, variance, min and max, merged chunk by chunk (Chan et al.)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=float)
+        if values.size:
+            other = RunningMoments()
+            other.count = int(values.size)
+            other.mean = float(values.mean())
+            other.m2 = float(((values - other.mean) ** 2).sum())
+            other.min = float(values.min())
+            other.max = float(values.max())
+            self.merge(other)
+
+    def merge(self, other: 'RunningMoments') -> None:
+        if not other.count:
+            return
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.mean += delta * other.count / n
+        self.count = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1, as pandas ``describe``)."""
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else float('nan')
+
+    def to_dict(self) -> Dict:
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2,
+                'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> 'RunningMoments':
+        out = cls()
+        out.count, out.mean, out.m2 = int(d['count']), float(d['mean']), float(d['m2'])
+        out.min, out.max = float(d['min']), float(d['max'])
+        return out
+
+
+class TDigest:
+    """Merging t-digest quantile sketch.
+
+    Values are buffered and folded into at most ~``compression`` centroids
+    using the arcsine scale function, so tails stay precise while memory is
+    bounded regardless of how many values are seen. Digests merge by
+    concatenating centroids and recompressing.
+    """
+
+    def __init__(self, compression: float = 200.0) -> None:
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer: list = []
+        self._buffered = 0
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=float).ravel()
+        if not values.size:
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._buffer.append(values)
+        self._buffered += values.size
+        if self._buffered >= 20 * self.compression:
+            self._compress()
+
+    def merge(self, other: 'TDigest') -> None:
+        other._compress()
+        if other.weights.size:
+            self._compress()
+            self._fold(np.concatenate([self.means, other.means]),
+                       np.concatenate([self.weights, other.weights]))
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+
+    @property
+    def count(self) -> float:
+        self._compress()
+        return float(self.weights.sum())
+
+    def quantile(self, q) -> np.ndarray:
+        """Estimated value(s) at quantile(s) ``q`` in [0, 1]."""
+        self._compress()
+        q = np.asarray(q, dtype=float)
+        if not self.weights.size:
+            return np.full(q.shape, np.nan)
+        total = self.weights.sum()
+        # Centroid centres on the cumulative-weight axis, pinned to min/max
+        centres = np.cumsum(self.weights) - self.weights / 2
+        xp = np.concatenate([[0.0], centres, [total]])
+        fp = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(q * total, xp, fp)
+
+    def cdf(self, x) -> np.ndarray:
+        """Estimated fraction of values <= ``x``."""
+        self._compress()
+        x = np.asarray(x, dtype=float)
+        if not self.weights.size:
+            return np.full(x.shape, np.nan)
+        total = self.weights.sum()
+        centres = np.cumsum(self.weights) - self.weights / 2
+        xp = np.concatenate([[self.min], self.means, [self.max]])
+        fp = np.concatenate([[0.0], centres, [total]]) / total
+        return np.interp(x, xp, fp)
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        values = np.concatenate(self._buffer)
+        self._buffer, self._buffered = [], 0
+        self._fold(np.concatenate([self.means, values]),
+                   np.concatenate([self.weights, np.ones(values.size)]))
+
+    def _fold(self, means: np.ndarray, weights: np.ndarray) -> None:
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        cum = np.cumsum(weights)
+        q_mid = (cum - weights / 2) / cum[-1]
+        # k1 scale: each centroid spans at most one unit of k
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_mid - 1)
+        group = np.floor(k - k.min()).astype(np.int64)
+        starts = np.flatnonzero(np.diff(group, prepend=-1))
+        w = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / w
+        self.weights = w
+
+    def to_dict(self) -> Dict:
+        self._compress()
+        return {'compression': self.compression, 'means': self.means.tolist(),
+                'weights': self.weights.tolist(), 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> 'TDigest':
+        out = cls(d['compression'])
+        out.means = np.asarray(d['means'], dtype=float)
+        out.weights = np.asarray(d['weights'], dtype=float)
+        out.min, out.max = float(d['min']), float(d['max'])
+        return out
+
+
+class FixedHistogram:
+    """Counts in fixed-width bins aligned to multiples of ``width``.
+
+    Bins are aligned globally, so histograms built from different chunks
+    or files merge by adding counts. ``rebin`` turns the fine bins into the
+    usual ``n`` equal bins between min and max; with integer data and
+    ``width=1`` this equals ``np.histogram(values, bins=n)``.
+    """
+
+    def __init__(self, width: float = 1.0) -> None:
+        self.width = width
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if values.size:
+            idx = np.floor(values / self.width).astype(np.int64)
+            self._add(int(idx.min()), np.bincount(idx - idx.min()))
+
+    def merge(self, other: 'FixedHistogram') -> None:
+        if other.width != self.width:
+            raise ValueError("histograms with different bin widths cannot be merged")
+        if other.counts.size:
+            self._add(other.offset, other.counts)
+
+    def _add(self, offset: int, counts: np.ndarray) -> None:
+        if not self.counts.size:
+            self.offset, self.counts = offset, counts.astype(np.int64)
+            return
+        lo = min(self.offset, offset)
+        hi = max(self.offset + self.counts.size, offset + counts.size)
+        merged = np.zeros(hi - lo, dtype=np.int64)
+        merged[self.offset - lo:self.offset - lo + self.counts.size] += self.counts
+        merged[offset - lo:offset - lo + counts.size] += counts
+        self.offset, self.counts = lo, merged
+
+    def rebin(self, bins: int, lo: float, hi: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(counts, edges) for ``bins`` equal bins spanning [lo, hi]."""
+        edges = np.linspace(lo, hi, bins + 1)
+        left = (self.offset + np.arange(self.counts.size)) * self.width
+        target = np.clip(np.searchsorted(edges, left, side='right') - 1, 0, bins - 1)
+        return np.bincount(target, weights=self.counts, minlength=bins).astype(np.int64), edges
+
+    def to_dict(self) -> Dict:
+        return {'width': self.width, 'offset': self.offset, 'counts': self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> 'FixedHistogram':
+        out = cls(d['width'])
+        out.offset = int(d['offset'])
+        out.counts = np.asarray(d['counts'], dtype=np.int64)
+        return out
+
+
+class StreamStats:
+    """Moments, quantile sketch and histogram fed from the same chunks."""
+
+    def __init__(self, compression: float = 200.0, bin_width: float = 1.0) -> None:
+        self.moments = RunningMoments()
+        self.digest = TDigest(compression)
+        self.histogram = FixedHistogram(bin_width)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.moments.update(values)
+        self.digest.update(values)
+        self.histogram.update(values)
+
+    def merge(self, other: 'StreamStats') -> None:
+        self.moments.merge(other.moments)
+        self.digest.merge(other.digest)
+        self.histogram.merge(other.histogram)
+
+    def describe(self) -> Dict[str, float]:
+        """Same fields as ``pandas.Series.describe`` (quantiles from the sketch)."""
+        m = self.moments
+        q25, q50, q75 = self.digest.quantile([0.25, 0.5, 0.75]).tolist()
+        values = [float(m.count), m.mean, m.std, m.min, q25, q50, q75, m.max]
+        return dict(zip(DESCRIBE_INDEX, values))
+
+    def histogram_bins(self, bins: int = 50) -> Tuple[np.ndarray, np.ndarray]:
+        return self.histogram.rebin(bins, self.moments.min, self.moments.max)
+
+    def to_dict(self) -> Dict:
+        return {'moments': self.moments.to_dict(), 'digest': self.digest.to_dict(),
+                'histogram': self.histogram.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> 'StreamStats':
+        out = cls()
+        out.moments = RunningMoments.from_dict(d['moments'])
+        out.digest = TDigest.from_dict(d['digest'])
+        out.histogram = FixedHistogram.from_dict(d['histogram'])
+        return out
+
+
+def iter_field_chunks(path: str, field: str = 'total',
+                      chunk_rows: int = CHUNK_ROWS) -> Iterator[np.ndarray]:
+    """Stream ``field`` from a JSON/JSON Lines manager file as float chunks."""
+    buf = np.empty(chunk_rows)
+    n = 0
+    for entry in iter_entries(path):
+        value = get_field(entry, field)
+        buf[n] = np.nan if value is None else value
+        n += 1
+        if n == chunk_rows:
+            yield buf.copy()
+            n = 0
+    if n:
+        yield buf[:n].copy()
+
+
+def compute_stats(chunks: Iterable[np.ndarray], **kwargs) -> StreamStats:
+    stats = StreamStats(**kwargs)
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats
+
+
+_DIGESTS: Dict[Tuple[str, int, int], str] = {}
+_DIGESTS_LOCK = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """Content hash of ``path``, memoized per (path, size, mtime)."""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _DIGESTS_LOCK:
+        if key in _DIGESTS:
+            return _DIGESTS[key]
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(block)
+    with _DIGESTS_LOCK:
+        _DIGESTS[key] = h.hexdigest()
+    return _DIGESTS[key]
+
+
+def columnar_digest(out_dir: str) -> str:
+    """Content hash of the chunk files in a ``to_columnar`` directory."""
+    h = hashlib.blake2b(digest_size=16)
+    for chunk_path in sorted(glob.glob(os.path.join(out_dir, 'chunk_*.npz'))):
+        h.update(f'{os.path.basename(chunk_path)}:{file_digest(chunk_path)};'.encode())
+    return h.hexdigest()
+
+
+def season_stats(
+    path: str,
+    field: str = 'total',
+    cache_dir: Optional[str] = None,
+    columnar_dir: Optional[str] = None,
+    compression: float = 200.0,
+    bin_width: float = 1.0,
+) -> Tuple[StreamStats, str]:
+    """Streaming stats of ``field`` in ``path``, cached per file content hash.
+
+    Returns (stats, digest). With ``columnar_dir`` (written by
+    ``manager_stream.to_columnar``) values are read from its chunks instead
+    of re-parsing JSON, and the digest covers the chunks too. Results land
+    in ``cache_dir`` (default ``.season_stats`` next to the file) as
+    ``<key>.json``.
+    """
+    digest = file_digest(path)
+    if columnar_dir:
+        # The values come from the chunks, which can change under the same JSON
+        digest = hashlib.blake2b(f'{digest}:{columnar_digest(columnar_dir)}'.encode(),
+                                 digest_size=16).hexdigest()
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), '.season_stats')
+    key = hashlib.blake2b(f'{digest}:{field}:{compression}:{bin_width}'.encode(),
+                          digest_size=16).hexdigest()
+    cache_path = os.path.join(cache_dir, f'{key}.json')
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return StreamStats.from_dict(json.load(f)), digest
+
+    if columnar_dir:
+        chunks = (c[field] for c in iter_columnar(columnar_dir, [field]))
+    else:
+        chunks = iter_field_chunks(path, field)
+    stats = compute_stats(chunks, compression=compression, bin_width=bin_width)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = cache_path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(stats.to_dict(), f)
+    os.replace(tmp, cache_path)
+    return stats, digest
@@ -0,0 +1,274 @@
+"""Monte Carlo simulation of correlated player points."""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+
+from horizon import select_xi
+
+# Samples are drawn in fixed blocks with their own seeds, so a seeded run
+# gives the same numbers whatever chunk size caps the memory.
+BLOCK = 1024
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class PointsSimulator:
+    """Sample points for many players and gameweeks with shared shocks.
+
+    Each player's points in a gameweek are a shifted lognormal with the
+    predicted mean and standard deviation ``sd``, driven by a standard
+    normal built from three parts:
+
+    * a club factor shared by teammates in that gameweek (``team_corr``),
+    * a match factor shared by both sides of a fixture (``fixture_corr``),
+      used only when ``opponents`` is given,
+    * an independent player shock.
+
+    Players whose opponent is -1 (blank gameweek) score zero.
+    """
+
+    def __init__(
+        self,
+        means: np.ndarray,
+        clubs: Sequence,
+        positions: Optional[Sequence[str]] = None,
+        ids: Optional[Sequence[int]] = None,
+        sd: Optional[np.ndarray] = None,
+        opponents: Optional[np.ndarray] = None,
+        team_corr: float = 0.15,
+        fixture_corr: float = 0.05,
+        shift: float = 2.0,
+        dispersion: float = 1.3,
+    ) -> None:
+        means = np.asarray(means, dtype=float)
+        self.means = means[:, None] if means.ndim == 1 else means
+        n, n_gws = self.means.shape
+        if team_corr < 0 or fixture_corr < 0 or team_corr + fixture_corr >= 1:
+            raise ValueError("team_corr and fixture_corr must be >= 0 and sum to < 1")
+        self.club_codes, self.club_names = _codes(clubs)
+        self.positions = np.asarray(positions) if positions is not None else None
+        self.ids = np.asarray(ids, dtype=np.int64) if ids is not None else np.arange(n)
+        self._row_of = {int(p): i for i, p in enumerate(self.ids)}
+        self.shift = shift
+        if sd is None:
+            sd = dispersion * np.sqrt(np.maximum(self.means + shift, 0.0))
+        self.sd = np.broadcast_to(np.asarray(sd, dtype=float), self.means.shape)
+        if opponents is not None:
+            opponents = np.asarray(opponents, dtype=np.int64).reshape(n, n_gws)
+        self.opponents = opponents
+        self.weights = (np.sqrt(team_corr), np.sqrt(fixture_corr),
+                        np.sqrt(1.0 - team_corr - fixture_corr))
+
+        # Lognormal parameters matching mean + shift and sd
+        m = np.maximum(self.means + shift, 1e-6)
+        s2 = np.log1p((self.sd / m) ** 2)
+        self._sigma = np.sqrt(s2)
+        self._mu = np.log(m) - s2 / 2
+        self._playing = opponents >= 0 if opponents is not None else np.ones((n, n_gws), bool)
+
+    @classmethod
+    def from_table(cls, table, means: np.ndarray, **kwargs) -> 'PointsSimulator':
+        """Simulator over every player of a ``player_store.PlayerTable``."""
+        return cls(means, table.teams, positions=table.positions, ids=table.ids, **kwargs)
+
+    def rows(self, player_ids: Iterable[int]) -> np.ndarray:
+        ids = [int(p) for p in player_ids]
+        rows = np.array([self._row_of.get(p, -1) for p in ids], dtype=np.int64)
+        if (rows < 0).any():
+            raise KeyError(f"unknown player ids: {np.asarray(ids)[rows < 0].tolist()}")
+        return rows
+
+    def sample(
+        self,
+        rows: np.ndarray,
+        n_samples: int = 10_000,
+        seed: Optional[int] = None,
+        chunk_size: int = 8192,
+        gameweeks: Optional[Sequence[int]] = None,
+    ) -> Iterator[np.ndarray]:
+        """Yield (samples, len(rows), len(gameweeks)) float32 point chunks."""
+        rows = np.asarray(rows, dtype=np.int64)
+        gws = np.arange(self.means.shape[1]) if gameweeks is None else np.asarray(gameweeks)
+        club_idx, match_idx, n_club_f, n_match_f = self._factor_index(rows, gws)
+        mu = self._mu[np.ix_(rows, gws)].astype(np.float32)
+        sigma = self._sigma[np.ix_(rows, gws)].astype(np.float32)
+        playing = self._playing[np.ix_(rows, gws)]
+        w_team, w_match, w_own = self.weights
+
+        n_blocks = -(-n_samples // BLOCK)
+        seeds = np.random.SeedSequence(seed).spawn(n_blocks)
+        per_chunk = max(1, chunk_size // BLOCK)
+        for start in range(0, n_blocks, per_chunk):
+            parts = []
+            for b in range(start, min(start + per_chunk, n_blocks)):
+                size = min(BLOCK, n_samples - b * BLOCK)
+                rng = np.random.default_rng(seeds[b])
+                z = w_own * rng.standard_normal((size,) + mu.shape, dtype=np.float32)
+                z += w_team * rng.standard_normal((size, n_club_f), dtype=np.float32)[:, club_idx]
+                if n_match_f:
+                    z += w_match * rng.standard_normal(
+                        (size, n_match_f), dtype=np.float32)[:, match_idx]
+                parts.append(z)
+            z = np.concatenate(parts) if len(parts) > 1 else parts[0]
+            pts = np.exp(mu + sigma * z, dtype=np.float32)
+            pts -= self.shift
+            pts *= playing
+            yield pts
+
+    def simulate_squad(
+        self,
+        squad_ids: Iterable[int],
+        gameweek: int = 0,
+        n_samples: int = 10_000,
+        seed: Optional[int] = None,
+        chunk_size: int = 8192,
+        rival_ids: Optional[Iterable[int]] = None,
+    ) -> Dict:
+        """Distribution of a squad's gameweek score and of each captain choice.
+
+        The XI and default captain are picked on expected points (as in
+        ``horizon.lineup_points``), i.e. before the outcome is known. With
+        ``rival_ids`` the rival squad is drawn from the same scenarios, so
+        shared players and clubs are correlated across both squads.
+
+        Returns an empty dict when the squad has no one to start (e.g. only
+        assistant managers); a rival without a lineup is left out.
+        """
+        squad = self.rows(squad_ids)
+        xi, captain = self._lineup(squad, gameweek)
+        if not len(xi):
+            return {}
+        rows = squad
+        if rival_ids is not None:
+            rival = self.rows(rival_ids)
+            r_xi, r_captain = self._lineup(rival, gameweek)
+            if len(r_xi):
+                rows = np.concatenate([squad, rival])
+            else:
+                rival_ids = None
+
+        totals, rival_totals = [], []
+        cap_totals, top_counts = [], np.zeros(len(xi))
+        for chunk in self.sample(rows, n_samples, seed, chunk_size, [gameweek]):
+            pts = chunk[:, :, 0]
+            own = pts[:, xi]
+            base = own.sum(axis=1)
+            cap_totals.append(base[:, None] + own)
+            totals.append(base + pts[:, captain])
+            top_counts += np.bincount(own.argmax(axis=1), minlength=len(xi))
+            if rival_ids is not None:
+                r_pts = pts[:, len(squad):]
+                rival_totals.append(r_pts[:, r_xi].sum(axis=1) + r_pts[:, r_captain])
+        totals = np.concatenate(totals)
+        cap_totals = np.concatenate(cap_totals)
+
+        captains = []
+        for j, r in enumerate(xi):
+            col = cap_totals[:, j]
+            captains.append({
+                'id': int(self.ids[squad[r]]),
+                'expected_total': round(float(col.mean()), 2),
+                'p5_total': round(float(np.quantile(col, 0.05)), 2),
+                'p_top_scorer': round(float(top_counts[j] / n_samples), 4),
+            })
+        captains.sort(key=lambda c: -c['expected_total'])
+        out = {
+            'xi': [int(self.ids[squad[r]]) for r in xi],
+            'captain': int(self.ids[squad[captain]]),
+            'totals': totals,
+            'summary': summarize(totals),
+            'captains': captains,
+        }
+        if rival_ids is not None:
+            rival_totals = np.concatenate(rival_totals)
+            out['rival_summary'] = summarize(rival_totals)
+            out['p_beat_rival'] = round(float((totals > rival_totals).mean()), 4)
+        return out
+
+    def simulate_pool(
+        self,
+        player_ids: Optional[Iterable[int]] = None,
+        gameweeks: Optional[Sequence[int]] = None,
+        n_samples: int = 5_000,
+        seed: Optional[int] = None,
+        chunk_size: int = 2048,
+        haul: float = 10.0,
+    ) -> Dict[str, np.ndarray]:
+        """Per-player quantiles of points summed over ``gameweeks``.
+
+        Returns arrays aligned with ``player_ids`` (all players by default):
+        ``ids``, ``mean``, ``p10``, ``p50``, ``p90`` and ``p_haul`` (chance
+        of at least ``haul`` points).
+        """
+        rows = np.arange(len(self.ids)) if player_ids is None else self.rows(player_ids)
+        sums = [c.sum(axis=2) for c in self.sample(rows, n_samples, seed, chunk_size, gameweeks)]
+        totals = np.concatenate(sums)
+        p10, p50, p90 = np.quantile(totals, [0.1, 0.5, 0.9], axis=0)
+        return {
+            'ids': self.ids[rows],
+            'mean': totals.mean(axis=0),
+            'p10': p10,
+            'p50': p50,
+            'p90': p90,
+            'p_haul': (totals >= haul).mean(axis=0),
+        }
+
+    def _lineup(self, squad: np.ndarray, gameweek: int):
+        expected = self.means[squad, gameweek] * self._playing[squad, gameweek]
+        if self.positions is None:
+            order = np.argsort(-expected, kind='stable')
+            xi = np.sort(order[:11])
+            return xi, int(order[0])
+        xi = np.array(sorted(select_xi(expected, self.positions[squad])), dtype=np.int64)
+        return xi, int(xi[np.argmax(expected[xi])]) if len(xi) else -1
+
+    def _factor_index(self, rows: np.ndarray, gws: np.ndarray):
+        """Map (row, gw) to club-factor and match-factor columns."""
+        n_clubs = len(self.club_names)
+        clubs = self.club_codes[rows][:, None]
+        club_key = gws[None, :] * n_clubs + clubs
+        uniq, club_idx = np.unique(club_key, return_inverse=True)
+        club_idx = club_idx.reshape(club_key.shape)
+        if self.opponents is None:
+            return club_idx, None, len(uniq), 0
+        opp = self.opponents[np.ix_(rows, gws)]
+        lo, hi = np.minimum(clubs, opp), np.maximum(clubs, opp)
+        match_key = (gws[None, :] * n_clubs + lo) * (n_clubs + 1) + hi + 1
+        m_uniq, match_idx = np.unique(match_key, return_inverse=True)
+        return club_idx, match_idx.reshape(match_key.shape), len(uniq), len(m_uniq)
+
+
+def fixture_opponents(clubs: Sequence, index, gameweeks: Sequence[int]) -> np.ndarray:
+    """(players, gameweeks) ``opponents`` for PointsSimulator from a FixtureIndex.
+
+    Opponents are numbered as the simulator numbers ``clubs``; -1 marks a
+    blank gameweek. A fixture the index does not know (club or opponent
+    missing, or a gameweek past its end) gets the player's own club, so it
+    adds no correlation beyond the club factor.
+    """
+    codes, names = _codes(clubs)
+    team_ids = index.team_ids(names.tolist())
+    code_of = np.full(index.n_teams + 1, -1, dtype=np.int64)
+    known = team_ids > 0
+    code_of[team_ids[known]] = np.flatnonzero(known)
+    code_of[0] = -1
+    player_teams = team_ids[codes]
+    opp = code_of[index.opponents(player_teams, gameweeks)]
+    out = np.where(opp >= 0, opp, codes[:, None])
+    out[index.n_fixtures(player_teams, gameweeks) == 0] = -1
+    return out
+
+
+def summarize(totals: np.ndarray) -> Dict[str, float]:
+    """Mean, std and QUANTILES of a 1D sample."""
+    qs = np.quantile(totals, QUANTILES)
+    out = {'mean': round(float(totals.mean()), 2), 'std': round(float(totals.std()), 2)}
+    out.update({f'p{int(q * 100)}': round(float(v), 2) for q, v in zip(QUANTILES, qs)})
+    return out
+
+
+def _codes(values: Sequence):
+    names, codes = np.unique(np.asarray(values).astype(str), return_inverse=True)
+    return codes.astype(np.int64), names
@@ -0,0 +1,236 @@
+"""Content-addressed on-disk store of FPL API responses with offline replay."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from transport import ResilientSession
+
+DEFAULT_SNAPSHOT_DIR = os.environ.get(
+    "FPL_SNAPSHOT_DIR", str(Path(__file__).resolve().parent.parent / "data" / "snapshots")
+)
+
+# URL pattern -> response kind, checked in order
+KINDS = [
+    (re.compile(r"/bootstrap-static/"), "bootstrap"),
+    (re.compile(r"/fixtures/"), "fixtures"),
+    (re.compile(r"/element-summary/\d+/"), "element-summary"),
+    (re.compile(r"/entry/\d+/event/\d+/picks/"), "picks"),
+    (re.compile(r"/entry/\d+/history/"), "entry-history"),
+    (re.compile(r"/leagues-classic/\d+/standings/"), "league"),
+    (re.compile(r"/entry/\d+/"), "entry"),
+]
+_EVENT = re.compile(r"/event/(\d+)/")
+
+
+def url_kind(url: str) -> str:
+    return next((kind for pattern, kind in KINDS if pattern.search(url)), "other")
+
+
+def url_gameweek(url: str) -> Optional[int]:
+    """Gameweek named in the URL itself (``/event/<gw>/``), if any."""
+    m = _EVENT.search(url)
+    return int(m.group(1)) if m else None
+
+
+def current_gameweek(bootstrap: Dict) -> Optional[int]:
+    """The ``is_current`` event of a bootstrap-static payload."""
+    events = bootstrap.get("events", []) if isinstance(bootstrap, dict) else []
+    return next((e["id"] for e in events if e.get("is_current")), None)
+
+
+class SnapshotStore:
+    """Gzipped response bodies stored by SHA-256, with a SQLite index.
+
+    Bodies live in ``objects/<2 hex>/<rest>.gz``, so identical responses
+    (an unchanged bootstrap fetched every gameweek) are stored once. The
+    index records every fetch: URL, kind, gameweek, digest and validators.
+    """
+
+    def __init__(self, root: str | Path = DEFAULT_SNAPSHOT_DIR) -> None:
+        self.root = Path(root)
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT, kind TEXT, gameweek INTEGER,"
+            " digest TEXT, status INTEGER, content_type TEXT, etag TEXT,"
+            " last_modified TEXT, size INTEGER, fetched_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_url ON responses (url, gameweek, id)")
+        self._conn.commit()
+
+    def put(
+        self,
+        url: str,
+        body: bytes,
+        gameweek: Optional[int] = None,
+        headers: Optional[Dict[str, str]] = None,
+        status: int = 200,
+    ) -> str:
+        """Store one response body and index it; returns the body digest."""
+        headers = headers or {}
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(body)
+            os.replace(tmp, path)
+        if gameweek is None:
+            gameweek = url_gameweek(url)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO responses (url, kind, gameweek, digest, status, content_type,"
+                " etag, last_modified, size, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, url_kind(url), gameweek, digest, status,
+                 headers.get("Content-Type"), headers.get("ETag"),
+                 headers.get("Last-Modified"), len(body), time.time()),
+            )
+            self._conn.commit()
+        return digest
+
+    def lookup(self, url: str, gameweek: Optional[int] = None) -> Optional[Dict]:
+        """Index row of the latest fetch of ``url`` (as of ``gameweek`` if given)."""
+        sql = "SELECT * FROM responses WHERE url = ?"
+        args: List = [url]
+        if gameweek is not None:
+            sql += " AND (gameweek IS NULL OR gameweek <= ?)"
+            args.append(gameweek)
+            sql += " ORDER BY COALESCE(gameweek, -1) DESC, id DESC LIMIT 1"
+        else:
+            sql += " ORDER BY id DESC LIMIT 1"
+        with self._lock:
+            cur = self._conn.execute(sql, args)
+            row = cur.fetchone()
+            names = [d[0] for d in cur.description]
+        return dict(zip(names, row)) if row else None
+
+    def read(self, digest: str) -> bytes:
+        with gzip.open(self._object_path(digest), "rb") as f:
+            return f.read()
+
+    def get(self, url: str, gameweek: Optional[int] = None) -> Optional[bytes]:
+        meta = self.lookup(url, gameweek)
+        return self.read(meta["digest"]) if meta else None
+
+    def get_json(self, url: str, gameweek: Optional[int] = None):
+        body = self.get(url, gameweek)
+        return json.loads(body) if body is not None else None
+
+    def entries(self, kind: Optional[str] = None, gameweek: Optional[int] = None) -> List[Dict]:
+        """Index rows, optionally filtered by kind and gameweek, oldest first."""
+        sql = "SELECT * FROM responses"
+        where, args = [], []
+        if kind is not None:
+            where.append("kind = ?")
+            args.append(kind)
+        if gameweek is not None:
+            where.append("gameweek = ?")
+            args.append(gameweek)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self._lock:
+            cur = self._conn.execute(sql + " ORDER BY id", args)
+            names = [d[0] for d in cur.description]
+            return [dict(zip(names, row)) for row in cur.fetchall()]
+
+    def gameweeks(self) -> List[int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT gameweek FROM responses WHERE gameweek IS NOT NULL"
+                " ORDER BY gameweek").fetchall()
+        return [r[0] for r in rows]
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest[2:]}.gz"
+
+
+class RecordingSession(ResilientSession):
+    """Live session that stores every successful GET in a SnapshotStore.
+
+    Responses are filed under the gameweek named in the URL, else
+    ``gameweek``; when that is None it is taken from the first
+    bootstrap-static response recorded. Other keyword arguments configure
+    the underlying ResilientSession.
+    """
+
+    def __init__(self, store: SnapshotStore, gameweek: Optional[int] = None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.store = store
+        self.gameweek = gameweek
+
+    def request(self, method, url, *args, **kwargs):
+        res = super().request(method, url, *args, **kwargs)
+        if method.upper() == "GET" and res.status_code == 200:
+            if self.gameweek is None and url_kind(res.url) == "bootstrap":
+                try:
+                    self.gameweek = current_gameweek(res.json())
+                except ValueError:
+                    pass
+            self.store.put(res.url, res.content, gameweek=url_gameweek(res.url) or self.gameweek,
+                           headers=dict(res.headers), status=res.status_code)
+        return res
+
+
+class ReplaySession(requests.Session):
+    """Session that answers GETs from a SnapshotStore without any network.
+
+    Each URL is served as of ``gameweek`` (the latest recording at or
+    before it; the latest overall when None). Unknown URLs get a 404.
+    """
+
+    def __init__(self, store: SnapshotStore, gameweek: Optional[int] = None) -> None:
+        super().__init__()
+        self.store = store
+        self.gameweek = gameweek
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        full_url = requests.Request(method, url, params=params).prepare().url
+        res = requests.Response()
+        res.url = full_url
+        res.encoding = "utf-8"
+        res.request = requests.Request(method, full_url, headers=headers).prepare()
+        meta = self.store.lookup(full_url, self.gameweek) if method.upper() == "GET" else None
+        if meta is None:
+            res.status_code, res.reason, res._content = 404, "Not in snapshot", b""
+            return res
+        res.headers = CaseInsensitiveDict({
+            k: v for k, v in (("Content-Type", meta["content_type"]), ("ETag", meta["etag"]),
+                              ("Last-Modified", meta["last_modified"])) if v
+        })
+        if meta["etag"] and (headers or {}).get("If-None-Match") == meta["etag"]:
+            res.status_code, res.reason, res._content = 304, "Not Modified", b""
+            return res
+        res.status_code, res.reason = meta["status"], "OK"
+        res._content = self.store.read(meta["digest"])
+        return res
+
+
+def snapshot_session(
+    mode: Optional[str],
+    store: Optional[SnapshotStore] = None,
+    gameweek: Optional[int] = None,
+) -> Optional[requests.Session]:
+    """RecordingSession for ``'record'``, ReplaySession for ``'replay'``, else None."""
+    if mode not in ("record", "replay"):
+        return None
+    store = store or SnapshotStore()
+    cls = RecordingSession if mode == "record" else ReplaySession
+    return cls(store, gameweek=gameweek)
@@ -0,0 +1,142 @@
+"""Cold-start report: import and warm-up time of each entry point.
+
+Every measurement runs in a fresh interpreter, as a new container
+replica would, and also lists which heavy libraries the entry point
+pulled in:
+
+    python app/startup.py                 # median of 5 cold starts each
+    python app/startup.py --runs 9 --json startup.json
+    python app/startup.py --only engine --top 15   # slowest imports too
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(APP_DIR)
+
+# Name -> code run in a fresh interpreter (cwd: app/, with app/ and the
+# repository root importable)
+ENTRY_POINTS = {
+    'engine': 'import engine',
+    'headless': 'import headless',
+    'suggestions': 'import suggestions',
+    'recommendations': 'import recommendations',
+    'model': 'import model',
+    'visualisation': 'import visualisation_results_24_25',
+    'streamlit': 'import streamlit',
+    'engine.warm_up': 'import engine; engine.warm_up()',
+}
+HEAVY_MODULES = ('pandas', 'streamlit', 'matplotlib', 'bokeh', 'scipy', 'sklearn',
+                 'joblib', 'pyarrow', 'requests')
+
+_PROBE = """\
+import json, sys, time
+t0 = time.perf_counter()
+exec(compile({code!r}, '<startup>', 'exec'))
+seconds = time.perf_counter() - t0
+print(json.dumps({{'seconds': seconds,
+                  'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        p for p in (APP_DIR, ROOT_DIR, env.get('PYTHONPATH')) if p)
+    return env
+
+
+def cold_start(code: str, runs: int = 5) -> Dict:
+    """Median (and min/max) time of ``code`` over ``runs`` fresh interpreters.
+
+    ``seconds`` times the code alone; ``process_seconds`` adds interpreter
+    start-up and shutdown, i.e. what a container pays before serving.
+    """
+    probe = _PROBE.format(code=code, heavy=HEAVY_MODULES)
+    inner: List[float] = []
+    outer: List[float] = []
+    heavy: List[str] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, '-c', probe], cwd=APP_DIR, env=_env(),
+                             capture_output=True, text=True)
+        outer.append(time.perf_counter() - start)
+        if out.returncode != 0:
+            raise RuntimeError(f"{code!r} failed:\n{out.stderr.strip()}")
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        inner.append(result['seconds'])
+        heavy = result['heavy']
+    return {
+        'seconds': statistics.median(inner),
+        'min': min(inner),
+        'max': max(inner),
+        'process_seconds': statistics.median(outer),
+        'heavy': heavy,
+    }
+
+
+def slowest_imports(code: str, top: int = 10) -> List[Dict]:
+    """Top-level-ish modules by cumulative import time (``python -X importtime``)."""
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=APP_DIR,
+                         env=_env(), capture_output=True, text=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        # One space after the bar, then two per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append({'module': name.strip(), 'depth': depth,
+                     'cumulative_ms': int(cumulative_us) / 1000.0})
+    # Nested imports are counted in their parents; show the outer levels
+    rows = [r for r in rows if r['depth'] <= 1]
+    return sorted(rows, key=lambda r: -r['cumulative_ms'])[:top]
+
+
+def report(results: Dict[str, Dict]) -> str:
+    lines = [f"{'entry point':<18}{'import':>11}{'process':>11}   heavy modules loaded"]
+    for name, r in results.items():
+        lines.append(f"{name:<18}{r['seconds'] * 1000:>8.0f} ms{r['process_seconds'] * 1000:>8.0f} ms"
+                     f"   {', '.join(r['heavy']) or '-'}")
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--only', action='append', choices=sorted(ENTRY_POINTS),
+                        help='measure just this entry point (repeatable)')
+    parser.add_argument('--top', type=int, default=0,
+                        help='also list the N slowest imports of each entry point')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only or ENTRY_POINTS:
+        results[name] = cold_start(ENTRY_POINTS[name], runs=args.runs)
+        if args.top:
+            results[name]['slowest_imports'] = slowest_imports(ENTRY_POINTS[name], args.top)
+    print(report(results))
+    for name, r in results.items():
+        if r.get('slowest_imports'):
+            print(f"\n{name}: slowest imports")
+            for row in r['slowest_imports']:
+                print(f"  {row['cumulative_ms']:>8.1f} ms  {row['module']}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'runs': args.runs,
+                       'results': results}, f, indent=1)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+from api_client import BootstrapCache, FPLClient
+
+URL = 'https://example.invalid/bootstrap-static/'
+
+
+class Response:
+    def __init__(self, status, data=None, headers=None):
+        self.status_code = status
+        self._data = data
+        self.headers = headers or {}
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f'HTTP {self.status_code}')
+
+
+class StubSession:
+    """Serves ``payload`` with an ETag; 304 when the client sends it back."""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.etag = '"v1"'
+        self.calls = []
+        self.fail = False
+        self.gate = None
+        self.entered = threading.Event()
+
+    def get(self, url, headers=None):
+        headers = dict(headers or {})
+        self.calls.append(headers)
+        self.entered.set()
+        if self.gate is not None:
+            assert self.gate.wait(5)
+        if self.fail:
+            raise ConnectionError('upstream down')
+        if headers.get('If-None-Match') == self.etag:
+            return Response(304)
+        return Response(200, self.payload, {'ETag': self.etag})
+
+
+def expire(cache):
+    cache._fetched_at -= cache.ttl + 1
+
+
+def test_ttl_then_conditional_revalidation():
+    session = StubSession({'events': [{'id': 1}]})
+    cache = BootstrapCache(ttl=60)
+    first = cache.get(session, URL, copy=False)
+    assert cache.get(session, URL, copy=False) is first and len(session.calls) == 1
+
+    expire(cache)
+    assert cache.get(session, URL, copy=False) is first
+    assert session.calls[-1] == {'If-None-Match': '"v1"'}
+    # The 304 restarts the TTL
+    cache.get(session, URL)
+    assert len(session.calls) == 2
+
+    expire(cache)
+    session.payload, session.etag = {'events': [{'id': 2}]}, '"v2"'
+    derived = cache.derive('n', first, len)
+    assert cache.get(session, URL) == {'events': [{'id': 2}]}
+    assert cache.derive('n', cache.get(session, URL, copy=False), lambda d: 'rebuilt') == 'rebuilt'
+    assert derived == 1
+
+
+def test_snapshot_warm_start(tmp_path):
+    path = tmp_path / 'snapshot.json'
+    session = StubSession([{'id': 1, 'event': 3}])
+    BootstrapCache(ttl=60, snapshot_path=path).get(session, URL)
+    assert path.exists() and len(session.calls) == 1
+
+    # A new process serves the snapshot while it is fresh...
+    warm = BootstrapCache(ttl=60, snapshot_path=path)
+    assert warm.get(session, URL) == [{'id': 1, 'event': 3}]
+    assert len(session.calls) == 1
+    # ...and revalidates it with the stored ETag afterwards
+    expire(warm)
+    warm.get(session, URL)
+    assert session.calls[-1] == {'If-None-Match': '"v1"'}
+
+    path.write_text('{not json')
+    cold = BootstrapCache(ttl=60, snapshot_path=path)
+    assert cold.get(session, URL) == [{'id': 1, 'event': 3}]
+    assert session.calls[-1] == {}
+
+
+def test_failed_refresh_serves_stale_data():
+    session = StubSession({'teams': []})
+    cache = BootstrapCache(ttl=60)
+    cache.get(session, URL)
+    expire(cache)
+    session.fail = True
+    assert cache.get(session, URL) == {'teams': []}
+
+    empty = BootstrapCache(ttl=60)
+    with pytest.raises(ConnectionError):
+        empty.get(session, URL)
+
+
+def test_one_refresh_at_a_time_and_stale_readers_do_not_wait():
+    session = StubSession({'v': 1})
+    cache = BootstrapCache(ttl=60)
+    cache.get(session, URL)
+    expire(cache)
+    session.payload, session.etag = {'v': 2}, '"v2"'
+    session.gate = threading.Event()
+    session.entered.clear()
+
+    refresher = threading.Thread(target=cache.get, args=(session, URL))
+    refresher.start()
+    assert session.entered.wait(5)
+    start = time.perf_counter()
+    assert [cache.get(session, URL) for _ in range(5)] == [{'v': 1}] * 5
+    assert time.perf_counter() - start < 1.0
+    assert len(session.calls) == 2
+    session.gate.set()
+    refresher.join(5)
+    assert cache.get(session, URL) == {'v': 2}
+
+
+def test_first_fill_is_shared_by_concurrent_callers():
+    session = StubSession({'v': 1})
+    session.gate = threading.Event()
+    cache = BootstrapCache(ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(session, URL)))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    assert session.entered.wait(5)
+    time.sleep(0.05)
+    session.gate.set()
+    for t in threads:
+        t.join(5)
+    assert results == [{'v': 1}] * 4 and len(session.calls) == 1
+
+
+def test_callers_get_their_own_copy():
+    payload = {'events': [{'id': 1}], 'teams': [{'id': 1, 'name': 'Arsenal'}],
+               'elements': [{'id': 5, 'web_name': 'Saka', 'element_type': 3,
+                             'now_cost': 100}]}
+    client = FPLClient(bootstrap_cache=BootstrapCache(ttl=60),
+                       session=StubSession(payload))
+    data = client.get_bootstrap()
+    data['events'].clear()
+    client.get_teams()[0]['name'] = 'changed'
+    client.get_all_players()[0]['cost'] = 0
+    assert client.get_bootstrap() == payload
+    assert client.get_all_players()[0]['cost'] == 10.0
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(__file__))
+from backtest import backtest, summarize, walk_forward_folds
+
+
+def make_season(n_players=40, n_gws=10, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    skill = rng.uniform(0, 6, n_players)
+    for gw in range(1, n_gws + 1):
+        for p in range(n_players):
+            rows.append({'Season': '2023-24', 'GW': gw, 'Player': f'P{p}',
+                         'Skill': skill[p], 'Noise': rng.normal(),
+                         'Points': skill[p] + rng.normal(0, 0.5)})
+    return pd.DataFrame(rows)
+
+
+def test_folds_stay_within_season():
+    t = np.array([101, 102, 103, 104, 201, 202, 203])
+    assert walk_forward_folds(t, min_train=2, horizon=2) == [(102, 104), (103, 104), (202, 203)]
+
+
+def test_backtest_pool_matches_serial():
+    df = make_season()
+    kwargs = dict(feature_cols=['Skill', 'Noise'], models=('ridge', 'lasso'),
+                  min_train=3, horizon=2, top_n=5)
+    serial = backtest(df, n_jobs=1, **kwargs)
+    pooled = backtest(df, n_jobs=2, **kwargs)
+    pd.testing.assert_frame_equal(serial, pooled)
+    assert len(serial) == 2 * 7
+    assert (serial['mae'] < 1.0).all()
+    assert summarize(serial).loc['ridge', 'top5'] > 0.5
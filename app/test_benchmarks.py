@@ -0,0 +1,48 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import benchmarks
+from benchmarks import Scale, benchmarks as suite, compare, measure, record_baseline, workload
+
+
+def test_suite_runs_on_synthetic_data():
+    with workload(Scale(players=300, managers=40)) as w:
+        funcs = suite(w)
+        assert {'find_entry', 'load_gw_data', 'analyze_gw_data', 'rank_transfers',
+                'predict_future_points', 'json_load_managers'} <= set(funcs)
+        entry = funcs['find_entry']()
+        assert [p['element'] for p in entry['picks']] == w.squad
+        current, suggestions = funcs['analyze_gw_data']()
+        assert len(current) == 15 and suggestions
+        current, suggestions = funcs['analyze_materialized']()
+        assert len(current) == 15 and len(suggestions) == 5
+        assert len(funcs['json_load_managers']()) == 40
+        for name, func in funcs.items():
+            stats = measure(func, rounds=2, min_round_time=0.0, max_time=1.0)
+            assert stats['median'] > 0 and stats['rounds'] >= 1, name
+
+
+def test_compare_flags_regressions_only_beyond_threshold(tmp_path):
+    path = tmp_path / 'baseline.json'
+    record_baseline({'fast': {'median': 0.010, 'min': 0.009},
+                     'slow': {'median': 0.100, 'min': 0.090}}, 'small', path)
+    baseline = json.loads(path.read_text())
+    baseline['thresholds']['slow'] = 3.0
+    path.write_text(json.dumps(baseline))
+    rows = compare({'fast': {'median': 0.020}, 'slow': {'median': 0.250},
+                    'tiny': {'median': 1e-6}}, baseline, 'small', threshold=1.5)
+    status = {row['name']: row['status'] for row in rows}
+    assert status == {'fast': 'REGRESSED', 'slow': 'ok', 'tiny': 'new'}
+    # Recording another scale keeps the first and the custom thresholds
+    record_baseline({'fast': {'median': 1.0, 'min': 1.0}}, 'large', path)
+    baseline = json.loads(path.read_text())
+    assert set(baseline['scales']) == {'small', 'large'} and baseline['thresholds'] == {'slow': 3.0}
+
+
+@pytest.mark.skipif(not os.environ.get('FPL_BENCH'), reason='set FPL_BENCH=1 to check timings')
+def test_no_regressions_against_baseline():
+    assert benchmarks.main(['--scale', 'small']) == 0
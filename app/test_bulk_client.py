@@ -0,0 +1,134 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import transport
+from bulk_client import BulkFetcher, get_entries_picks, get_players_details, run_sync
+from transport import CircuitBreaker
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves element-summary/picks stubs; player 13 fails once with a 429,
+    player 900 once with a one-hour Retry-After, and player 503 always.
+
+    Players from 1000 up are slow, to count how many requests are in flight.
+    """
+    hits = {}
+    in_flight = peak = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StubHandler.lock:
+            StubHandler.hits[self.path] = StubHandler.hits.get(self.path, 0) + 1
+        parts = [p for p in self.path.split("/") if p]
+        if parts[0] == "element-summary" and int(parts[1]) >= 1000:
+            with StubHandler.lock:
+                StubHandler.in_flight += 1
+                StubHandler.peak = max(StubHandler.peak, StubHandler.in_flight)
+            time.sleep(0.3)
+            with StubHandler.lock:
+                StubHandler.in_flight -= 1
+        if parts[0] == "element-summary":
+            pid = int(parts[1])
+            if pid == 13 and StubHandler.hits[self.path] == 1:
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                self.end_headers()
+                return
+            if pid == 503:
+                self.send_response(503)
+                self.end_headers()
+                return
+            if pid == 900 and StubHandler.hits[self.path] == 1:
+                self.send_response(503)
+                self.send_header("Retry-After", "3600")
+                self.end_headers()
+                return
+            if pid == 404:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = {"id": pid, "history": []}
+        else:
+            body = {"entry": int(parts[1]), "event": int(parts[3]), "picks": []}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base():
+    StubHandler.hits = {}
+    StubHandler.in_flight = StubHandler.peak = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_player_details_ordered_with_retry(base):
+    ids = list(range(1, 40))
+    results = get_players_details(ids, base_url=base, concurrency=8,
+                                  rate_per_host=0, backoff=0.01)
+    assert [r["id"] for r in results] == ids
+    assert StubHandler.hits["/element-summary/13/"] == 2
+
+
+def test_failed_requests_return_empty_dict(base):
+    fetcher = BulkFetcher(base_url=base, rate_per_host=0, max_retries=1)
+    results = run_sync(fetcher.player_details([1, 404, 2]))
+    assert results == [{"id": 1, "history": []}, {}, {"id": 2, "history": []}]
+
+
+def test_entry_picks(base):
+    results = get_entries_picks([10, 20], 5, base_url=base, rate_per_host=50)
+    assert [(r["entry"], r["event"]) for r in results] == [(10, 5), (20, 5)]
+
+
+def test_concurrency_is_not_capped_by_the_default_executor(base):
+    # The default executor has at most 32 threads
+    ids = list(range(1000, 1048))
+    results = get_players_details(ids, base_url=base, concurrency=48, rate_per_host=0)
+    assert [r["id"] for r in results] == ids
+    assert StubHandler.peak > 32
+
+
+def test_fetcher_is_reusable_across_event_loops(base):
+    fetcher = BulkFetcher(base_url=base, concurrency=8, rate_per_host=200, backoff=0.01)
+    for _ in range(2):
+        ids = list(range(20, 40))
+        assert [r["id"] for r in run_sync(fetcher.player_details(ids))] == ids
+
+
+def test_retry_after_is_capped(base):
+    fetcher = BulkFetcher(base_url=base, rate_per_host=0, max_delay=0.05)
+    start = time.perf_counter()
+    assert run_sync(fetcher.player_details([900])) == [{"id": 900, "history": []}]
+    assert time.perf_counter() - start < 5
+    assert StubHandler.hits["/element-summary/900/"] == 2
+
+
+def test_breaker_is_private_and_open_breaker_is_not_retried(base):
+    fetcher = BulkFetcher(base_url=base, rate_per_host=0, backoff=0.01)
+    fetcher.session.breaker = CircuitBreaker(threshold=1, reset_after=60)
+    assert run_sync(fetcher.player_details([503])) == [{}]
+    host = base.split("//")[1]
+    assert fetcher.session.breaker.state(host) == "open"
+    assert transport.CIRCUIT_BREAKER.state(host) == "closed"
+    assert fetcher.session.metrics is not transport.TRANSPORT_METRICS
+    assert StubHandler.hits["/element-summary/503/"] == 1
+    assert fetcher.session.metrics.snapshot()["breaker_rejections"] == 1
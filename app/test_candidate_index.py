@@ -0,0 +1,70 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import candidate_index
+from candidate_index import CandidateIndex
+
+
+def make_index(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(['GK', 'DEF', 'MID', 'FW'], n)
+    clubs = np.array([f'C{c}' for c in rng.integers(0, 10, n)])
+    prices = np.round(rng.uniform(4.0, 12.0, n), 1)
+    points = np.round(rng.gamma(2.0, 3.0, n), 1)  # plenty of ties
+    points[rng.integers(0, n, 5)] = np.nan
+    return CandidateIndex(np.arange(1, n + 1), positions, clubs, prices, points)
+
+
+def brute(index, position, max_price, k, exclude_rows=(), exclude_clubs=()):
+    rows = [r for r in range(len(index))
+            if index.position_of(r) == position and index.prices[r] <= max_price + 1e-9
+            and not np.isnan(index.points[r]) and r not in exclude_rows
+            and index.club_of(r) not in exclude_clubs]
+    return sorted(rows, key=lambda r: (-index.points[r], r))[:k]
+
+
+def check_queries(index, rng, n_queries=60):
+    for _ in range(n_queries):
+        pos = str(rng.choice(['GK', 'DEF', 'MID', 'FW']))
+        max_price = float(rng.uniform(3.5, 13.0))
+        k = int(rng.integers(1, 30))
+        excl = set(rng.integers(0, len(index), 40).tolist())
+        clubs = set(rng.integers(0, 10, 3).tolist())
+        assert index.best(pos, max_price, k, excl, clubs) == brute(index, pos, max_price, k,
+                                                                   excl, clubs)
+
+
+@pytest.mark.parametrize('node_k', [2, 32])
+def test_best_matches_brute_force(monkeypatch, node_k):
+    # A tiny NODE_K makes queries descend through truncated nodes
+    monkeypatch.setattr(candidate_index, 'NODE_K', node_k)
+    index = make_index()
+    check_queries(index, np.random.default_rng(1))
+    assert index.best('MID', 3.9, 5) == [] and index.best('XX', 10.0, 5) == []
+
+
+def test_incremental_updates_match_rebuild(monkeypatch):
+    monkeypatch.setattr(candidate_index, 'NODE_K', 4)
+    index = make_index(seed=2)
+    rng = np.random.default_rng(3)
+    for _ in range(200):
+        pid = int(rng.integers(1, len(index) + 1))
+        if rng.random() < 0.5:
+            index.set_price(pid, round(float(index.prices[pid - 1] + rng.choice([-0.1, 0.1, 1.0])), 1))
+        else:
+            index.set_points(pid, float(rng.choice([np.nan, round(rng.gamma(2.0, 3.0), 1)])))
+    # Off-grid price and one beyond every existing band
+    index.set_price(7, 6.55)
+    index.set_price(8, 15.3)
+    assert index.update_prices({9: 5.0, 10: float(index.prices[9]), 99999: 4.0}) == 1
+    check_queries(index, rng)
+    rows = range(len(index))
+    fresh = CandidateIndex(index.ids, [index.position_of(r) for r in rows],
+                           [index.club_names[index.club_of(r)] for r in rows],
+                           index.prices, index.points)
+    for pos in ('GK', 'DEF', 'MID', 'FW'):
+        assert index.best(pos, 20.0, 50) == fresh.best(pos, 20.0, 50)
@@ -0,0 +1,96 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+import engine
+from benchmarks import pointed_at
+from prediction_cache import PredictionCache
+
+
+def write_players(path, ids):
+    rows = [f'{pid},P{pid},{"GK" if pid % 5 == 0 else "MID"},C{pid % 7},{4 + pid % 9}.0'
+            for pid in ids]
+    path.write_text('id,fpl_Player,Position,Team,Price\n' + '\n'.join(rows) + '\n')
+
+
+def test_placeholder_keeps_the_per_player_triangular_draw():
+    ids = np.arange(1, 40_001)
+    preds = engine.predict_points_matrix(len(ids), horizon=3, player_ids=ids)
+    # random.triangular(4, 13, 6) per player, rounded like the old dict version
+    assert preds.min() >= 4 and preds.max() <= 13
+    np.testing.assert_array_equal(preds, np.round(preds, 2))
+    assert abs(preds.mean() - (4 + 6 + 13) / 3) < 0.03
+    reference = np.random.default_rng(0).triangular(4, 6, 13, size=preds.size)
+    np.testing.assert_allclose(np.quantile(preds, [.1, .25, .5, .75, .9]),
+                               np.quantile(reference, [.1, .25, .5, .75, .9]), atol=0.05)
+    # Gameweeks and players are independent draws
+    assert abs(np.corrcoef(preds[:, 0], preds[:, 1])[0, 1]) < 0.02
+    assert len(np.unique(preds[:, 0])) > 800
+
+
+def test_placeholder_depends_only_on_player_id_and_seed():
+    ids = np.array([3, 17, 5, 900, 42])
+    preds = engine.predict_points_matrix(5, horizon=8, player_ids=ids)
+    order = np.argsort(ids)
+    np.testing.assert_array_equal(
+        engine.predict_points_matrix(5, horizon=8, player_ids=ids[order]), preds[order])
+    np.testing.assert_array_equal(
+        engine.predict_points_matrix(2, horizon=3, player_ids=ids[[4, 1]]), preds[[4, 1], :3])
+    other_seed = engine.predict_points_matrix(5, horizon=8, player_ids=ids, seed=7)
+    assert not np.array_equal(other_seed, preds)
+
+
+def test_cached_placeholder_survives_a_reordered_csv(tmp_path):
+    csv = tmp_path / 'players.csv'
+    write_players(csv, [10, 20, 30, 40])
+    cache = PredictionCache(db_path=None)
+    with pointed_at(engine, PLAYERS_CSV=str(csv)):
+        before = engine.predict_points_cached(3, cache=cache)
+        ids_before = engine.get_player_table(str(csv)).ids.tolist()
+
+        write_players(csv, [40, 25, 10, 30, 20])
+        st = os.stat(csv)
+        os.utime(csv, ns=(st.st_atime_ns, st.st_mtime_ns + 10**10))
+        table = engine.get_player_table(str(csv))
+        cached = engine.predict_points_cached(3, cache=cache)
+        fresh = engine.predict_points_cached(3, cache=PredictionCache(db_path=None))
+
+    np.testing.assert_array_equal(cached, fresh)
+    for pid, row in zip(ids_before, before):
+        np.testing.assert_array_equal(cached[table.rows([pid])[0]], row)
+
+
+def test_simulation_uses_fixtures_and_handles_squads_without_a_lineup(tmp_path, monkeypatch):
+    from fixtures import FixtureIndex
+
+    csv = tmp_path / 'players.csv'
+    csv.write_text('id,fpl_Player,Position,Team,Price\n'
+                   '1,Ass A,ASS,ARS,0.5\n2,Ass B,ASS,LIV,0.5\n'
+                   '3,Raya,GK,ARS,5.5\n4,Saka,MID,ARS,10.0\n5,Salah,MID,LIV,13.0\n')
+    teams = [{'id': 1, 'name': 'Arsenal', 'short_name': 'ARS'},
+             {'id': 2, 'name': 'Liverpool', 'short_name': 'LIV'}]
+    index = FixtureIndex.from_fixtures(
+        [{'event': engine.TARGET_GW + 1, 'team_h': 1, 'team_a': 2}], teams)
+    seen = []
+    real = engine.PointsSimulator.from_table
+
+    def from_table(table, means, **kwargs):
+        seen.append(kwargs.get('opponents'))
+        return real(table, means, **kwargs)
+
+    monkeypatch.setattr(engine.PointsSimulator, 'from_table', from_table)
+
+    cache = PredictionCache(db_path=None)
+    with pointed_at(engine, PLAYERS_CSV=str(csv), get_fixture_index=lambda: index,
+                    get_prediction_cache=lambda: cache,
+                    get_recommendations=lambda *a, **k: None):
+        sim = engine.simulate_gw_outcomes([3, 4, 5], n_samples=200)
+        assert sim['xi'] == [3, 4, 5]
+        # ARS and LIV meet: codes 0 and 1 in sorted club order
+        assert seen[-1].ravel().tolist() == [1, 0, 1, 1, 0]
+
+        assert engine.simulate_gw_outcomes([1, 2], n_samples=200) == {}
+        result = engine.analyze_squad(engine.Squad.from_ids([1, 2]), n_samples=200)
+        assert result['simulation'] is None and len(result['squad']) == 2
@@ -0,0 +1,151 @@
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+from features import CONTEXT_COLS, FeaturePipeline, horizon_features
+
+TEAMS = ['ARS', 'CHE', 'LIV', 'MCI']
+
+
+def make_history(n_players=12, gws=8, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for gw in range(1, gws + 1):
+        opp = dict(zip(TEAMS, ['CHE', 'ARS', 'MCI', 'LIV'] if gw % 2 else
+                       ['LIV', 'MCI', 'ARS', 'CHE']))
+        for p in range(n_players):
+            team = TEAMS[p % len(TEAMS)]
+            rows.append({
+                'Season': '2024-25', 'GW': gw, 'Player': f'P{p}', 'Team': team,
+                'Opposition': opp[team], 'Pos': ['GK', 'DEF', 'MID', 'FW'][p % 4],
+                'Price': 4.5 + p / 2, 'Ownership, %': float(rng.uniform(0, 50)),
+                'Selected': int(rng.integers(1000, 100000)),
+                'Gls': int(rng.poisson(0.3)), 'Ast': int(rng.poisson(0.2)),
+                'CS': int(rng.integers(0, 2)), 'Points': int(rng.integers(0, 12)),
+                'Min': int(rng.choice([0, 30, 90])),
+            })
+    return pd.DataFrame(rows)
+
+
+def reference(df, window=5):
+    """Brute-force features with pandas shift/rolling per player and team."""
+    df = df.sort_values('GW', kind='stable').reset_index(drop=True)
+    out = pd.DataFrame(index=df.index)
+    by_player = df.groupby('Player')
+    for stat, name in (('Gls', 'GlsPrev'), ('Ast', 'AstPrev'), ('CS', 'CSPrev'),
+                       ('Points', 'PrevPoints'), ('Min', 'MinPrev')):
+        out[name] = by_player[stat].shift(1)
+    for stat in ('Gls', 'Ast', 'CS', 'Points', 'Min'):
+        out[f'{stat}_last{window}'] = by_player[stat].transform(
+            lambda s: s.shift(1).rolling(window, min_periods=1).mean())
+    totals = df.groupby(['Team', 'GW'])[['Gls', 'Ast']].sum().reset_index()
+    for stat in ('Gls', 'Ast'):
+        totals[stat] = totals.groupby('Team')[stat].transform(
+            lambda s: s.shift(1).rolling(window, min_periods=1).mean())
+    against = df[['Opposition', 'GW']].merge(
+        totals, left_on=['Opposition', 'GW'], right_on=['Team', 'GW'], how='left')
+    for stat in ('Gls', 'Ast'):
+        out[f'against: {stat}'] = against[stat].to_numpy()
+    return out
+
+
+def test_features_match_a_full_recompute_and_the_model_columns():
+    df = make_history()
+    pipe = FeaturePipeline()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', FutureWarning)
+        full = pipe.update(df)
+    expected = reference(df)
+    pd.testing.assert_frame_equal(full[pipe.feature_columns], expected[pipe.feature_columns],
+                                  check_dtype=False)
+    from preprocessing import NUMERIC_FEATS, CAT_FEATS, POS_FEAT
+    assert set(NUMERIC_FEATS + CAT_FEATS + POS_FEAT) <= set(full.columns)
+    assert list(full.columns[-len(pipe.output_columns):]) == pipe.output_columns
+    np.testing.assert_array_equal(full['Min'], df.sort_values('GW', kind='stable')['Min'])
+
+
+def test_incremental_updates_and_save_load_equal_one_pass(tmp_path):
+    df = make_history()
+    full = FeaturePipeline().update(df)
+
+    pipe = FeaturePipeline()
+    parts = [pipe.update(df[df.GW <= 3])]
+    # Overlapping extract: only GWs 4-6 are new
+    parts.append(pipe.update(df[df.GW <= 6]))
+    path = str(tmp_path / 'state.npz')
+    pipe.save(path)
+    assert not os.path.exists(path + '.json')
+    restored = FeaturePipeline.load(path)
+    assert restored.context == pipe.context and restored.last_gw == 6
+    parts.append(restored.update(df))
+    pd.testing.assert_frame_equal(pd.concat(parts, ignore_index=True), full)
+    assert restored.update(df).empty
+
+
+def test_rows_without_a_gw_column_are_the_next_gameweek():
+    df = make_history(gws=3)
+    full = FeaturePipeline().update(df)
+    pipe = FeaturePipeline()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', FutureWarning)
+        parts = [pipe.update(df[df.GW == gw].drop(columns=['GW', 'Season']))
+                 for gw in (1, 2, 3)]
+    assert pipe.last_gw == 3
+    pd.testing.assert_frame_equal(pd.concat(parts, ignore_index=True),
+                                  full.drop(columns=['GW', 'Season']))
+
+
+def test_preview_leaves_the_state_alone_and_fills_context():
+    df = make_history()
+    pipe = FeaturePipeline()
+    pipe.update(df)
+    upcoming = pd.DataFrame({'Player': ['P1', 'New'], 'Team': ['CHE', 'ARS'],
+                             'Opposition': ['ARS', 'LIV']})
+    first = pipe.preview(upcoming)
+    pd.testing.assert_frame_equal(pipe.preview(upcoming), first)
+    last = df[df.GW == 8].set_index('Player').loc['P1']
+    for col in CONTEXT_COLS:
+        assert first.loc[0, col] == last[col]
+    assert first.loc[0, 'Min'] == df[df.Player == 'P1'].Min.tail(5).mean()
+    assert first.loc[1, ['GlsPrev', 'Price', 'Min']].isna().all()
+    assert pipe.last_gw == 8
+
+
+def test_horizon_features_feed_the_model(tmp_path):
+    pytest.importorskip('category_encoders')
+    from fixtures import FixtureIndex
+    from model import RidgeARModel
+    from player_store import get_player_table
+    from preprocessing import build_pipeline, export_artifact, numeric_features
+
+    df = make_history()
+    pipe = FeaturePipeline()
+    train = pipe.update(df).fillna(0.0)
+    cols = numeric_features(train.columns)
+    X = train[cols + ['Team', 'Opposition', 'Pos']]
+    path = str(tmp_path / 'model.joblib')
+    export_artifact(build_pipeline(cols, max_features=8).fit(X, df['Points']), X, path)
+    model = RidgeARModel(path)
+
+    csv = tmp_path / 'players.csv'
+    csv.write_text('id,fpl_Player,Position,Team,Price\n'
+                   '1,P0,GK,ARS,4.5\n2,P1,DEF,CHE,5.0\n3,Unknown,MID,LIV,6.0\n')
+    table = get_player_table(str(csv))
+    teams = [{'id': i + 1, 'name': f'Club {t}', 'short_name': t} for i, t in enumerate(TEAMS)]
+    index = FixtureIndex.from_fixtures(
+        [{'event': 9, 'team_h': 1, 'team_a': 2}, {'event': 9, 'team_h': 3, 'team_a': 4},
+         {'event': 10, 'team_h': 1, 'team_a': 3}], teams)
+    feats = horizon_features(pipe, model, table, [9, 10], index)
+    assert feats.shape == (3, 2, 8)
+    preds = model.predict_horizon(feats)
+    assert preds.shape == (3, 2) and np.isfinite(preds).all()
+
+    frame = pipe.preview(pd.DataFrame({'Player': ['P1'], 'Team': ['CHE'],
+                                       'Opposition': ['ARS'], 'Pos': ['DEF'],
+                                       'Price': [5.0]}))
+    np.testing.assert_allclose(feats[1, 0], model.build_features(frame.fillna(0.0))[0])
@@ -44,11 +44,8 @@ def fetch_and_save_players():
     logging.info("Fetching all players...")
 
     try:
-        # Get bootstrap-static data
-        url = f"{client.BASE_URL}/bootstrap-static/"
-        res = client.session.get(url)
-        res.raise_for_status()
-        data = res.json()
+        # Get bootstrap-static data (shared with every other FPLClient)
+        data = client.get_bootstrap()
         players = data.get("elements", [])
 
         # Convert to DataFrame
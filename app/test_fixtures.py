@@ -0,0 +1,35 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from fixtures import FixtureIndex
+
+TEAMS = [{'id': i, 'name': f'Club {i}', 'short_name': f'C{i}'} for i in range(1, 5)]
+FIXTURES = [
+    {'event': 1, 'team_h': 1, 'team_a': 2, 'team_h_difficulty': 2, 'team_a_difficulty': 4},
+    {'event': 1, 'team_h': 3, 'team_a': 4, 'team_h_difficulty': 3, 'team_a_difficulty': 3},
+    # GW2: club 1 has a double, club 2 blanks
+    {'event': 2, 'team_h': 3, 'team_a': 1, 'team_h_difficulty': 5, 'team_a_difficulty': 2},
+    {'event': 2, 'team_h': 1, 'team_a': 4, 'team_h_difficulty': 2, 'team_a_difficulty': 5},
+    {'event': None, 'team_h': 2, 'team_a': 4},
+]
+
+
+def test_lookups(tmp_path):
+    index = FixtureIndex.from_fixtures(FIXTURES, TEAMS)
+    assert index.fixtures(1, 2) == [(3, False, 2), (4, True, 2)]
+    ids = index.team_ids(['C1', 'Club 2', 3, 'Unknown'])
+    assert ids.tolist() == [1, 2, 3, 0]
+    assert index.n_fixtures(ids, [1, 2, 3]).tolist() == [[1, 2, -1], [1, 0, -1],
+                                                         [1, 1, -1], [-1, -1, -1]]
+    assert index.opponents(ids, [1, 2])[0].tolist() == [2, 3]
+    mult = index.multipliers(ids, [1, 2])
+    assert np.allclose(mult, [[1.1, 2.2], [0.9, 0.0], [1.0, 0.8], [1.0, 1.0]])
+
+    path = str(tmp_path / 'index.npz')
+    index.save(path)
+    loaded = FixtureIndex.load(path)
+    assert np.array_equal(loaded.multipliers(ids, [1, 2]), mult)
+    assert loaded.team_names == index.team_names
@@ -0,0 +1,113 @@
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import engine
+import headless
+from benchmarks import Scale, pointed_at, workload
+from prediction_cache import PredictionCache
+
+
+@pytest.fixture
+def app_data():
+    """Engine pointed at synthetic data, with memory-only caches."""
+    cache = PredictionCache(db_path=None)
+    with workload(Scale(players=300, managers=20)) as w:
+        with pointed_at(engine, GW_JSON=w.gw_json, PLAYERS_CSV=w.players_csv,
+                        get_prediction_cache=lambda: cache,
+                        get_fixture_index=lambda: w.fixture_index,
+                        get_recommendations=lambda *a, **k: None):
+            yield w
+
+
+def test_shared_predictions_are_reused_until_fixtures_change(app_data):
+    first = engine.shared_predictions(3)
+    assert engine.shared_predictions(3) is first
+    assert not first.flags.writeable
+    assert engine.shared_predictions(4) is not first
+    # An unseeded placeholder is never shared
+    assert engine.shared_predictions(3, seed=None) is not engine.shared_predictions(3, seed=None)
+    with pointed_at(engine, get_fixture_index=lambda: None):
+        unadjusted = engine.shared_predictions(3)
+    assert unadjusted is not first
+    np.testing.assert_array_equal(unadjusted, engine.predict_points_cached(3))
+
+
+def test_warm_up_fills_the_shared_caches(app_data):
+    timings = engine.warm_up()
+    assert set(timings) == {'player_table', 'fixture_index', 'prediction_cache',
+                            'predictions', 'candidate_index', 'recommendations'}
+    preds = engine.shared_predictions()
+    with pointed_at(engine, predict_points_cached=None):
+        # Served from the shared matrices, never recomputed
+        assert engine.shared_predictions() is preds
+        assert engine.shared_predictions(1) is not None
+
+
+def test_analyze_squad_matches_the_app_path(app_data):
+    squad = engine.load_squad()
+    assert squad.source == 'json' and squad.ids == app_data.squad
+    result = headless.handle({'samples': 200})
+    current, suggestions = engine.analyze_gw_data(bank=squad.bank)
+    assert result['squad'] == current and result['suggestions'] == suggestions
+    assert len(result['plan']['gameweeks']) == engine.PLAN_HORIZON
+    assert 'totals' not in result['simulation']
+    json.dumps(result)
+
+
+def test_batch_reports_bad_lines_and_continues(app_data):
+    lines = [json.dumps({'ids': app_data.squad, 'samples': 100}), '',
+             '{"ids": "1,2"}', 'not json', json.dumps({'ids': [1], 'horizon': 99})]
+    results = list(headless.run_batch(lines))
+    assert len(results[0]['squad']) == 15
+    assert [r.get('line') for r in results[1:]] == [3, 4, 5]
+
+
+def test_http_api(app_data):
+    server = headless.serve(0, block=False)
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        with urllib.request.urlopen(f"{url}/health") as resp:
+            assert json.load(resp)['status'] == 'ok'
+        body = json.dumps({'ids': app_data.squad, 'captain': app_data.squad[0],
+                           'bank': 2.0, 'samples': 100}).encode()
+        with urllib.request.urlopen(urllib.request.Request(f"{url}/analyze", data=body)) as resp:
+            result = json.load(resp)
+        assert result['bank'] == 2.0 and len(result['squad']) == 15
+        assert [p['is_captain'] for p in result['squad']].count(True) == 1
+        with pytest.raises(urllib.error.HTTPError) as err:
+            urllib.request.urlopen(urllib.request.Request(f"{url}/analyze", data=b'{"bank": []}'))
+        assert err.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_requests_predict_through_the_model_server(app_data, tmp_path, monkeypatch):
+    import model_server
+    from model import RidgeARModel
+
+    monkeypatch.setattr(model_server, '_SERVERS', {})
+    features_path = str(tmp_path / 'features.npy')
+    np.save(features_path, app_data.features)
+    headless.use_model(app_data.model_path, features_path)
+    try:
+        result = headless.handle({'ids': app_data.squad, 'samples': 100})
+    finally:
+        headless.use_model(None)
+    server = model_server.get_model_server(app_data.model_path)
+    assert server.stats()['requests'] >= 1
+    expected = RidgeARModel(app_data.model_path).predict_horizon(app_data.features)
+    table = engine.get_player_table(app_data.players_csv)
+    row = table.rows([result['squad'][0]['id']])[0]
+    # Fixture-adjusted, so compare the unadjusted matrix through the engine
+    with pointed_at(engine, get_fixture_index=lambda: None):
+        raw = engine.predict_points_cached(model=server, features=app_data.features)
+    np.testing.assert_allclose(raw[row], np.round(expected[row], 2))
+    server.close()
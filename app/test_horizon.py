@@ -0,0 +1,238 @@
+import functools
+import itertools
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import candidate_index
+import horizon
+from horizon import HorizonPlanner, lineup_points, plan_horizon, select_xi
+from player_store import PlayerTable
+
+SQUAD_POSITIONS = ['GK'] * 2 + ['DEF'] * 5 + ['MID'] * 5 + ['FW'] * 3
+WIDE = dict(beam_width=256, moves_per_count=200, move_time_budget=5)
+
+
+def make_table(positions, prices, clubs=None):
+    n = len(positions)
+    records = np.empty(n, dtype=[('id', '<i4'), ('name', '<U8'), ('position', '<U3'),
+                                 ('team', '<U8'), ('price', '<f8')])
+    records['id'] = np.arange(1, n + 1)
+    records['name'] = [f'P{i}' for i in range(n)]
+    records['position'] = positions
+    records['team'] = clubs if clubs is not None else [f'C{i % 8}' for i in range(n)]
+    records['price'] = prices
+    return PlayerTable(records)
+
+
+def small_pool(seed, horizon_gws=2):
+    """15-man squad (ids 1-15) plus five extras, with random prices and points."""
+    rng = np.random.default_rng(seed)
+    positions = SQUAD_POSITIONS + list(rng.choice(['GK', 'DEF', 'MID', 'FW'], 5))
+    prices = np.round(rng.uniform(4.0, 8.0, 20), 1)
+    clubs = [f'C{i % 6}' for i in range(15)] + [f'C{c}' for c in rng.integers(0, 6, 5)]
+    table = make_table(positions, prices, clubs)
+    preds = np.round(rng.gamma(2.0, 2.0, (20, horizon_gws)), 2)
+    return table, preds, list(range(1, 16))
+
+
+def valid_squad(table, ids):
+    _, counts = np.unique(table.teams[table.rows(ids)], return_counts=True)
+    return counts.max() <= 3
+
+
+def exhaustive(table, preds, squad, bank, gws, chips=(), ft=1, max_transfers=2):
+    """Best total over every sequence of 0..max_transfers like-for-like moves per GW."""
+    pool = [int(i) for i in table.ids]
+    position = dict(zip(pool, table.positions.tolist()))
+    price = dict(zip(pool, table.prices.tolist()))
+
+    def moves(squad, bank):
+        yield squad, bank, 0
+        others = [p for p in pool if p not in squad]
+        for k in range(1, max_transfers + 1):
+            for outs in itertools.combinations(squad, k):
+                for ins in itertools.permutations(others, k):
+                    if any(position[o] != position[i] for o, i in zip(outs, ins)):
+                        continue
+                    cost = sum(price[i] for i in ins) - sum(price[o] for o in outs)
+                    new = tuple(sorted(set(squad) - set(outs) | set(ins)))
+                    if cost <= bank + 1e-9 and valid_squad(table, new):
+                        yield new, round(bank - cost, 1), k
+
+    @functools.lru_cache(maxsize=None)
+    def lineup(squad, gw, chip):
+        rows = table.rows(squad)
+        return lineup_points(preds[rows, gw], table.positions[rows],
+                             bench_boost=chip == 'bench_boost',
+                             captain_multiplier=3 if chip == 'triple_captain' else 2)[0]
+
+    @functools.lru_cache(maxsize=None)
+    def best(gw, squad, bank, ft, chips):
+        if gw == gws:
+            return 0.0
+        result = -np.inf
+        for new, new_bank, k in moves(squad, bank):
+            hits = max(0, k - ft)
+            for chip in [None] + sorted(chips):
+                rest = best(gw + 1, new, new_bank, min(5, max(ft - k, 0) + 1),
+                            chips - {chip})
+                result = max(result, lineup(new, gw, chip) - 4 * hits + rest)
+        return result
+
+    return round(best(0, tuple(sorted(squad)), bank, ft, frozenset(chips)), 2)
+
+
+def replay(table, preds, squad, plan):
+    """Recompute a plan's points from its steps."""
+    squad = set(squad)
+    total = 0.0
+    for step in plan['gameweeks']:
+        new = squad - {t['out_id'] for t in step['transfers']} | \
+            {t['in_id'] for t in step['transfers']}
+        rows = table.rows(sorted(new))
+        pts, captain = lineup_points(preds[rows, step['gameweek']], table.positions[rows],
+                                     bench_boost=step['chip'] == 'bench_boost',
+                                     captain_multiplier=3 if step['chip'] == 'triple_captain'
+                                     else 2)
+        assert step['captain'] == int(table.ids[rows[captain]])
+        total += pts - 4 * step['hits']
+        if step['chip'] != 'free_hit':
+            squad = new
+    return round(total, 2)
+
+
+def test_select_xi_matches_brute_force():
+    rng = np.random.default_rng(1)
+    positions = np.array(SQUAD_POSITIONS)
+    for _ in range(20):
+        points = np.round(rng.gamma(2.0, 2.0, 15), 2)
+        best = -np.inf
+        for xi in itertools.combinations(range(15), 11):
+            pos = list(positions[list(xi)])
+            if pos.count('GK') == 1 and pos.count('DEF') >= 3 and \
+                    pos.count('MID') >= 2 and pos.count('FW') >= 1:
+                best = max(best, points[list(xi)].sum() + points[list(xi)].max())
+        xi = select_xi(points, positions)
+        total, captain = lineup_points(points, positions)
+        assert len(set(xi)) == 11 and captain in xi
+        assert total == pytest.approx(best)
+    total, _ = lineup_points(points, positions, bench_boost=True, captain_multiplier=3)
+    assert total == pytest.approx(points.sum() + 2 * points.max())
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_two_gameweek_plan_matches_exhaustive_search(seed):
+    table, preds, squad = small_pool(seed)
+    for bank in (0.0, 2.0):
+        plan = HorizonPlanner(table, preds, **WIDE).plan(squad, bank, horizon=2)
+        assert plan['total_points'] == exhaustive(table, preds, squad, bank, 2)
+        assert replay(table, preds, squad, plan) == plan['total_points']
+        assert valid_squad(table, plan['final_squad'])
+
+
+@pytest.mark.parametrize('seed', range(2))
+def test_lineup_chips_match_exhaustive_search(seed):
+    table, preds, squad = small_pool(seed + 10)
+    chips = ('bench_boost', 'triple_captain')
+    without = HorizonPlanner(table, preds, **WIDE).plan(squad, 1.0, horizon=2)
+    plan = HorizonPlanner(table, preds, **WIDE).plan(squad, 1.0, horizon=2, chips=chips)
+    assert plan['total_points'] == exhaustive(table, preds, squad, 1.0, 2, chips)
+    assert plan['total_points'] > without['total_points']
+    assert sorted(s['chip'] for s in plan['gameweeks']) == sorted(chips)
+    assert plan['chips_left'] == [] and without['chips_left'] == []
+    assert replay(table, preds, squad, plan) == plan['total_points']
+
+
+def test_free_hit_reverts_the_squad():
+    table, preds, squad = small_pool(5, horizon_gws=1)
+    extras = [i for i in range(16, 21)]
+    preds[table.rows(extras), 0] = 50.0
+    plan = HorizonPlanner(table, preds, **WIDE).plan(squad, 5.0, horizon=1,
+                                                     chips=['free_hit'])
+    step = plan['gameweeks'][0]
+    assert step['chip'] == 'free_hit' and step['transfers'] and step['hits'] == 0
+    assert plan['final_squad'] == squad and plan['bank'] == 5.0
+    assert plan['free_transfers'] == 2 and plan['chips_left'] == []
+
+
+def test_rolled_free_transfer_avoids_a_hit():
+    # Two starting midfielders blank in GW2; their replacements (ids 16, 17)
+    # only play from GW2, so the best plan rolls GW1's transfer
+    positions = SQUAD_POSITIONS + ['MID', 'MID']
+    table = make_table(positions, [5.0] * 17)
+    gw1 = np.array([5, 1, 4, 4, 4, 2, 1, 5, 5, 5, 3, 3, 6, 6, 1, 0, 0], dtype=float)
+    gw2 = gw1.copy()
+    gw2[[10, 11]] = 0.0
+    gw2[[15, 16]] = 8.0
+    preds = np.column_stack([gw1, gw2])
+    squad = list(range(1, 16))
+
+    plan = HorizonPlanner(table, preds, **WIDE).plan(squad, 0.0, horizon=2)
+    first, second = plan['gameweeks']
+    assert first['transfers'] == [] and second['hits'] == 0
+    assert sorted(t['in_id'] for t in second['transfers']) == [16, 17]
+    assert plan['total_points'] == exhaustive(table, preds, squad, 0.0, 2)
+    assert plan['free_transfers'] == 1
+
+    # The same two moves in GW2 alone cost a hit with one free transfer
+    gw2_only = HorizonPlanner(table, preds[:, 1:], **WIDE)
+    single = gw2_only.plan(squad, 0.0, horizon=1)
+    rolled = gw2_only.plan(squad, 0.0, free_transfers=2, horizon=1)
+    assert single['gameweeks'][0]['hits'] == 1
+    assert rolled['gameweeks'][0]['hits'] == 0
+    assert rolled['total_points'] == single['total_points'] + 4
+
+
+def test_plan_horizon_is_an_lru(monkeypatch):
+    monkeypatch.setattr(horizon, '_CACHE', type(horizon._CACHE)())
+    monkeypatch.setattr(horizon, '_CACHE_SIZE', 2)
+    calls = []
+    real_plan = HorizonPlanner.plan
+
+    def plan(self, *args, **kwargs):
+        calls.append(kwargs['horizon'])
+        return real_plan(self, *args, **kwargs)
+
+    monkeypatch.setattr(HorizonPlanner, 'plan', plan)
+    table, preds, squad = small_pool(0)
+    first = plan_horizon(table, preds, squad, 1.0, horizon=2)
+    assert plan_horizon(table, preds, list(reversed(squad)), 1.0, horizon=2) == first
+    assert len(calls) == 1
+    other = plan_horizon(table, preds + 1.0, squad, 1.0, horizon=2)
+    assert len(calls) == 2
+    # Touch the first plan so the second is the least recently used
+    plan_horizon(table, preds, squad, 1.0, horizon=2)
+    plan_horizon(table, preds, squad, 1.0, horizon=1)
+    assert len(horizon._CACHE) == 2 and len(calls) == 3
+    assert plan_horizon(table, preds, squad, 1.0, horizon=2) == first
+    assert len(calls) == 3
+    assert plan_horizon(table, preds + 1.0, squad, 1.0, horizon=2) == other
+    assert len(calls) == 4
+
+
+def test_plan_horizon_copies_and_follows_the_table(monkeypatch):
+    monkeypatch.setattr(horizon, '_CACHE', type(horizon._CACHE)())
+    table, preds, squad = small_pool(0)
+    first = plan_horizon(table, preds, squad, 1.0, horizon=2)
+    expected = plan_horizon(table, preds, squad, 1.0, horizon=2)
+    first['gameweeks'].clear()
+    first['final_squad'].append(99)
+    assert plan_horizon(table, preds, squad, 1.0, horizon=2) == expected
+
+    # Same ids and predictions, but a refreshed CSV made everyone pricier
+    pricier = make_table(table.positions, table.prices + 0.5, table.teams)
+    plan = plan_horizon(pricier, preds, squad, 1.0, horizon=2)
+    assert len(horizon._CACHE) == 2
+    assert plan == HorizonPlanner(pricier, preds).plan(squad, 1.0, horizon=2)
+
+
+def test_planner_keeps_its_indexes_out_of_the_shared_lru(monkeypatch):
+    monkeypatch.setattr(candidate_index, '_SHARED', type(candidate_index._SHARED)())
+    table, preds, squad = small_pool(0, horizon_gws=4)
+    shared = candidate_index.get_candidate_index(table, preds[:, 0])
+    HorizonPlanner(table, preds).plan(squad, 1.0, horizon=4)
+    assert list(candidate_index._SHARED.values()) == [shared]
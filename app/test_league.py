@@ -0,0 +1,40 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from league import LeagueTracker, live_points
+
+
+def picks(elements, captain, cost=0):
+    return {'entry_history': {'event_transfers_cost': cost},
+            'picks': [{'element': e, 'multiplier': 2 if e == captain else (1 if i < 11 else 0)}
+                      for i, e in enumerate(elements)]}
+
+
+def test_ownership_scores_and_swing():
+    league = LeagueTracker(n_players=50)
+    league.add_gameweek(1, {10: picks(range(1, 16), 1),
+                            20: picks(range(2, 17), 2, cost=4)})
+    eo = league.effective_ownership(1)
+    assert eo[1] == 1.0 and eo[2] == 1.5 and eo[12] == 0.5 and eo[16] == 0.0
+
+    points = live_points({'elements': [{'id': j, 'stats': {'total_points': j}}
+                                       for j in range(1, 20)]})
+    out = league.score_gameweek(1, points)
+    assert out['points'].tolist() == [sum(range(1, 12)) + 1, sum(range(2, 13)) + 2 - 4]
+    assert out['rank_after'].tolist() == [2, 1]
+
+    # GW2 adds a late joiner and a player id outside the initial range
+    league.add_gameweek(2, {10: picks(range(1, 16), 60), 30: picks(range(45, 61), 60)})
+    assert league.effective_ownership(1).shape == (61,)
+    diff = league.differential_exposure(10, 2)
+    # Entry 20 has no GW2 picks, so ownership is over entries 10 and 30
+    assert {j for j, _ in diff['gains']} <= set(range(1, 12))
+    assert all(v == 0.5 for _, v in diff['gains'])
+    assert diff['risks'][0] == (60, -1.0)
+    before = league.totals.copy()
+    swing = league.score_gameweek(2, np.zeros(61))
+    assert np.allclose(swing['total'], before)
+    assert swing['rank_swing'].tolist() == [0, 0, 0]
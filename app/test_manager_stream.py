@@ -0,0 +1,44 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from manager_stream import find_entry, iter_columnar, iter_entries, iter_json_objects, to_columnar
+
+
+def make_entries(n=200):
+    return [{'entry_history': {'event': gw % 38 + 1, 'points': gw * 3, 'bank': gw},
+             'picks': [{'element': gw + i, 'multiplier': 1} for i in range(15)],
+             'total': 1000.5 + gw}
+            for gw in range(n)]
+
+
+def test_array_and_json_lines_match_json_load(tmp_path):
+    entries = make_entries()
+    array_path = tmp_path / 'array.json'
+    array_path.write_text(json.dumps(entries, indent=2))
+    lines_path = tmp_path / 'lines.jsonl'
+    lines_path.write_text('\n'.join(json.dumps(e) for e in entries))
+    for path in (array_path, lines_path):
+        # Tiny chunks force values across chunk boundaries
+        assert list(iter_json_objects(str(path), chunk_chars=37)) == entries
+    single = tmp_path / 'single.json'
+    single.write_text(json.dumps(entries[4]))
+    assert find_entry(str(single), 5) == entries[4]
+    assert find_entry(str(array_path), 7) == entries[6]
+    assert [e['total'] for e in iter_entries(str(lines_path), event=3)] == \
+        [e['total'] for e in entries if e['entry_history']['event'] == 3]
+
+
+def test_columnar_roundtrip(tmp_path):
+    entries = make_entries()
+    path = tmp_path / 'array.json'
+    path.write_text(json.dumps(entries))
+    fields = ['entry_history.event', 'entry_history.points', 'total']
+    assert to_columnar(str(path), str(tmp_path / 'cols'), fields, chunk_rows=64) == len(entries)
+    chunks = list(iter_columnar(str(tmp_path / 'cols'), ['total'], event=3))
+    assert len(chunks) == 4
+    got = np.concatenate([c['total'] for c in chunks])
+    assert got.tolist() == [e['total'] for e in entries if e['entry_history']['event'] == 3]
@@ -0,0 +1,122 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import model_server
+from model_server import ModelServer, ModelServerClosed, get_model_server
+
+
+class StubModel:
+    """Row sums as predictions; records every batch it is asked for."""
+
+    version = 'stub'
+    model = object()
+
+    def __init__(self, delay=0.0, fail_width=None):
+        self.delay = delay
+        self.fail_width = fail_width
+        self.batches = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def predict_future_points(self, features):
+        self.started.set()
+        self.release.wait()
+        time.sleep(self.delay)
+        self.batches.append(features.shape)
+        if features.shape[1] == self.fail_width:
+            raise ValueError('bad width')
+        return features.sum(axis=1)
+
+
+def test_concurrent_requests_are_batched():
+    stub = StubModel()
+    server = ModelServer(stub, max_wait_ms=50)
+    inputs = [np.full((i + 1, 3), float(i)) for i in range(16)]
+    try:
+        with ThreadPoolExecutor(16) as pool:
+            results = list(pool.map(server.predict_future_points, inputs))
+    finally:
+        server.close()
+    for x, y in zip(inputs, results):
+        np.testing.assert_array_equal(y, x.sum(axis=1))
+    assert len(stub.batches) < len(inputs)
+    assert server.stats()['requests'] == len(inputs)
+
+
+def test_requests_are_grouped_by_feature_width_and_errors_stay_in_their_group():
+    stub = StubModel(fail_width=4)
+    server = ModelServer(stub, max_wait_ms=50)
+    inputs = [np.ones((2, 2)), np.ones((3, 3)), np.ones((1, 4)), np.ones((2, 3))]
+    try:
+        with ThreadPoolExecutor(4) as pool:
+            futures = [pool.submit(server.predict_future_points, x) for x in inputs]
+            np.testing.assert_array_equal(futures[0].result(), [2.0, 2.0])
+            np.testing.assert_array_equal(futures[1].result(), [3.0, 3.0, 3.0])
+            np.testing.assert_array_equal(futures[3].result(), [3.0, 3.0])
+            with pytest.raises(ValueError, match='bad width'):
+                futures[2].result()
+    finally:
+        server.close()
+    assert all(len(shape) == 2 for shape in stub.batches)
+    assert {shape[1] for shape in stub.batches} == {2, 3, 4}
+
+
+def test_close_fails_queued_and_new_requests():
+    stub = StubModel()
+    stub.release.clear()
+    server = ModelServer(stub, max_wait_ms=0)
+    with ThreadPoolExecutor(2) as pool:
+        busy = pool.submit(server.predict_future_points, np.ones((1, 2)))
+        assert stub.started.wait(5)
+        queued = pool.submit(server.predict_future_points, np.ones((1, 2)))
+        while server.stats()['queued'] == 0:
+            time.sleep(0.001)
+        server.close()
+        with pytest.raises(ModelServerClosed):
+            queued.result(timeout=5)
+        stub.release.set()
+        # The batch already being predicted still completes
+        np.testing.assert_array_equal(busy.result(timeout=5), [2.0])
+    with pytest.raises(ModelServerClosed):
+        server.predict_future_points(np.ones((1, 2)))
+
+
+def test_dead_worker_and_slow_model_do_not_hang_callers():
+    server = ModelServer(StubModel(), max_wait_ms=0)
+    server._queue.put(None)
+    server._worker.join(5)
+    assert server.closed
+    with pytest.raises(ModelServerClosed):
+        server.predict_future_points(np.ones((1, 2)))
+
+    slow = ModelServer(StubModel(delay=0.5), max_wait_ms=0, timeout=0.05)
+    try:
+        with pytest.raises(TimeoutError):
+            slow.predict_future_points(np.ones((1, 2)))
+    finally:
+        slow.close()
+
+
+def test_get_model_server_reloads_when_the_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_server, '_SERVERS', {})
+    path = tmp_path / 'model.joblib'
+    path.write_bytes(b'not a model')
+    first = get_model_server(str(path))
+    assert get_model_server(str(path)) is first
+    os.utime(path, (time.time() + 10, time.time() + 10))
+    second = get_model_server(str(path))
+    assert second is not first and first.closed
+    with pytest.raises(ModelServerClosed):
+        first.predict_future_points(np.ones((1, 2)))
+    # Placeholder model: zeros, served through the new worker
+    np.testing.assert_array_equal(second.predict_future_points(np.ones((2, 2))), [0.0, 0.0])
+    second.close()
+    assert get_model_server(str(path)) is not second
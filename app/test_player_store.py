@@ -0,0 +1,97 @@
+import glob
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import player_store
+from player_store import get_player_table, load_player_table
+
+CSV = ('id,fpl_Player,Position,Team,Price,Extra\n'
+       '3,Saka,MID,ARS,10.0,x\n'
+       '7,Salah,MID,LIV,13.0,x\n'
+       '3,Saka again,MID,ARS,10.0,x\n'
+       '12,Raya,GK,ARS,5.5,x\n')
+
+
+@pytest.fixture
+def csv_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(player_store, '_TABLES', {})
+    path = tmp_path / 'players.csv'
+    path.write_text(CSV)
+    return str(path)
+
+
+def caches(csv_path):
+    return glob.glob(os.path.join(os.path.dirname(csv_path), '.players.*.npy'))
+
+
+def touch_later(path, seconds=10):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + seconds * 10**9))
+
+
+def test_cache_hit_maps_the_file_without_parsing(csv_path, monkeypatch):
+    table = load_player_table(csv_path)
+    assert table.ids.tolist() == [3, 7, 12]
+    assert table.get(3)['name'] == 'Saka'
+    assert len(caches(csv_path)) == 1
+
+    def parse(_):
+        raise AssertionError('CSV parsed again')
+
+    monkeypatch.setattr(player_store, '_records_from_csv', parse)
+    again = load_player_table(csv_path)
+    assert isinstance(again.records, np.memmap) and not again.records.flags.writeable
+    np.testing.assert_array_equal(again.records, table.records)
+    assert again.digest == table.digest
+
+
+def test_changed_csv_rebuilds_and_drops_the_old_cache(csv_path):
+    first = get_player_table(csv_path)
+    assert get_player_table(csv_path) is first
+    old_cache = caches(csv_path)
+
+    with open(csv_path, 'a') as f:
+        f.write('20,Haaland,FW,MCI,15.0,x\n')
+    touch_later(csv_path)
+    second = get_player_table(csv_path)
+    assert second is not first and 20 in second and 20 not in first
+    assert second.digest != first.digest
+    assert len(caches(csv_path)) == 1 and caches(csv_path) != old_cache
+
+
+def test_digest_follows_content_not_the_file(csv_path, tmp_path):
+    table = load_player_table(csv_path)
+    touch_later(csv_path)
+    assert load_player_table(csv_path).digest == table.digest
+
+    other = tmp_path / 'sub'
+    other.mkdir()
+    (other / 'players.csv').write_text(CSV)
+    assert load_player_table(str(other / 'players.csv')).digest == table.digest
+
+    (other / 'players.csv').write_text(CSV.replace('13.0', '13.5'))
+    touch_later(str(other / 'players.csv'))
+    assert load_player_table(str(other / 'players.csv')).digest != table.digest
+
+
+def test_unreadable_cache_is_rebuilt(csv_path):
+    load_player_table(csv_path)
+    cache, = caches(csv_path)
+    with open(cache, 'wb') as f:
+        f.write(b'garbage')
+    table = load_player_table(csv_path)
+    assert table.ids.tolist() == [3, 7, 12]
+    assert np.load(cache).shape == (3,)
+
+
+def test_lookups(csv_path):
+    table = load_player_table(csv_path)
+    assert table.rows([12, 5, 3, -1, 10**6]).tolist() == [2, -1, 0, -1, -1]
+    assert table.mask([7, 99]).tolist() == [False, True, False]
+    assert table.get(99) == {} and 99 not in table
+    assert table.name_map == {3: 'Saka', 7: 'Salah', 12: 'Raya'}
+    assert table.pos_map[12] == 'GK'
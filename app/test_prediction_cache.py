@@ -0,0 +1,115 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+from prediction_cache import PredictionCache, cached_predict, model_key
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'cache' / 'predictions.sqlite')
+
+
+def test_put_get_round_trip_survives_a_restart(db_path):
+    cache = PredictionCache(db_path)
+    preds = np.arange(12, dtype=float).reshape(4, 3)
+    cache.put_many('2024-25', 5, 'm1', [10, 11, 12, 13], preds)
+    out, hit = cache.get_many('2024-25', 5, 'm1', [12, 99, 10], 2)
+    assert hit.tolist() == [True, False, True]
+    np.testing.assert_array_equal(out[[0, 2]], preds[[2, 0], :2])
+    assert np.isnan(out[1]).all()
+    # Longer horizons than stored are misses
+    assert not cache.get_many('2024-25', 5, 'm1', [10], 4)[1].any()
+
+    reopened = PredictionCache(db_path)
+    out, hit = reopened.get_many('2024-25', 5, 'm1', [13], 3)
+    assert hit.all() and out[0].tolist() == [9.0, 10.0, 11.0]
+    assert not reopened.get_many('2024-25', 6, 'm1', [13], 3)[1].any()
+
+
+def test_memory_tier_is_an_lru_of_blocks(db_path):
+    memory = PredictionCache(db_path=None, max_blocks=2)
+    for gw in (1, 2):
+        memory.put_many('s', gw, 'm', [1], np.ones((1, 2)))
+    memory.get_many('s', 1, 'm', [1], 2)
+    memory.put_many('s', 3, 'm', [1], np.ones((1, 2)))
+    # GW2 was least recently used; without SQLite it is gone
+    assert list(memory._blocks) == [('s', 1, 'm'), ('s', 3, 'm')]
+    assert not memory.get_many('s', 2, 'm', [1], 2)[1].any()
+
+    backed = PredictionCache(db_path, max_blocks=1)
+    backed.put_many('s', 1, 'm', [1], np.ones((1, 2)))
+    backed.put_many('s', 2, 'm', [1], np.full((1, 2), 2.0))
+    assert len(backed._blocks) == 1
+    out, hit = backed.get_many('s', 1, 'm', [1], 2)
+    assert hit.all() and out[0].tolist() == [1.0, 1.0]
+
+
+def test_invalidate_and_keep_only_model(db_path):
+    cache = PredictionCache(db_path)
+    for gw in (1, 2):
+        for model in ('old', 'new'):
+            cache.put_many('s', gw, model, [1, 2], np.ones((2, 1)))
+
+    cache.invalidate(gameweek=1, model_key='new')
+    assert not cache.get_many('s', 1, 'new', [1], 1)[1].any()
+    assert cache.get_many('s', 1, 'old', [1], 1)[1].all()
+    assert PredictionCache(db_path).get_many('s', 2, 'new', [1], 1)[1].all()
+
+    cache.keep_only_model('new')
+    for c in (cache, PredictionCache(db_path)):
+        assert not c.get_many('s', 1, 'old', [1], 1)[1].any()
+        assert not c.get_many('s', 2, 'old', [1], 1)[1].any()
+        assert c.get_many('s', 2, 'new', [1, 2], 1)[1].all()
+
+    cache.invalidate()
+    assert not PredictionCache(db_path).get_many('s', 2, 'new', [1], 1)[1].any()
+
+
+def test_cached_predict_computes_only_misses():
+    cache = PredictionCache(db_path=None)
+    asked = []
+
+    def compute(rows):
+        asked.append(rows.tolist())
+        return np.column_stack([rows, rows + 0.5, rows + 1.0]).astype(float)
+
+    first = cached_predict(cache, 's', 1, 'm', [5, 6], 2, compute)
+    again = cached_predict(cache, 's', 1, 'm', [7, 6, 5], 2, compute)
+    assert asked == [[0, 1], [0]]
+    np.testing.assert_array_equal(again[1:], first[::-1])
+    assert cached_predict(None, 's', 1, 'm', [5], 2, compute).shape == (1, 2)
+
+
+def test_model_key_follows_the_features():
+    features = np.ones((3, 2, 4))
+    key = model_key('abc', features)
+    assert key.startswith('abc-') and key == model_key('abc', features.copy())
+    changed = features.copy()
+    changed[1, 0, 2] = 2.0
+    assert model_key('abc', changed) != key
+    assert model_key('abc', features.reshape(3, 4, 2)) != key
+    assert model_key('def', features) != key
+
+
+def test_refreshed_features_are_not_served_stale(tmp_path):
+    joblib = pytest.importorskip('joblib')
+    from sklearn.linear_model import LinearRegression
+    from model import RidgeARModel
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(50, 3))
+    path = str(tmp_path / 'model.joblib')
+    joblib.dump(LinearRegression().fit(X, X @ [1.0, 2.0, 3.0]), path)
+    model = RidgeARModel(path)
+    cache = PredictionCache(str(tmp_path / 'cache.sqlite'))
+
+    features = rng.normal(size=(4, 2, 3))
+    first = model.predict_players([1, 2, 3, 4], features, 's', 5, cache=cache)
+    np.testing.assert_allclose(first, model.predict_horizon(features))
+    refreshed = features + 1.0
+    second = model.predict_players([1, 2, 3, 4], refreshed, 's', 5, cache=cache)
+    np.testing.assert_allclose(second, model.predict_horizon(refreshed))
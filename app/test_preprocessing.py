@@ -0,0 +1,46 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+pytest.importorskip('category_encoders')
+from model import RidgeARModel
+from preprocessing import build_pipeline, export_artifact, load_artifact, numeric_features
+
+
+def make_frame(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    teams = np.array([f'Club{i}' for i in range(10)])
+    df = pd.DataFrame({
+        'Team': teams[rng.integers(0, 10, n)],
+        'Opposition': teams[rng.integers(0, 10, n)],
+        'Pos': np.array(['GK', 'DEF', 'MID', 'FWD'])[rng.integers(0, 4, n)],
+    })
+    for col in numeric_features(['against: Gls', 'against: Ast', 'against: CS']):
+        df[col] = rng.normal(size=n)
+    df['Points'] = 2 + df['PrevPoints'] + 0.5 * df['Min'] + rng.normal(0, 0.3, n)
+    return df
+
+
+def test_artifact_matches_pipeline(tmp_path):
+    df = make_frame()
+    cols = numeric_features(df.columns)
+    X = df[cols + ['Team', 'Opposition', 'Pos']]
+    pipe = build_pipeline(cols).fit(X, df['Points'])
+    path = str(tmp_path / 'model.joblib')
+    version = export_artifact(pipe, X, path)
+
+    artifact = load_artifact(path)
+    assert artifact.version == version
+    assert len(artifact.fast.outputs) == 15
+    new = make_frame(50, seed=1)
+    new.loc[0, 'Team'] = 'Promoted FC'
+    X_new = new[cols + ['Team', 'Opposition', 'Pos']]
+    assert np.allclose(artifact.predict(X_new), pipe.predict(X_new))
+
+    model = RidgeARModel(path)
+    assert np.allclose(model.predict_frame(X_new), pipe.predict(X_new))
+    assert model.build_features(X_new).shape == (50, 15)
@@ -0,0 +1,62 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from player_store import PlayerTable
+from recommendations import Recommendations, get_recommendations, materialize
+from transfers import TransferPlanner
+
+
+def make_table(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    records = np.empty(n, dtype=[('id', '<i4'), ('name', '<U8'), ('position', '<U3'),
+                                 ('team', '<U3'), ('price', '<f8')])
+    records['id'] = rng.permutation(np.arange(1, 3 * n))[:n]
+    records['name'] = [f'P{i}' for i in range(n)]
+    records['position'] = rng.choice(['GK', 'DEF', 'MID', 'FW'], n, p=[.1, .35, .4, .15])
+    records['team'] = [f'C{c}' for c in rng.integers(0, 8, n)]
+    records['price'] = np.round(rng.uniform(4.0, 12.0, n), 1)
+    preds = np.round(rng.gamma(2.0, 2.0, (n, 3)) + records['price'][:, None] / 3, 2)
+    return PlayerTable(records), preds
+
+
+def squad_of(table, rng):
+    squad = []
+    for pos, k in (('GK', 2), ('DEF', 5), ('MID', 5), ('FW', 3)):
+        squad += rng.choice(table.ids[table.positions == pos], k, replace=False).tolist()
+    return squad
+
+
+def test_transfers_match_the_planner(tmp_path):
+    table, preds = make_table()
+    totals = np.round(preds.sum(axis=1), 2)
+    planner = TransferPlanner.from_table(table, totals)
+    rng = np.random.default_rng(1)
+    # top_k=3 forces the whole-position fallback whenever a list runs dry
+    for top_k in (48, 3):
+        path = materialize(table, preds, '2024-25', 5, f'k{top_k}', out_dir=str(tmp_path),
+                           n_samples=64, top_k=top_k)
+        rec = Recommendations.load(path)
+        for _ in range(25):
+            squad, bank = squad_of(table, rng), float(rng.choice([0.0, 0.5, 2.3]))
+            expected = [t['transfers'][0]['delta_pts'] for t in
+                        planner.plan(squad, bank=bank, max_transfers=1, top_k=5)[1]]
+            got = [round(g, 2) for _, _, g in rec.best_transfers(squad, bank, top_n=5)]
+            assert got == expected
+
+
+def test_captains_and_staleness(tmp_path):
+    table, preds = make_table()
+    materialize(table, preds, '2024-25', 5, 'placeholder-42', out_dir=str(tmp_path), n_samples=64)
+    rec = get_recommendations('2024-25', 5, 'placeholder-42', table, out_dir=str(tmp_path))
+    squad = squad_of(table, np.random.default_rng(2))
+    caps = rec.captains(squad)
+    assert len(caps) == 11 and {c['id'] for c in caps} <= set(squad)
+    assert [c['expected'] for c in caps] == sorted((c['expected'] for c in caps), reverse=True)
+    assert rec.top_captains(1)[0] == int(table.ids[np.argmax(preds[:, 0])])
+
+    other, _ = make_table(seed=5)
+    assert get_recommendations('2024-25', 5, 'placeholder-42', other, str(tmp_path)) is None
+    assert get_recommendations('2024-25', 6, 'placeholder-42', table, str(tmp_path)) is None
@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(__file__))
+from season_stats import StreamStats, season_stats
+
+
+def test_chunked_stats_match_pandas():
+    rng = np.random.default_rng(0)
+    values = np.round(rng.normal(2300, 120, 50_000))
+    stats = StreamStats()
+    parts = [StreamStats() for _ in range(3)]
+    for i, chunk in enumerate(np.array_split(values, 7)):
+        parts[i % 3].update(chunk)
+    for part in parts:
+        stats.merge(part)
+
+    expected = pd.Series(values).describe()
+    got = stats.describe()
+    for key in ('count', 'mean', 'std', 'min', 'max'):
+        assert np.isclose(got[key], expected[key])
+    for key in ('25%', '50%', '75%'):
+        assert abs(got[key] - expected[key]) <= 1.0
+    hist, edges = stats.histogram_bins(50)
+    exp_hist, exp_edges = np.histogram(values, bins=50)
+    assert np.array_equal(hist, exp_hist)
+    assert np.allclose(edges, exp_edges)
+
+
+def test_season_stats_cached_per_file(tmp_path):
+    path = tmp_path / 'managers.json'
+    path.write_text(json.dumps([{'total': t} for t in range(1000, 1500)]))
+    first, digest = season_stats(str(path), cache_dir=str(tmp_path / 'cache'))
+    assert len(os.listdir(tmp_path / 'cache')) == 1
+    second, again = season_stats(str(path), cache_dir=str(tmp_path / 'cache'))
+    assert digest == again
+    assert second.describe() == first.describe()
+
+
+def test_season_stats_follow_the_columnar_data(tmp_path):
+    from manager_stream import to_columnar
+
+    path = tmp_path / 'managers.json'
+    path.write_text(json.dumps([{'total': t} for t in range(1000, 1500)]))
+    columnar = str(tmp_path / 'columnar')
+    to_columnar(str(path), columnar, ['total'])
+    cache = str(tmp_path / 'cache')
+    first, digest = season_stats(str(path), cache_dir=cache, columnar_dir=columnar)
+    assert first.describe()['max'] == 1499
+    assert digest != season_stats(str(path), cache_dir=cache)[1]
+
+    # Re-export different data while the JSON file stays untouched
+    other = tmp_path / 'other.json'
+    other.write_text(json.dumps([{'total': t} for t in range(2000, 2100)]))
+    to_columnar(str(other), columnar, ['total'])
+    second, changed = season_stats(str(path), cache_dir=cache, columnar_dir=columnar)
+    assert changed != digest
+    assert second.describe()['max'] == 2099
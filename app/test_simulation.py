@@ -0,0 +1,73 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from fixtures import FixtureIndex
+from simulation import PointsSimulator, fixture_opponents
+
+
+def make_simulator(n=60, gws=2, seed=0, **kwargs):
+    rng = np.random.default_rng(seed)
+    means = rng.uniform(1, 8, (n, gws))
+    clubs = [f'C{i % 10}' for i in range(n)]
+    positions = np.array(['GK', 'DEF', 'DEF', 'MID', 'MID', 'FW'])[np.arange(n) % 6]
+    return PointsSimulator(means, clubs, positions=positions, ids=np.arange(100, 100 + n),
+                           **kwargs)
+
+
+def test_seeded_and_chunk_independent():
+    sim = make_simulator()
+    squad = list(range(100, 115))
+    a = sim.simulate_squad(squad, n_samples=3000, seed=7, chunk_size=1024)
+    b = sim.simulate_squad(squad, n_samples=3000, seed=7, chunk_size=8192)
+    assert np.array_equal(a['totals'], b['totals'])
+    assert len(a['xi']) == 11 and a['captain'] in a['xi']
+    assert a['captains'][0]['expected_total'] >= a['captains'][-1]['expected_total']
+
+
+def test_means_and_teammate_correlation():
+    sim = make_simulator(team_corr=0.5, fixture_corr=0.0)
+    pool = sim.simulate_pool(n_samples=20_000, seed=1, gameweeks=[0])
+    assert np.allclose(pool['mean'], sim.means[:, 0], rtol=0.05)
+    pts = next(sim.sample(np.array([0, 10, 1]), n_samples=8192, seed=2))[:, :, 0]
+    corr = np.corrcoef(pts.T)
+    # Rows 0 and 10 share club C0; row 1 plays for C1
+    assert corr[0, 1] > 0.3 and abs(corr[0, 2]) < 0.05
+
+
+def test_fixture_opponents_share_a_match_shock():
+    teams = [{'id': i, 'name': f'Club {i}', 'short_name': f'C{i}'} for i in range(1, 5)]
+    index = FixtureIndex.from_fixtures(
+        [{'event': 1, 'team_h': 1, 'team_a': 2}, {'event': 1, 'team_h': 3, 'team_a': 5},
+         {'event': 2, 'team_h': 1, 'team_a': 3}], teams)
+    clubs = ['C1', 'C2', 'Club 3', 'C4', 'Nowhere']
+    opp = fixture_opponents(clubs, index, [1, 2, 3])
+    # Codes follow sorted club names: C1, C2, C4, Club 3, Nowhere
+    assert opp.tolist() == [
+        [1, 3, 0],    # C1: C2, then Club 3; GW3 is past the index
+        [0, -1, 1],   # C2 blanks in GW2
+        [3, 0, 3],    # Club 3 plays a team the index has no club for
+        [-1, -1, 2],  # C4 blanks in both known gameweeks
+        [4, 4, 4],    # unknown club
+    ]
+
+    means = np.full((6, 1), 5.0)
+    sim = PointsSimulator(means, ['C1', 'C1', 'C2', 'C4', 'C2', 'C4'], team_corr=0.0,
+                          fixture_corr=0.6,
+                          opponents=fixture_opponents(['C1', 'C1', 'C2', 'C4', 'C2', 'C4'],
+                                                      index, [1]))
+    pts = next(sim.sample(np.arange(6), n_samples=8192, seed=3))[:, :, 0]
+    corr = np.corrcoef(pts[:, :3].T)
+    # C1 and C2 meet in GW1; C4 blanks and scores nothing
+    assert corr[0, 2] > 0.3 and corr[0, 1] > 0.3
+    assert (pts[:, 3] == 0).all()
+
+
+def test_squad_without_a_lineup_is_empty():
+    sim = PointsSimulator(np.full(6, 4.0), ['C1'] * 6, positions=['ASS'] * 5 + ['MID'],
+                          ids=np.arange(6))
+    assert sim.simulate_squad([0, 1, 2]) == {}
+    with_rival = sim.simulate_squad([5], n_samples=100, seed=1, rival_ids=[0, 1])
+    assert with_rival['xi'] == [5] and 'p_beat_rival' not in with_rival
@@ -0,0 +1,94 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(__file__))
+from api_client import BootstrapCache, FPLClient
+from snapshot_store import RecordingSession, SnapshotStore, url_kind
+
+BOOTSTRAP = {'events': [{'id': 7, 'is_current': True}], 'teams': [],
+             'elements': [{'id': 1, 'web_name': 'A', 'element_type': 3, 'team': 1,
+                           'now_cost': 55}]}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if 'bootstrap-static' in self.path:
+            body = BOOTSTRAP
+        elif 'fixtures' in self.path:
+            body = [{'event': 8, 'team_h': 1, 'team_a': 2}]
+        else:
+            body = {'path': self.path}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_record_then_replay(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}/api'
+    try:
+        store = SnapshotStore(tmp_path)
+        live = FPLClient(BootstrapCache(), BootstrapCache(), session=RecordingSession(store))
+        live.BASE_URL = base
+        players = live.get_bootstrap()['elements']
+        fixtures = live.get_fixtures()
+        details = live.get_player_details(1)
+        picks_url = f'{base}/entry/9/event/6/picks/'
+        live.session.get(picks_url)
+    finally:
+        server.shutdown()
+
+    kinds = {e['kind']: e['gameweek'] for e in store.entries()}
+    assert kinds == {'bootstrap': 7, 'fixtures': 7, 'element-summary': 7, 'picks': 6}
+    assert url_kind(picks_url) == 'picks'
+
+    replay = FPLClient.replay(SnapshotStore(tmp_path))
+    replay.BASE_URL = base
+    assert replay.get_bootstrap()['elements'] == players
+    assert replay.get_fixtures() == fixtures
+    assert replay.get_player_details(1) == details
+    assert replay.session.get(f'{base}/element-summary/2/').status_code == 404
+    # As of GW6 only the picks existed
+    early = FPLClient.replay(SnapshotStore(tmp_path), gameweek=6)
+    assert early.session.get(picks_url).status_code == 200
+    assert early.session.get(f'{base}/fixtures/').status_code == 404
+
+
+def test_recording_after_shared_cache_is_warm(tmp_path, monkeypatch):
+    import api_client
+    import requests
+
+    monkeypatch.setattr(api_client, 'BOOTSTRAP_CACHE', BootstrapCache())
+    monkeypatch.setattr(api_client, 'FIXTURES_CACHE', BootstrapCache(name='fixtures'))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}/api'
+    try:
+        plain = FPLClient(session=requests.Session())
+        plain.BASE_URL = base
+        plain.get_bootstrap()
+        plain.get_fixtures()
+        assert api_client.BOOTSTRAP_CACHE._data is not None
+
+        store = SnapshotStore(tmp_path)
+        recorder = FPLClient.recording(store)
+        recorder.BASE_URL = base
+        assert recorder.bootstrap_cache is not api_client.BOOTSTRAP_CACHE
+        recorder.get_bootstrap()
+        recorder.get_fixtures()
+        recorder.get_player_details(1)
+    finally:
+        server.shutdown()
+
+    kinds = {e['kind']: e['gameweek'] for e in store.entries()}
+    assert kinds == {'bootstrap': 7, 'fixtures': 7, 'element-summary': 7}
@@ -0,0 +1,20 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+from startup import ENTRY_POINTS, cold_start, report, slowest_imports
+
+
+def test_app_entry_points_defer_heavy_imports():
+    for name in ('engine', 'headless', 'suggestions', 'model', 'visualisation'):
+        result = cold_start(ENTRY_POINTS[name], runs=1)
+        assert result['seconds'] > 0
+        assert not {'pandas', 'streamlit', 'matplotlib', 'bokeh', 'scipy',
+                    'joblib'} & set(result['heavy']), name
+
+
+def test_report_and_slowest_imports():
+    results = {'engine': cold_start('import engine', runs=1)}
+    assert report(results).splitlines()[1].startswith('engine')
+    rows = slowest_imports('import engine', top=5)
+    assert rows[0]['module'] == 'engine' and len(rows) <= 5
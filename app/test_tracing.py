@@ -0,0 +1,70 @@
+import json
+import os
+import sys
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+import tracing
+from tracing import count, span, traced
+
+
+@pytest.fixture
+def enabled():
+    was = tracing.ENABLED
+    tracing.enable(True)
+    tracing.METRICS.reset()
+    yield
+    tracing.enable(was)
+    tracing.METRICS.reset()
+
+
+@traced('test.work')
+def work(n):
+    with span('test.inner'):
+        count('test.items', n)
+        return sum(range(n))
+
+
+def test_disabled_records_nothing():
+    was = tracing.ENABLED
+    tracing.enable(False)
+    try:
+        tracing.METRICS.reset()
+        with tracing.request('req') as trace:
+            assert work(10) == 45
+        assert trace is None
+        assert span('x') is span('y')
+        assert tracing.METRICS.snapshot() == {'spans': {}, 'counters': {}}
+    finally:
+        tracing.enable(was)
+
+
+def test_request_trace_nesting_and_profile(enabled, tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, 'METRICS_FILE', str(tmp_path / 'metrics.json'))
+    with tracing.request('req', profile=True) as trace:
+        work(100)
+        work(5)
+    spans = trace.to_dict()['spans']
+    assert [(s['name'], s['depth']) for s in spans] == [
+        ('req', 0), ('test.work', 1), ('test.inner', 2), ('test.work', 1), ('test.inner', 2)]
+    assert tracing.last_trace() is trace
+    assert 'work' in trace.profile
+
+    snap = tracing.snapshot()
+    assert snap['spans']['test.work']['count'] == 2
+    assert snap['counters'] == {'test.items': 105}
+    written = json.loads((tmp_path / 'metrics.json').read_text())
+    assert written['counters'] == {'test.items': 105} and written['traces']
+
+
+def test_metrics_endpoint(enabled):
+    work(3)
+    server = tracing.serve_metrics(0)
+    base = f'http://127.0.0.1:{server.server_port}'
+    text = urllib.request.urlopen(f'{base}/metrics').read().decode()
+    assert 'fpl_span_calls_total{span="test.work"} 1' in text
+    assert 'fpl_events_total{name="test.items"} 3' in text
+    data = json.loads(urllib.request.urlopen(f'{base}/metrics.json').read())
+    assert data['spans']['test.inner']['count'] == 1 and 'transport' in data
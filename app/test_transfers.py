@@ -0,0 +1,59 @@
+import itertools
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+from transfers import TransferPlanner
+
+
+def make_pool(n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    positions = np.array(['GK', 'DEF', 'MID', 'FW'])[rng.integers(0, 4, n)]
+    clubs = np.array([f'C{i}' for i in rng.integers(0, 6, n)])
+    prices = np.round(rng.uniform(4.0, 12.0, n), 1)
+    points = np.round(prices * 2 + rng.normal(0, 3, n), 2)
+    return TransferPlanner(np.arange(1, n + 1), [f'P{i}' for i in range(n)],
+                           positions, clubs, prices, points)
+
+
+def brute_force(planner, squad_ids, bank, k, free_transfers=1):
+    rows = [int(np.flatnonzero(planner.ids == pid)[0]) for pid in squad_ids]
+    pool = [r for r in range(len(planner.ids)) if r not in rows]
+    best = []
+    for outs in itertools.combinations(rows, k):
+        for ins in itertools.permutations(pool, k):
+            if any(planner.positions[o] != planner.positions[i] for o, i in zip(outs, ins)):
+                continue
+            new_squad = [r for r in rows if r not in outs] + list(ins)
+            _, counts = np.unique(planner.clubs[new_squad], return_counts=True)
+            spend = planner.prices[list(ins)].sum() - planner.prices[list(outs)].sum()
+            if counts.max() > 3 or spend > bank + 1e-9:
+                continue
+            gain = planner.points[list(ins)].sum() - planner.points[list(outs)].sum()
+            best.append(round(gain - 4 * max(0, k - free_transfers), 2))
+    return sorted(set(best), reverse=True)
+
+
+def test_matches_brute_force():
+    planner = make_pool()
+    squad_ids = [int(planner.ids[r]) for r in range(0, 60, 6)]
+    for bank in (0.0, 1.5):
+        plans = planner.plan(squad_ids, bank, max_transfers=2, top_k=3, time_budget=5)
+        for k in (1, 2):
+            expected = brute_force(planner, squad_ids, bank, k)
+            assert plans[k][0]['net_gain'] == expected[0]
+            assert all(p['bank_after'] >= -1e-9 for p in plans[k])
+            assert [p['net_gain'] for p in plans[k]] == sorted(
+                (p['net_gain'] for p in plans[k]), reverse=True)
+
+
+def test_incremental_callback_sees_final_best():
+    planner = make_pool(seed=3)
+    squad_ids = [int(planner.ids[r]) for r in range(0, 60, 5)]
+    seen = []
+    plans = planner.plan(squad_ids, 1.0, max_transfers=3, top_k=2,
+                         on_plan=lambda k, p: seen.append((k, p['net_gain'])))
+    for k, best in plans.items():
+        assert (k, best[0]['net_gain']) in seen
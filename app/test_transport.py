@@ -0,0 +1,137 @@
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(__file__))
+from transport import CircuitBreaker, CircuitOpenError, ResilientSession, TransportMetrics
+
+
+class Handler(BaseHTTPRequestHandler):
+    hits = {}
+
+    def do_GET(self):
+        n = Handler.hits[self.path] = Handler.hits.get(self.path, 0) + 1
+        if self.path == '/throttled/':
+            self.send_response(429)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.path == '/garbled/':
+            self.send_response(200)
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', '9')
+            self.end_headers()
+            self.wfile.write(b'not gzip!')
+            return
+        if self.path == '/flaky/' and n <= 2 or self.path == '/down/':
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = gzip.compress(json.dumps({'path': self.path, 'pad': 'x' * 5000}).encode())
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        Handler.hits[self.path] = Handler.hits.get(self.path, 0) + 1
+        self.send_response(503)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def base():
+    Handler.hits = {}
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+def make_session(**kwargs):
+    kwargs.setdefault('backoff', 0.01)
+    return ResilientSession(breaker=CircuitBreaker(threshold=3, reset_after=60),
+                            metrics=TransportMetrics(), **kwargs)
+
+
+def test_retries_then_succeeds_and_decodes_gzip(base):
+    session = make_session()
+    res = session.get(f'{base}/flaky/')
+    assert res.status_code == 200 and res.json()['path'] == '/flaky/'
+    stats = session.metrics.snapshot()
+    assert stats['retries'] == 2 and stats['status'] == {'503': 2, '200': 1}
+    assert stats['bytes_wire'] < stats['bytes_decoded']
+
+
+def test_breaker_fails_fast(base):
+    session = make_session(max_retries=1)
+    # Two failed attempts, then the third opens the breaker mid-retry
+    assert session.get(f'{base}/down/').status_code == 503
+    with pytest.raises(CircuitOpenError):
+        session.get(f'{base}/down/')
+    with pytest.raises(CircuitOpenError):
+        session.get(f'{base}/flaky/')
+    assert isinstance(CircuitOpenError(), requests.ConnectionError)
+    assert session.metrics.snapshot()['breaker_opens'] >= 1
+
+
+def test_deadline_bounds_retries(base):
+    session = make_session(max_retries=50, backoff=0.05, deadline=0.3)
+    session.breaker = CircuitBreaker(threshold=1000)
+    assert session.get(f'{base}/down/').status_code == 503
+    assert session.metrics.snapshot()['attempts'] < 50
+
+
+def test_only_idempotent_methods_are_retried(base):
+    session = make_session(max_retries=3)
+    session.breaker = CircuitBreaker(threshold=1000)
+    assert session.post(f'{base}/login/', data={'password': 'x'}).status_code == 503
+    assert Handler.hits['/login/'] == 1
+    assert session.post(f'{base}/opt-in/', retry=True).status_code == 503
+    assert Handler.hits['/opt-in/'] == 4
+    assert session.get(f'{base}/flaky/', retry=False).status_code == 503
+    assert Handler.hits['/flaky/'] == 1
+
+
+def test_streamed_bodies_are_not_read_for_metrics(base):
+    session = make_session()
+    res = session.get(f'{base}/stream/', stream=True)
+    assert not res._content_consumed
+    stats = session.metrics.snapshot()
+    assert stats['bytes_wire'] == int(res.headers['Content-Length'])
+    assert stats['bytes_decoded'] == 0
+    assert res.json()['path'] == '/stream/'
+
+
+@pytest.mark.parametrize('path', ['/throttled/', '/garbled/'])
+def test_inconclusive_half_open_trial_is_released(base, path):
+    session = make_session(max_retries=0)
+    session.breaker = CircuitBreaker(threshold=1, reset_after=0.05)
+    host = base.split('//')[1]
+    session.breaker.failure(host)
+    time.sleep(0.06)
+    assert session.breaker.state(host) == 'half-open'
+    if path == '/throttled/':
+        assert session.get(f'{base}{path}').status_code == 429
+    else:
+        with pytest.raises(requests.exceptions.ContentDecodingError):
+            session.get(f'{base}{path}')
+    # Neither outcome closes or re-opens the breaker, but the next trial may run
+    assert session.breaker.state(host) == 'half-open'
+    assert session.get(f'{base}/ok/').status_code == 200
+    assert session.breaker.state(host) == 'closed'
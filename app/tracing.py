@@ -0,0 +1,329 @@
+"""Span timers, counters and per-request traces for the app's hot paths.
+
+Tracing is off unless ``FPL_TRACE=1`` (or ``enable()``); while off,
+``span`` returns a shared no-op context manager, ``traced`` functions call
+straight through and ``count`` returns at once, so instrumented code pays
+one global flag check per call.
+
+While on, every span feeds process-wide per-name stats (``snapshot``),
+and spans inside a ``request`` are also recorded in order, with their
+nesting depth, as that request's trace. A request can additionally run
+under cProfile. Metrics are exported as JSON (``write_metrics``, or the
+``FPL_METRICS_FILE`` written after each request) and over HTTP
+(``serve_metrics``, started by the app when ``FPL_METRICS_PORT`` is set).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+ENABLED = os.environ.get("FPL_TRACE", "") not in ("", "0")
+METRICS_FILE = os.environ.get("FPL_METRICS_FILE")
+# Requests whose traces are kept for the debug panel
+TRACE_HISTORY = 20
+SPAN_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+# Rows of cProfile output kept per profiled request
+PROFILE_LINES = 40
+
+
+def enable(on: bool = True) -> None:
+    global ENABLED
+    ENABLED = on
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NO_SPAN = _NoSpan()
+_local = threading.local()
+
+
+class Metrics:
+    """Thread-safe per-span timing stats and named counters."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans: Dict[str, List] = {}
+            self._counters: Dict[str, float] = {}
+
+    def observe(self, name: str, seconds: float) -> None:
+        ms = seconds * 1000.0
+        bucket = next((i for i, b in enumerate(SPAN_BUCKETS_MS) if ms <= b),
+                      len(SPAN_BUCKETS_MS))
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                stats = self._spans[name] = [0, 0.0, 0.0, [0] * (len(SPAN_BUCKETS_MS) + 1)]
+            stats[0] += 1
+            stats[1] += ms
+            stats[2] = max(stats[2], ms)
+            stats[3][bucket] += 1
+
+    def incr(self, name: str, n: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def snapshot(self) -> Dict:
+        labels = [f"<={b}" for b in SPAN_BUCKETS_MS] + [f">{SPAN_BUCKETS_MS[-1]}"]
+        with self._lock:
+            spans = {
+                name: {
+                    "count": n,
+                    "total_ms": round(total, 3),
+                    "mean_ms": round(total / n, 3),
+                    "max_ms": round(peak, 3),
+                    "buckets_ms": dict(zip(labels, buckets)),
+                }
+                for name, (n, total, peak, buckets) in sorted(self._spans.items())
+            }
+            counters = dict(sorted(self._counters.items()))
+        return {"spans": spans, "counters": counters}
+
+
+class Trace:
+    """Spans of one request in completion order, plus optional profile text."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.total_ms = 0.0
+        self.spans: List[Dict] = []
+        self.profile: Optional[str] = None
+        self.depth = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "total_ms": round(self.total_ms, 3),
+            # Start order reads as a call tree
+            "spans": sorted(self.spans, key=lambda s: s["start_ms"]),
+            "profile": self.profile,
+        }
+
+
+class _Span:
+    __slots__ = ("name", "start", "trace", "depth")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self):
+        self.trace = getattr(_local, "trace", None)
+        if self.trace is not None:
+            self.depth = self.trace.depth
+            self.trace.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        elapsed = time.perf_counter() - self.start
+        METRICS.observe(self.name, elapsed)
+        trace = self.trace
+        if trace is not None:
+            trace.depth -= 1
+            trace.spans.append({
+                "name": self.name,
+                "depth": self.depth,
+                "start_ms": round((self.start - trace._t0) * 1000.0, 3),
+                "duration_ms": round(elapsed * 1000.0, 3),
+            })
+        return False
+
+
+def span(name: str):
+    """Context manager timing the block as ``name`` (no-op when disabled)."""
+    if not ENABLED:
+        return _NO_SPAN
+    return _Span(name)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator timing every call as a span (``module.function`` by default)."""
+    def decorate(func: Callable) -> Callable:
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with _Span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name: str, n: float = 1) -> None:
+    """Add ``n`` to counter ``name`` (no-op when disabled)."""
+    if ENABLED:
+        METRICS.incr(name, n)
+
+
+@contextlib.contextmanager
+def request(name: str, profile: bool = False) -> Iterator[Optional[Trace]]:
+    """Record one request's spans as a Trace, optionally under cProfile.
+
+    Yields None (and records nothing) while tracing is disabled. Finished
+    traces are kept in ``TRACES``; ``METRICS_FILE`` is rewritten if set.
+    """
+    if not ENABLED:
+        yield None
+        return
+    trace = Trace(name)
+    outer = getattr(_local, "trace", None)
+    _local.trace = trace
+    profiler = None
+    if profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+    try:
+        with _Span(name):
+            if profiler is not None:
+                profiler.enable()
+            try:
+                yield trace
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+    finally:
+        _local.trace = outer
+        trace.total_ms = (time.perf_counter() - trace._t0) * 1000.0
+        if profiler is not None:
+            import io
+            import pstats
+
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            trace.profile = out.getvalue()
+        with _TRACES_LOCK:
+            TRACES.append(trace)
+        if METRICS_FILE:
+            write_metrics(METRICS_FILE)
+
+
+def last_trace() -> Optional[Trace]:
+    with _TRACES_LOCK:
+        return TRACES[-1] if TRACES else None
+
+
+def snapshot() -> Dict:
+    """Span stats, counters and HTTP transport metrics as one dict."""
+    from transport import TRANSPORT_METRICS
+
+    out = METRICS.snapshot()
+    out["enabled"] = ENABLED
+    out["transport"] = TRANSPORT_METRICS.snapshot()
+    return out
+
+
+def write_metrics(path: str) -> None:
+    """Atomically write ``snapshot()`` plus recent traces as JSON."""
+    with _TRACES_LOCK:
+        traces = [t.to_dict() for t in TRACES]
+    data = dict(snapshot(), traces=[dict(t, profile=None) for t in traces])
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, path)
+    except OSError as e:
+        logging.warning(f"Could not write metrics file '{path}': {e}")
+
+
+def prometheus_text() -> str:
+    """``snapshot()`` in the Prometheus text exposition format."""
+    snap = snapshot()
+    lines = ["# TYPE fpl_span_calls_total counter",
+             "# TYPE fpl_span_seconds_total counter",
+             "# TYPE fpl_span_seconds_max gauge"]
+    for name, s in snap["spans"].items():
+        lines.append(f'fpl_span_calls_total{{span="{name}"}} {s["count"]}')
+        lines.append(f'fpl_span_seconds_total{{span="{name}"}} {s["total_ms"] / 1000.0:.6f}')
+        lines.append(f'fpl_span_seconds_max{{span="{name}"}} {s["max_ms"] / 1000.0:.6f}')
+    lines.append("# TYPE fpl_events_total counter")
+    for name, n in snap["counters"].items():
+        lines.append(f'fpl_events_total{{name="{name}"}} {n}')
+    lines.append("# TYPE fpl_http_total counter")
+    for key in ("requests", "attempts", "retries", "failures", "breaker_opens",
+                "breaker_rejections", "bytes_wire", "bytes_decoded"):
+        lines.append(f'fpl_http_total{{kind="{key}"}} {snap["transport"][key]}')
+    return "\n".join(lines) + "\n"
+
+
+def _metrics_handler():
+    # Deferred so importing tracing does not load http.server
+    from http.server import BaseHTTPRequestHandler
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path == "/metrics":
+                body, kind = prometheus_text().encode(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, kind = json.dumps(snapshot()).encode(), "application/json"
+            elif self.path == "/traces.json":
+                with _TRACES_LOCK:
+                    traces = [t.to_dict() for t in TRACES]
+                body, kind = json.dumps(traces).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", kind)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    return _MetricsHandler
+
+
+_SERVER: Optional[ThreadingHTTPServer] = None
+_SERVER_LOCK = threading.Lock()
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics, /metrics.json and /traces.json from a daemon thread.
+
+    Only one server runs per process; later calls return the first one.
+    """
+    from http.server import ThreadingHTTPServer
+
+    global _SERVER
+    with _SERVER_LOCK:
+        if _SERVER is None:
+            _SERVER = ThreadingHTTPServer((host, port), _metrics_handler())
+            threading.Thread(target=_SERVER.serve_forever, name="fpl-metrics",
+                             daemon=True).start()
+            logging.info(f"Serving metrics on http://{host}:{_SERVER.server_port}/metrics")
+        return _SERVER
+
+
+METRICS = Metrics()
+TRACES: deque = deque(maxlen=TRACE_HISTORY)
+_TRACES_LOCK = threading.Lock()
@@ -0,0 +1,351 @@
+"""Budget- and club-aware transfer planning over the full player pool."""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import time
+from functools import cached_property
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from candidate_index import CandidateIndex, get_candidate_index
+
+HIT_COST = 4.0
+MAX_PER_CLUB = 3
+# Price weights for the budget bound, relative to median points per £m
+LAMBDA_GRID = np.concatenate([[0.0], np.geomspace(0.05, 20.0, 23)])
+
+
+class TransferPlanner:
+    """Find the best 1..N transfer plans with branch and bound.
+
+    The pool is given as parallel arrays (one entry per player). A plan swaps
+    squad players for pool players of the same position, keeps the bank
+    non-negative and respects the per-club limit; plans are ranked by
+    predicted points gained minus hits for transfers beyond the free ones.
+
+    Single transfers are read off a ``CandidateIndex``. For more transfers,
+    candidates that are beaten on both price and points by players from
+    enough distinct clubs can never appear in an optimal plan and are pruned
+    up front, which leaves a few dozen per position.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[int],
+        names: Sequence[str],
+        positions: Sequence[str],
+        clubs: Sequence[str],
+        prices: Sequence[float],
+        points: Sequence[float],
+    ) -> None:
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.names = np.asarray(names)
+        self.positions = np.asarray(positions)
+        self.clubs = np.asarray(clubs)
+        _, self._club_ids = np.unique(self.clubs, return_inverse=True)
+        self.prices = np.asarray(prices, dtype=float)
+        self.points = np.asarray(points, dtype=float)
+        self._row_of = {int(pid): r for r, pid in enumerate(self.ids.tolist())}
+
+    @classmethod
+    def from_table(cls, table, points: Sequence[float], shared: bool = True) -> 'TransferPlanner':
+        """Build a planner over a ``PlayerTable`` and per-row predicted points.
+
+        With ``shared`` the candidate index comes from the process-wide LRU;
+        otherwise the planner builds a private one on first use.
+        """
+        planner = cls(table.ids, table.names, table.positions, table.teams,
+                      table.prices, points)
+        if shared:
+            # Reuse the process-wide index for this table and these points
+            planner.index = get_candidate_index(table, planner.points)
+        return planner
+
+    @cached_property
+    def index(self) -> CandidateIndex:
+        return CandidateIndex(self.ids, self.positions, self.clubs, self.prices, self.points)
+
+    def plan(
+        self,
+        squad_ids: Iterable[int],
+        bank: float,
+        max_transfers: int = 3,
+        free_transfers: int = 1,
+        hit_cost: float = HIT_COST,
+        top_k: int = 5,
+        time_budget: float = 0.5,
+        max_per_club: int = MAX_PER_CLUB,
+        on_plan: Optional[Callable[[int, Dict], None]] = None,
+    ) -> Dict[int, List[Dict]]:
+        """Return the ``top_k`` plans for each transfer count 1..max_transfers.
+
+        ``on_plan(n, plan)`` is called whenever a plan enters the current
+        top-k for ``n`` transfers, so callers can show results before the
+        search finishes. The search stops at ``time_budget`` seconds and
+        returns the best plans found so far.
+        """
+        deadline = time.perf_counter() + time_budget
+        squad = np.array([self._row_of[pid] for pid in squad_ids if pid in self._row_of],
+                         dtype=np.int64)
+        counts = np.bincount(self._club_ids[squad], minlength=self._club_ids.max() + 1)
+
+        results: Dict[int, List[Dict]] = {}
+        if len(squad) and max_transfers >= 1:
+            hits = max(0, 1 - free_transfers)
+            results[1] = []
+            for o, i, _ in self.index.single_transfers(self.ids[squad], bank, top_k, max_per_club):
+                plan = self._describe(((o, i),), float(self.prices[i] - self.prices[o]),
+                                      bank, hits, hit_cost)
+                results[1].append(plan)
+                if on_plan is not None:
+                    on_plan(1, plan)
+        if max_transfers < 2 or len(squad) < 2:
+            return results
+
+        cands = self._prune_candidates(squad, max_transfers, max_per_club)
+        for k in range(2, min(max_transfers, len(squad)) + 1):
+            hits = max(0, k - free_transfers)
+            heap: List[Tuple[float, int, Tuple]] = []
+            complete = self._search(
+                k, squad, cands, counts, bank, hits * hit_cost, top_k,
+                max_per_club, deadline, heap,
+                None if on_plan is None else
+                lambda pairs, spend, k=k, hits=hits: on_plan(
+                    k, self._describe(pairs, spend, bank, hits, hit_cost)),
+            )
+            results[k] = [
+                self._describe(pairs, spend, bank, hits, hit_cost)
+                for _, _, (pairs, spend) in sorted(heap, key=lambda e: (-e[0], e[1]))
+            ]
+            if not complete:
+                logging.info(f"Transfer search hit its {time_budget}s budget at {k} transfers")
+                break
+        return results
+
+    def _prune_candidates(
+        self, squad: np.ndarray, max_transfers: int, max_per_club: int
+    ) -> Dict[str, np.ndarray]:
+        """Per-position candidate rows, sorted by points, minus dominated players."""
+        available = np.ones(len(self.ids), dtype=bool)
+        available[squad] = False
+        available &= ~np.isnan(self.points)
+
+        # A candidate beaten on price and points by players from this many
+        # distinct clubs can always be swapped for one of them: at most
+        # len(squad) // max_per_club clubs are full and the other ins of the
+        # plan occupy at most max_transfers - 1 of the dominators.
+        needed = len(squad) // max_per_club + max_transfers
+        out: Dict[str, np.ndarray] = {}
+        for position in set(self.positions[squad].tolist()):
+            rows = np.flatnonzero(available & (self.positions == position))
+            if rows.size > needed:
+                price = self.prices[rows]
+                pts = self.points[rows]
+                idx = np.arange(rows.size)
+                dominates = (
+                    (price[None, :] <= price[:, None])
+                    & (pts[None, :] >= pts[:, None])
+                    & ((price[None, :] < price[:, None])
+                       | (pts[None, :] > pts[:, None])
+                       | (idx[None, :] < idx[:, None]))
+                )
+                _, club_idx = np.unique(self._club_ids[rows], return_inverse=True)
+                onehot = np.zeros((rows.size, club_idx.max() + 1), dtype=np.int32)
+                onehot[idx, club_idx] = 1
+                n_clubs = ((dominates.astype(np.int32) @ onehot) > 0).sum(axis=1)
+                rows = rows[n_clubs < needed]
+            out[position] = rows[np.argsort(-self.points[rows], kind='stable')]
+        return out
+
+    def _search(
+        self,
+        k: int,
+        squad: np.ndarray,
+        cands: Dict[str, np.ndarray],
+        counts: np.ndarray,
+        bank: float,
+        penalty: float,
+        top_k: int,
+        max_per_club: int,
+        deadline: float,
+        heap: List[Tuple[float, int, Tuple]],
+        on_enter: Optional[Callable[[Tuple, float], None]],
+    ) -> bool:
+        """Fill ``heap`` with the best k-transfer plans; False if out of time."""
+        pos = self.positions
+        points = self.points
+        prices = self.prices
+        min_price = {p: float(prices[r].min()) if r.size else np.inf
+                     for p, r in cands.items()}
+
+        # Lagrangian bound on the budget: for any price weight lam >= 0, the
+        # best m distinct ins at a position gain at most the top-m sum of
+        # (points - lam * price) plus lam * money. top[p][:, m] holds those
+        # sums for every lam on the grid; the bound is the min over lam.
+        lams = LAMBDA_GRID * max(float(np.median(points[~np.isnan(points)])), 1.0) \
+            / max(float(np.median(prices)), 0.1)
+        top: Dict[str, np.ndarray] = {}
+        for p, r in cands.items():
+            vals = points[r][None, :] - lams[:, None] * prices[r][None, :]
+            vals = -np.sort(-vals, axis=1)[:, :k]
+            top[p] = np.concatenate([np.zeros((lams.size, 1)), np.cumsum(vals, axis=1)], axis=1)
+
+        suffix_cache: Dict[Tuple[str, ...], List[np.ndarray]] = {}
+
+        def suffix_tops(slots: List[str]) -> List[np.ndarray]:
+            """Summed top-m rows for slots[i:], for every i."""
+            key = tuple(slots)
+            if key in suffix_cache:
+                return suffix_cache[key]
+            out = [np.zeros(lams.size)] * (len(slots) + 1)
+            seen: Dict[str, int] = {}
+            for i in range(len(slots) - 1, -1, -1):
+                seen[slots[i]] = seen.get(slots[i], 0) + 1
+                out[i] = sum(top[p][:, m] for p, m in seen.items())
+            suffix_cache[key] = out
+            return out
+
+        # Out-sets ordered by their optimistic gain, so the search can stop
+        # as soon as no remaining out-set can beat the current k-th best plan
+        combos = []
+        for combo in itertools.combinations(squad.tolist(), k):
+            outs = sorted(combo, key=lambda o: pos[o])
+            slots = [pos[o] for o in outs]
+            if any(cands[p].size < slots.count(p) for p in set(slots)):
+                continue
+            out_pts = [float(points[o]) for o in outs]
+            money = bank + float(prices[outs].sum())
+            tops = suffix_tops(slots)
+            b = float((lams * money + tops[0]).min()) - sum(out_pts)
+            combos.append((b, outs, slots, out_pts, money, tops))
+        combos.sort(key=lambda c: -c[0])
+
+        counter = itertools.count()
+        nodes = 0
+        club_ids = self._club_ids
+
+        def push(net: float, pairs: Tuple, spend: float) -> None:
+            entry = (net, next(counter), (pairs, spend))
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heapreplace(heap, entry)
+            if on_enter is not None:
+                on_enter(pairs, spend)
+
+        for combo_bound, outs, slot_pos, out_pts, money, tops in combos:
+            threshold = heap[0][0] if len(heap) == top_k else -np.inf
+            if combo_bound - penalty <= threshold:
+                break
+            if time.perf_counter() > deadline:
+                return False
+
+            club_counts = counts.copy()
+            np.subtract.at(club_counts, club_ids[outs], 1)
+            # Unconstrained best gain, cheapest spend and sold points of slots i..
+            rest_best = [0.0] * (k + 1)
+            rest_price = [0.0] * (k + 1)
+            rest_out = [0.0] * (k + 1)
+            for i in range(k - 1, -1, -1):
+                rest_best[i] = rest_best[i + 1] + float(points[cands[slot_pos[i]][0]]) - out_pts[i]
+                rest_price[i] = rest_price[i + 1] + min_price[slot_pos[i]]
+                rest_out[i] = rest_out[i + 1] + out_pts[i]
+
+            chosen: List[int] = []
+
+            def dfs(i: int, gain: float, spent: float, start: int) -> bool:
+                """Try every in for slot i; each step filters all candidates at once."""
+                nonlocal nodes
+                nodes += 1
+                if nodes % 256 == 0 and time.perf_counter() > deadline:
+                    return False
+                rows = cands[slot_pos[i]]
+                # Same-position slots take candidates in increasing index
+                # order so each set of ins is only tried once
+                j0 = start if i > 0 and slot_pos[i] == slot_pos[i - 1] else 0
+                rows = rows[j0:]
+                g = gain + points[rows] - out_pts[i]
+                s = spent + prices[rows]
+                threshold = heap[0][0] if len(heap) == top_k else -np.inf
+                ok = ((g + rest_best[i + 1] - penalty > threshold)
+                      & (s + rest_price[i + 1] <= money + 1e-9)
+                      & (club_counts[club_ids[rows]] < max_per_club))
+
+                if i == k - 1:
+                    # Last slot: keep the best few that fit and are new top-k plans
+                    idx = np.flatnonzero(ok)
+                    if idx.size > top_k:
+                        idx = idx[np.argpartition(-g[idx], top_k - 1)[:top_k]]
+                    for j in idx[np.argsort(-g[idx], kind='stable')].tolist():
+                        net = float(g[j]) - penalty
+                        if len(heap) == top_k and net <= heap[0][0]:
+                            break
+                        push(net, tuple(zip(outs, chosen + [int(rows[j])])),
+                             float(s[j]) - money + bank)
+                    return True
+
+                idx = np.flatnonzero(ok)
+                if idx.size:
+                    budget_bound = (lams[None, :] * (money - s[idx])[:, None]
+                                    + tops[i + 1][None, :]).min(axis=1)
+                    bounds = g[idx] + budget_bound - rest_out[i + 1] - penalty
+                    keep = bounds > threshold
+                    idx, bounds = idx[keep], bounds[keep]
+                for j, bnd in zip(idx.tolist(), bounds.tolist() if idx.size else []):
+                    if len(heap) == top_k and bnd <= heap[0][0]:
+                        continue
+                    r = int(rows[j])
+                    c = club_ids[r]
+                    club_counts[c] += 1
+                    chosen.append(r)
+                    ok_ = dfs(i + 1, float(g[j]), float(s[j]), j0 + j + 1)
+                    chosen.pop()
+                    club_counts[c] -= 1
+                    if not ok_:
+                        return False
+                return True
+
+            if not dfs(0, 0.0, 0.0, 0):
+                return False
+        return True
+
+    def _describe(
+        self, pairs: Tuple, spend: float, bank: float, hits: int, hit_cost: float
+    ) -> Dict:
+        """Turn (out_row, in_row) pairs into the suggestion dicts the app shows."""
+        # Within a position, pair the weakest out with the strongest in
+        by_pos: Dict[str, Tuple[List[int], List[int]]] = {}
+        for o, i in pairs:
+            outs, ins = by_pos.setdefault(self.positions[o], ([], []))
+            outs.append(o)
+            ins.append(i)
+        transfers: List[Dict] = []
+        for position, (outs, ins) in by_pos.items():
+            outs = sorted(outs, key=lambda r: self.points[r])
+            ins = sorted(ins, key=lambda r: -self.points[r])
+            for o, i in zip(outs, ins):
+                transfers.append({
+                    'out_id': int(self.ids[o]),
+                    'out_name': str(self.names[o]),
+                    'in_id': int(self.ids[i]),
+                    'in_name': str(self.names[i]),
+                    'position': str(position),
+                    'predicted_out': round(float(self.points[o]), 2),
+                    'predicted_in': round(float(self.points[i]), 2),
+                    'delta_pts': round(float(self.points[i] - self.points[o]), 2),
+                })
+        transfers.sort(key=lambda t: t['delta_pts'], reverse=True)
+        gain = sum(float(self.points[i] - self.points[o]) for o, i in pairs)
+        return {
+            'n_transfers': len(pairs),
+            'transfers': transfers,
+            'gain': round(gain, 2),
+            'hits': hits,
+            'net_gain': round(gain - hits * hit_cost, 2),
+            'cost': round(spend, 1),
+            'bank_after': round(bank - spend, 1),
+        }
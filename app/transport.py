@@ -0,0 +1,264 @@
+"""Pooled, retrying HTTP transport with a circuit breaker and metrics."""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Replaying anything else (e.g. the login POST) could repeat its side effects
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD"})
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without touching the network while a host's breaker is open."""
+
+
+def retry_after(res: requests.Response) -> float:
+    """Seconds requested by a Retry-After header, or 0 if absent."""
+    try:
+        return float(res.headers.get("Retry-After", 0))
+    except ValueError:
+        return 0.0
+
+
+class CircuitBreaker:
+    """Per-host breaker: opens after ``threshold`` consecutive failures.
+
+    While open, requests fail fast for ``reset_after`` seconds; then one
+    trial request is let through (half-open) and its outcome closes or
+    re-opens the breaker.
+    """
+
+    def __init__(self, threshold: int = 5, reset_after: float = 30.0) -> None:
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._trial: Dict[str, bool] = {}
+
+    def allow(self, host: str) -> bool:
+        with self._lock:
+            opened = self._opened_at.get(host)
+            if opened is None:
+                return True
+            if time.monotonic() - opened < self.reset_after or self._trial.get(host):
+                return False
+            self._trial[host] = True
+            return True
+
+    def success(self, host: str) -> None:
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            self._trial.pop(host, None)
+
+    def release(self, host: str) -> None:
+        """End a half-open trial whose outcome says nothing about the host."""
+        with self._lock:
+            self._trial.pop(host, None)
+
+    def failure(self, host: str) -> bool:
+        """Record a failure; True if this opened (or re-opened) the breaker."""
+        with self._lock:
+            self._trial.pop(host, None)
+            n = self._failures[host] = self._failures.get(host, 0) + 1
+            if n >= self.threshold:
+                self._opened_at[host] = time.monotonic()
+                return True
+            return False
+
+    def state(self, host: str) -> str:
+        with self._lock:
+            if host not in self._opened_at:
+                return "closed"
+            if time.monotonic() - self._opened_at[host] >= self.reset_after:
+                return "half-open"
+            return "open"
+
+
+class TransportMetrics:
+    """Thread-safe request counters, byte totals and latency histogram."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._data = {
+                "requests": 0,
+                "attempts": 0,
+                "retries": 0,
+                "failures": 0,
+                "breaker_opens": 0,
+                "breaker_rejections": 0,
+                "bytes_wire": 0,
+                "bytes_decoded": 0,
+                "status": {},
+                "latency_ms": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            }
+
+    def add(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._data[key] += n
+
+    def attempt(self, status: Optional[int], elapsed: float, wire: int, decoded: int) -> None:
+        ms = elapsed * 1000.0
+        bucket = next((i for i, b in enumerate(LATENCY_BUCKETS_MS) if ms <= b),
+                      len(LATENCY_BUCKETS_MS))
+        key = str(status) if status is not None else "error"
+        with self._lock:
+            self._data["attempts"] += 1
+            self._data["latency_ms"][bucket] += 1
+            self._data["bytes_wire"] += wire
+            self._data["bytes_decoded"] += decoded
+            self._data["status"][key] = self._data["status"].get(key, 0) + 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            snap = dict(self._data)
+            snap["status"] = dict(self._data["status"])
+            snap["latency_ms"] = dict(zip(
+                [f"<={b}" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"],
+                self._data["latency_ms"]))
+        return snap
+
+
+class ResilientSession(requests.Session):
+    """``requests.Session`` with pool sizing, timeouts, retries and a breaker.
+
+    * connections come from an ``HTTPAdapter`` pool of ``pool_size`` per host;
+    * every request gets ``(connect_timeout, read_timeout)`` unless the
+      caller passes ``timeout``;
+    * GET/HEAD requests that hit connection errors, timeouts or 429/5xx are
+      retried up to ``max_retries`` times with full-jitter exponential
+      backoff (or the server's Retry-After), never past ``deadline`` seconds
+      in total; other methods are sent once unless the caller passes
+      ``retry=True`` (and ``retry=False`` turns retries off for a GET);
+    * a per-host ``CircuitBreaker`` fails fast while the upstream is down;
+    * responses are requested gzip-encoded and decoded transparently.
+
+    The last response is returned once retries run out, so callers keep
+    their usual ``raise_for_status`` handling.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        max_retries: int = 3,
+        backoff: float = 0.3,
+        max_backoff: float = 5.0,
+        deadline: float = 20.0,
+        breaker: Optional[CircuitBreaker] = None,
+        metrics: Optional[TransportMetrics] = None,
+    ) -> None:
+        super().__init__()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+        self.headers["Accept-Encoding"] = "gzip, deflate"
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.breaker = breaker if breaker is not None else CIRCUIT_BREAKER
+        self.metrics = metrics if metrics is not None else TRANSPORT_METRICS
+
+    def request(self, method, url, *args, **kwargs):
+        retry = kwargs.pop("retry", method.upper() in IDEMPOTENT_METHODS)
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).netloc
+        start = time.monotonic()
+        self.metrics.add("requests")
+        attempt = 0
+        while True:
+            if not self.breaker.allow(host):
+                self.metrics.add("breaker_rejections")
+                raise CircuitOpenError(f"circuit open for {host}")
+            t0 = time.perf_counter()
+            res, error = None, None
+            settled = False
+            try:
+                try:
+                    res = super().request(method, url, *args, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = e
+                elapsed = time.perf_counter() - t0
+                if res is not None and kwargs.get("stream"):
+                    # Reading the body here would defeat streaming; count the header only
+                    wire = int(res.headers.get("Content-Length") or 0)
+                    self.metrics.attempt(res.status_code, elapsed, wire, 0)
+                elif res is not None:
+                    wire = int(res.headers.get("Content-Length") or len(res.content))
+                    self.metrics.attempt(res.status_code, elapsed, wire, len(res.content))
+                else:
+                    self.metrics.attempt(None, elapsed, 0, 0)
+
+                failed = error is not None or res.status_code in RETRY_STATUSES
+                if not failed:
+                    settled = True
+                    self.breaker.success(host)
+                    return res
+                # 429 is the upstream throttling us, not an outage
+                if error is not None or res.status_code != 429:
+                    settled = True
+                    if self.breaker.failure(host):
+                        self.metrics.add("breaker_opens")
+                        logging.warning(f"Circuit opened for {host}")
+            finally:
+                # A 429 or an unexpected error (e.g. a garbled body) must not
+                # leave a half-open trial pending forever
+                if not settled:
+                    self.breaker.release(host)
+
+            delay = retry_after(res) if res is not None else 0.0
+            if delay <= 0:
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+            out_of_time = time.monotonic() - start + delay > self.deadline
+            if not retry or attempt >= self.max_retries or out_of_time:
+                self.metrics.add("failures")
+                if error is not None:
+                    raise error
+                return res
+            attempt += 1
+            self.metrics.add("retries")
+            logging.debug(f"Retrying {method} {url} in {delay:.2f}s "
+                          f"({error or res.status_code})")
+            time.sleep(delay)
+
+
+# Shared by every ResilientSession unless one is given its own, so all
+# clients in a process see one breaker state and one set of metrics
+TRANSPORT_METRICS = TransportMetrics()
+CIRCUIT_BREAKER = CircuitBreaker(
+    threshold=int(os.environ.get("FPL_HTTP_BREAKER_THRESHOLD", 5)),
+    reset_after=float(os.environ.get("FPL_HTTP_BREAKER_RESET", 30)),
+)
+
+
+def default_session(**overrides) -> ResilientSession:
+    """ResilientSession configured from FPL_HTTP_* environment variables."""
+    env = {
+        "pool_size": ("FPL_HTTP_POOL_SIZE", int),
+        "connect_timeout": ("FPL_HTTP_CONNECT_TIMEOUT", float),
+        "read_timeout": ("FPL_HTTP_READ_TIMEOUT", float),
+        "max_retries": ("FPL_HTTP_MAX_RETRIES", int),
+        "deadline": ("FPL_HTTP_DEADLINE", float),
+    }
+    kwargs = {k: cast(os.environ[name]) for k, (name, cast) in env.items() if name in os.environ}
+    kwargs.update(overrides)
+    return ResilientSession(**kwargs)
@@ -1,39 +1,86 @@
-import json
-import pandas as pd
-import matplotlib.pyplot as plt
-from bokeh.plotting import figure
-from bokeh.io import output_file
-from bokeh.models import ColumnDataSource, Span, Label
-import streamlit as st
-import numpy as np
+import functools
+import os
+import sys
 
+# pandas, matplotlib, bokeh and streamlit are imported where they are used:
+# each costs a few hundred ms, and most runs need only some of them
 
-def analyze_season_results():
-    # Load data with UTF-8 encoding
-    with open('top100k_managers_24_25.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
+from season_stats import season_stats
 
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
+MANAGERS_JSON = 'top100k_managers_24_25.json'
+PNG_PATH = 'points_distribution.png'
 
-    # Calculate statistics
-    my_rank = 7899
-    my_points = 2606
-    total_managers = 11_000_000  # Approximate total FPL managers
 
-    percentile = (my_rank / total_managers) * 100
-    points_stats = df['total'].describe()
+def render_png(hist, edges, my_points, digest):
+    """Write the matplotlib histogram unless it is current for ``digest``."""
+    marker = PNG_PATH + '.digest'
+    if os.path.exists(PNG_PATH) and os.path.exists(marker):
+        with open(marker, 'r', encoding='utf-8') as f:
+            if f.read().strip() == digest:
+                return
+    import matplotlib
+    matplotlib.use('Agg')  # files only; skips GUI backend detection
+    import matplotlib.pyplot as plt
 
-    # Create matplotlib visualization
     plt.figure(figsize=(10, 6))
-    plt.hist(df['total'], bins=50, edgecolor='black')
+    plt.stairs(hist, edges, fill=True, edgecolor='black')
     plt.axvline(x=my_points, color='red', linestyle='--', label=f'My Score: {my_points}')
     plt.title('Points Distribution in Top 100K (2024/25)')
     plt.xlabel('Total Points')
     plt.ylabel('Number of Managers')
     plt.legend()
-    plt.savefig('points_distribution.png')
+    plt.savefig(PNG_PATH)
     plt.close()
+    with open(marker, 'w', encoding='utf-8') as f:
+        f.write(digest)
+
+
+def _build_season_figure(digest, my_points, _hist, _edges):
+    return build_bokeh_plot(_hist, _edges, my_points)
+
+
+@functools.lru_cache(maxsize=None)
+def _figure_cache():
+    # st.cache_resource, applied on first use rather than at import
+    import streamlit as st
+
+    return st.cache_resource(show_spinner=False)(_build_season_figure)
+
+
+def _season_figure(digest, my_points, hist, edges):
+    return _figure_cache()(digest, my_points, hist, edges)
+
+
+def analyze_season_results(path=MANAGERS_JSON, columnar_dir=None):
+    import pandas as pd
+
+    # One streaming pass per file content; later runs read the cached stats
+    stats, digest = season_stats(path, field='total', columnar_dir=columnar_dir)
+
+    # Calculate statistics
+    my_rank = 7899
+    my_points = 2606
+    total_managers = 11_000_000  # Approximate total FPL managers
+
+    percentile = (my_rank / total_managers) * 100
+    points_stats = pd.Series(stats.describe(), name='total')
+
+    hist, edges = stats.histogram_bins(50)
+    render_png(hist, edges, my_points, digest)
+
+    return {
+        'rank': my_rank,
+        'points': my_points,
+        'percentile': percentile,
+        'stats': points_stats,
+        'plot': _season_figure(digest, my_points, hist, edges)
+    }
+
+
+def build_bokeh_plot(hist, edges, my_points):
+    from bokeh.models import ColumnDataSource, Label, Span
+    from bokeh.plotting import figure
 
     # Create interactive Bokeh visualization
     p = figure(title='Points Distribution in Top 100K (2024/25)',
@@ -42,8 +89,6 @@ def analyze_season_results():
                height=400,
                tools='pan,box_zoom,wheel_zoom,reset,save,hover')  # Add interactive tools
 
-    # Create histogram data
-    hist, edges = np.histogram(df['total'], bins=50)
     source = ColumnDataSource(data={
         'top': hist,
         'left': edges[:-1],
@@ -74,16 +119,13 @@ def analyze_season_results():
                   text_color='red')
     p.add_layout(label)
 
-    return {
-        'rank': my_rank,
-        'points': my_points,
-        'percentile': percentile,
-        'stats': points_stats,
-        'plot': p
-    }
+    return p
 
 
 def add_to_streamlit():
+    import pandas as pd
+    import streamlit as st
+
     st.title('FPL 2024/25 Season Analysis')
 
     results = analyze_season_results()